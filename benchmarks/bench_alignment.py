@@ -0,0 +1,58 @@
+"""行对齐基准：在文件B开头插入一行、中间删除若干行后，比较按行号、按关键列和按内容差异对齐的耗时和差异数
+
+直接在内存中的DataFrame上比较，不包含Excel读写时间。
+
+用法:
+    python benchmarks/bench_alignment.py --rows 20000 100000 --cols 20
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from synthetic import make_frames
+
+from excel_compare_core import ExcelComparer
+
+
+def make_shifted_frames(rows, cols, deleted_rows=10, seed=0):
+    """生成带编号列的一对DataFrame，B在开头插入一行并删除若干行"""
+    df_a, df_b = make_frames(rows, cols, diff_ratio=0.001, seed=seed)
+    df_a.insert(0, '编号', np.arange(1, rows + 1))
+    df_b.insert(0, '编号', np.arange(1, rows + 1))
+
+    rng = np.random.default_rng(seed)
+    df_b = df_b.drop(index=rng.choice(rows, deleted_rows, replace=False))
+    inserted = df_b.iloc[:1].copy()
+    inserted['编号'] = rows + 1
+    df_b = pd.concat([inserted, df_b], ignore_index=True)
+    return df_a, df_b
+
+
+def main():
+    parser = argparse.ArgumentParser(description='行对齐基准')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000], help='文件A行数列表')
+    parser.add_argument('--cols', type=int, default=20, help='数据列数（另加一列编号）')
+    parser.add_argument('--deleted', type=int, default=10, help='文件B中删除的行数')
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df_a, df_b = make_shifted_frames(rows, args.cols, args.deleted)
+        row_numbers_a = list(range(1, len(df_a) + 1))
+        row_numbers_b = list(range(1, len(df_b) + 1))
+        print(f"\n{rows} 行 x {args.cols + 1} 列（B开头插入1行，删除{args.deleted}行）")
+        print(f"{'对齐方式':<12}{'耗时(s)':>10}{'差异数':>12}{'新增行':>8}{'删除行':>8}")
+        for label, comparer in (('position', ExcelComparer()),
+                                ('key(编号)', ExcelComparer(key_columns=['编号'])),
+                                ('diff', ExcelComparer(row_alignment='diff'))):
+            start = time.perf_counter()
+            comparison = comparer.compare_frames(df_a, df_b, row_numbers_a, row_numbers_b,
+                                                 comparer.columns.align(df_a.columns, df_b.columns))
+            elapsed = time.perf_counter() - start
+            statistics = comparison['statistics']
+            print(f"{label:<12}{elapsed:>10.2f}{statistics['diff_count']:>12}"
+                  f"{statistics.get('added_rows', '-'):>8}{statistics.get('removed_rows', '-'):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""列对齐基准：文件B打乱列顺序并插入、删除列后，比较按列位置和按表头名称对齐的耗时和差异数，
+以及批量比较中每对文件重新计算列对应关系与按表头复用缓存的耗时
+
+直接在内存中的DataFrame上比较，不包含Excel读写时间。
+
+用法:
+    python benchmarks/bench_columns.py --rows 20000 100000 --cols 20
+"""
+import argparse
+import time
+
+import numpy as np
+from synthetic import make_frames
+
+from excel_compare_columns import ColumnAligner
+from excel_compare_core import ExcelComparer
+
+
+def make_reordered_frames(rows, cols, seed=0):
+    """生成一对DataFrame，B的列顺序打乱，删除A的最后一列并插入一个新列"""
+    df_a, df_b = make_frames(rows, cols, diff_ratio=0.001, seed=seed)
+    rng = np.random.default_rng(seed)
+    df_b = df_b.iloc[:, rng.permutation(cols - 1)].copy()
+    df_b.insert(cols // 2, '新增列', 'new')
+    return df_a, df_b
+
+
+def timed(function, *args):
+    """返回 (函数返回值, 耗时)"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列对齐基准')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000], help='文件行数列表')
+    parser.add_argument('--cols', type=int, default=20, help='文件A列数')
+    parser.add_argument('--pairs', type=int, default=1000, help='表头相同的文件对数（列对应关系计算）')
+    parser.add_argument('--header-cols', type=int, default=500, help='列对应关系计算使用的表头列数')
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df_a, df_b = make_reordered_frames(rows, args.cols)
+        row_numbers = list(range(1, rows + 1))
+        print(f"\n{rows} 行 x {args.cols} 列（B打乱列顺序，删除1列并插入1列）")
+        print(f"{'列对齐方式':<14}{'耗时(s)':>10}{'比较列数':>10}{'差异数':>12}")
+        for alignment in ('position', 'header'):
+            comparer = ExcelComparer(column_alignment=alignment)
+            columns = comparer.columns.align(df_a.columns, df_b.columns)
+            comparison, elapsed = timed(comparer.compare_frames, df_a, df_b, row_numbers, row_numbers, columns)
+            statistics = comparison['statistics']
+            print(f"{alignment:<14}{elapsed:>10.2f}{statistics['compared_cols']:>10}{statistics['diff_count']:>12}")
+
+    # 批量比较中各文件对的表头通常相同：按表头缓存后每批只计算一次
+    header_a = [f' 列{j} ' for j in range(args.header_cols)]
+    header_b = [f'列{j}' for j in reversed(range(args.header_cols))]
+    headers = [(list(header_a), list(header_b)) for _ in range(args.pairs)]
+    aligner = ColumnAligner('header', normalize=True)
+    _, uncached = timed(lambda: [aligner.match(columns_a, columns_b) for columns_a, columns_b in headers])
+    _, cached = timed(lambda: [aligner.align(columns_a, columns_b) for columns_a, columns_b in headers])
+    print(f"\n{args.pairs} 对文件 x {args.header_cols} 列表头（归一化后按表头名称对齐）")
+    print(f"{'方式':<16}{'总耗时(s)':>12}")
+    print(f"{'每对重新计算':<16}{uncached:>12.3f}")
+    print(f"{'按表头缓存':<16}{cached:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""值比较方式基准：比较文本比较与类型感知比较在"格式噪声"数据上的耗时和报告的差异数
+
+文件B在文件A的基础上加入不改变实际值的噪声：整数列存为浮点数（1 与 1.0）、浮点数加上舍入误差、
+日期列存为日期文本，另有约 diff_ratio 比例的单元格真正不同。
+
+用法:
+    python benchmarks/bench_compare_modes.py --rows 200000 --cols 9 --diff-ratio 0.01
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from synthetic import make_frames
+
+from excel_compare_core import ExcelComparer
+
+
+def add_format_noise(df_a, df_b, seed=0):
+    """给文件B加入格式噪声，并给两边各加一个日期列（文件B中为日期文本）"""
+    rng = np.random.default_rng(seed)
+    df_b = df_b.copy()
+    for column in df_b.columns:
+        if df_b[column].dtype.kind == 'i':
+            df_b[column] = df_b[column].astype(float)
+        elif df_b[column].dtype.kind == 'f':
+            df_b[column] = df_b[column] * (1 + rng.choice([0, 1e-12, -1e-12], len(df_b)))
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 3650, len(df_a)), unit='D')
+    df_a = df_a.assign(日期=dates)
+    df_b = df_b.assign(日期=dates.strftime('%Y/%m/%d'))
+    return df_a, df_b
+
+
+def main():
+    parser = argparse.ArgumentParser(description='值比较方式基准')
+    parser.add_argument('--rows', type=int, default=200000, help='文件行数')
+    parser.add_argument('--cols', type=int, default=9, help='文件列数（另加一个日期列）')
+    parser.add_argument('--diff-ratio', type=float, default=0.01, help='真正不同的单元格比例')
+    args = parser.parse_args()
+
+    df1, df2 = add_format_noise(*make_frames(args.rows, args.cols, args.diff_ratio))
+    row_numbers = list(range(1, args.rows + 1))
+    print(f"{args.rows} 行 x {len(df1.columns)} 列")
+    print(f"{'比较方式':<12}{'耗时(s)':>10}{'差异数':>12}")
+    for mode in ('text', 'typed'):
+        comparer = ExcelComparer(compare_mode=mode)
+        start = time.perf_counter()
+        comparison = comparer.compare_frames(df1, df2, row_numbers, row_numbers,
+                                             comparer.columns.align(df1.columns, df2.columns))
+        elapsed = time.perf_counter() - start
+        print(f"{mode:<12}{elapsed:>10.2f}{comparison['statistics']['diff_count']:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""差异记录内存基准：比较旧的每条差异一个字典与列式差异记录（DiffRecords）每条差异占用的字节数
+
+默认生成约20万个差异单元格的文件对（10万行 x 10列，20%单元格不同），
+用 tracemalloc 统计各表示方式在比较结束后仍占用的内存。
+
+用法:
+    python benchmarks/bench_diff_memory.py --rows 100000 --cols 10 --diff-ratio 0.2
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from synthetic import make_frames
+
+from excel_compare_core import ExcelComparer
+from excel_compare_diffs import DIFFERENCE_FIELDS
+
+
+def measure(build):
+    """返回 (结果, build 结束后仍占用的字节数, 耗时)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='差异记录内存基准')
+    parser.add_argument('--rows', type=int, default=100000, help='文件行数')
+    parser.add_argument('--cols', type=int, default=10, help='文件列数')
+    parser.add_argument('--diff-ratio', type=float, default=0.2, help='不同单元格的比例')
+    args = parser.parse_args()
+
+    df1, df2 = make_frames(args.rows, args.cols, args.diff_ratio)
+    row_numbers = list(range(1, args.rows + 1))
+    comparer = ExcelComparer()
+    columns = comparer.columns.align(df1.columns, df2.columns)
+
+    records, records_bytes, records_time = measure(
+        lambda: comparer.calculate_changed_row_differences(df1, df2, row_numbers, columns)[0])
+    compact, compact_bytes, compact_time = measure(records.compact)
+    # 旧表示：每条差异一个6键字典（值已格式化）
+    _, dicts_bytes, dicts_time = measure(
+        lambda: [dict(zip(DIFFERENCE_FIELDS, row)) for row in records.iter_rows()])
+
+    count = len(records)
+    print(f"{args.rows} 行 x {args.cols} 列，{count} 个差异单元格")
+    print(f"{'表示方式':<28}{'耗时(s)':>10}{'内存(MB)':>12}{'字节/差异':>12}")
+    for label, size, elapsed in (
+        ('字典列表（旧）', dicts_bytes, records_time + dicts_time),
+        ('DiffRecords（引用列数据）', records_bytes, records_time),
+        ('DiffRecords.compact()', compact_bytes, compact_time),
+    ):
+        print(f"{label:<28}{elapsed:>10.2f}{size / (1024 * 1024):>12.1f}{size / max(count, 1):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
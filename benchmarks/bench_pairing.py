@@ -0,0 +1,77 @@
+"""文件发现和配对基准：递归扫描大量文件，并比较每次添加文件后全部重新配对与增量配对的耗时
+
+模拟在图形界面中分批添加文件：旧的做法每次添加后对所有文件重新调用 find_file_pairs，
+并为每个文件再解析一次文件名；增量配对只解析新增的文件，并刷新同一基础名称下的文件。
+生成的是空文件（只测文件名处理，不读取内容）。
+
+用法:
+    python benchmarks/bench_pairing.py --files 10000 --batch 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import synthetic  # noqa: F401  导入时把项目根目录加入 sys.path
+
+from excel_compare_files import PairingIndex, extract_base_name_and_type, find_file_pairs, scan_excel_files
+
+
+def make_tree(root, files, per_dir):
+    """在 root 下生成约 files 个空的 -A/-B 文件，每个子目录 per_dir 个"""
+    for i in range(files // 2):
+        directory = os.path.join(root, f'dir{i * 2 // per_dir:04d}')
+        os.makedirs(directory, exist_ok=True)
+        for file_type in ('A', 'B'):
+            open(os.path.join(directory, f'report{i:06d}-{file_type}.xlsx'), 'wb').close()
+
+
+def repair_all(batches):
+    """旧的做法：每批添加后对全部文件重新配对，并逐个解析文件名生成列表"""
+    selected = []
+    for batch in batches:
+        selected = list(set(selected + batch))
+        find_file_pairs(selected)
+        for file_path in selected:
+            extract_base_name_and_type(os.path.basename(file_path))
+
+
+def pair_incrementally(batches):
+    """增量配对：每批只处理新增文件和配对状态变化的文件"""
+    index = PairingIndex()
+    for batch in batches:
+        _, changed = index.add(batch)
+        for file_path in index.files_of(changed):
+            index.describe(file_path)
+        index.pairs()
+
+
+def timed(function, *args):
+    """返回函数耗时"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文件发现和配对基准')
+    parser.add_argument('--files', type=int, default=10000, help='文件数')
+    parser.add_argument('--batch', type=int, default=500, help='每次添加的文件数')
+    parser.add_argument('--per-dir', type=int, default=200, help='每个子目录中的文件数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        make_tree(tmp_dir, args.files, args.per_dir)
+        start = time.perf_counter()
+        files = scan_excel_files(tmp_dir, recursive=True)
+        print(f"递归扫描 {len(files)} 个文件用时 {time.perf_counter() - start:.3f}s")
+
+    batches = [files[i:i + args.batch] for i in range(0, len(files), args.batch)]
+    print(f"分 {len(batches)} 批添加，每批 {args.batch} 个文件")
+    print(f"{'方式':<16}{'总耗时(s)':>12}")
+    print(f"{'全部重新配对':<16}{timed(repair_all, batches):>12.3f}")
+    print(f"{'增量配对':<16}{timed(pair_incrementally, batches):>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
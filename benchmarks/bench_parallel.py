@@ -0,0 +1,40 @@
+"""并行批量比较的扩展性基准：比较 1 个进程与 N 个进程处理同一批合成文件对的耗时
+
+用法:
+    python benchmarks/bench_parallel.py --pairs 16 --rows 2000 --cols 10 --workers 1 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import write_batch
+
+from excel_compare_core import ExcelComparer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并行批量比较扩展性基准')
+    parser.add_argument('--pairs', type=int, default=16, help='文件对数量')
+    parser.add_argument('--rows', type=int, default=2000, help='每个文件的行数')
+    parser.add_argument('--cols', type=int, default=10, help='每个文件的列数')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help='要测试的进程数列表')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_pairs = write_batch(os.path.join(tmp_dir, 'input'), args.pairs, args.rows, args.cols)
+        print(f"{args.pairs} 对文件，每个文件 {args.rows} 行 x {args.cols} 列")
+
+        baseline = None
+        for workers in args.workers:
+            comparer = ExcelComparer(log=lambda message: None, workers=workers)
+            start = time.perf_counter()
+            comparer.run_batch(file_pairs, os.path.join(tmp_dir, f'out_{workers}'))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3d} 耗时 {elapsed:8.2f}s  加速比 {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
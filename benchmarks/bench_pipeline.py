@@ -0,0 +1,248 @@
+"""比较流程分阶段基准：生成合成的 -A/-B 文件对，分别统计读取、行范围选取、差异计算、报告写入和批量汇总的耗时与峰值内存
+
+结果可保存为 JSON，并与基准结果（之前保存的 JSON）比较，任一阶段的耗时或峰值内存超过阈值时以退出码1结束，
+便于在修改 calculate_differences、读取引擎或报告写入前后对比。
+
+各阶段通过包装比较器的方法计时（批量比较本身与正常运行相同，逐对在当前进程中比较）：
+    read     读取两个文件（read_workbook）
+    select   按行范围选出要比较的行（select_rows）
+    diff     对齐行并计算差异（compare_frames）
+    report   写入单对文件的比较报告（generate_single_report）
+    summary  生成批量汇总报告（generate_batch_summary）
+计时与内存分开测量：先不启用 tracemalloc 重复运行取耗时中位数，再启用 tracemalloc 运行一次统计各阶段的峰值内存。
+
+用法:
+    python benchmarks/bench_pipeline.py --pairs 4 --rows 20000 --cols 10 --output pipeline.json
+    python benchmarks/bench_pipeline.py --pairs 4 --rows 20000 --cols 10 --baseline pipeline.json --threshold 0.1
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from synthetic import COLUMN_TYPES, DEFAULT_COLUMN_TYPES, write_batch
+
+from excel_compare_align import ROW_ALIGNMENTS
+from excel_compare_core import ExcelComparer
+from excel_compare_reader import READ_ENGINES
+from excel_compare_report import DATA_SHEET_MODES
+from excel_compare_rules import COMPARE_MODES
+
+# 阶段名及其说明，按流程顺序排列
+STAGES = {
+    'read': '读取',
+    'select': '行范围选取',
+    'diff': '差异计算',
+    'report': '报告写入',
+    'summary': '批量汇总',
+}
+# 比较器中与各阶段对应的方法
+STAGE_METHODS = {
+    'read': 'read_workbook',
+    'select': 'select_rows',
+    'diff': 'compare_frames',
+    'report': 'generate_single_report',
+    'summary': 'generate_batch_summary',
+}
+MB = 1024 * 1024
+
+
+class StageRecorder:
+    """累计各阶段的耗时和（启用 tracemalloc 时）峰值内存
+
+    阶段峰值为该阶段运行期间相对进入时增加的内存，同一阶段多次调用时取最大值；
+    每次进入阶段都会重置 tracemalloc 的峰值，因此另外记录整个运行过程中的绝对峰值。
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.peak_bytes = dict.fromkeys(STAGES, 0)
+        self.total_peak_bytes = 0
+
+    def wrap(self, stage, function):
+        """返回计入指定阶段的包装函数"""
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                base, peak = tracemalloc.get_traced_memory()
+                self.total_peak_bytes = max(self.total_peak_bytes, peak)
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                if tracing:
+                    _, peak = tracemalloc.get_traced_memory()
+                    self.peak_bytes[stage] = max(self.peak_bytes[stage], peak - base)
+                    self.total_peak_bytes = max(self.total_peak_bytes, peak)
+        return timed
+
+
+def run_once(file_pairs, options, output_dir, trace_memory=False):
+    """运行一次批量比较，返回 (各阶段耗时, 各阶段峰值内存, 总耗时, 总峰值内存)"""
+    recorder = StageRecorder()
+    comparer = ExcelComparer(log=lambda message: None, **options)
+    for stage, name in STAGE_METHODS.items():
+        setattr(comparer, name, recorder.wrap(stage, getattr(comparer, name)))
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        _, _, failed = comparer.run_batch(file_pairs, output_dir)
+        total = time.perf_counter() - start
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            recorder.total_peak_bytes = max(recorder.total_peak_bytes, peak)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    if failed:
+        raise RuntimeError(f"{failed} 对文件比较失败")
+    return recorder.seconds, recorder.peak_bytes, total, recorder.total_peak_bytes
+
+
+def run_benchmark(args):
+    """生成文件对并运行基准，返回结果字典"""
+    column_types = tuple(args.column_types)
+    options = {
+        'range_text': args.range_text,
+        'read_engine': args.read_engine,
+        'compare_mode': args.compare_mode,
+        'row_alignment': args.row_alignment,
+        'data_sheets': args.data_sheets,
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generate_start = time.perf_counter()
+        file_pairs = write_batch(os.path.join(tmp_dir, 'input'), args.pairs, args.rows, args.cols,
+                                 args.diff_ratio, column_types)
+        print(f"生成 {args.pairs} 对文件（{args.rows} 行 x {args.cols} 列）用时 "
+              f"{time.perf_counter() - generate_start:.2f}s")
+
+        runs = []
+        for i in range(args.repeat):
+            runs.append(run_once(file_pairs, options, os.path.join(tmp_dir, f'run{i}')))
+        peak_bytes, total_peak = {}, 0
+        if not args.no_memory:
+            _, peak_bytes, _, total_peak = run_once(file_pairs, options, os.path.join(tmp_dir, 'memory'),
+                                                   trace_memory=True)
+
+    stages = {}
+    for stage in STAGES:
+        seconds = [run[0][stage] for run in runs]
+        stages[stage] = {'seconds': statistics.median(seconds), 'runs': seconds}
+        if peak_bytes:
+            stages[stage]['peak_mb'] = peak_bytes[stage] / MB
+    totals = [run[2] for run in runs]
+    total = {'seconds': statistics.median(totals), 'runs': totals}
+    if peak_bytes:
+        total['peak_mb'] = total_peak / MB
+    return {
+        'config': {
+            'pairs': args.pairs, 'rows': args.rows, 'cols': args.cols, 'diff_ratio': args.diff_ratio,
+            'column_types': list(column_types), **options,
+        },
+        'repeat': args.repeat,
+        'environment': {
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        },
+        'stages': stages,
+        'total': total,
+    }
+
+
+def print_results(result):
+    """打印各阶段的耗时和峰值内存"""
+    print(f"{'阶段':<12}{'耗时(s)':>10}{'峰值内存(MB)':>14}")
+    for stage, label in STAGES.items():
+        entry = result['stages'][stage]
+        peak = f"{entry['peak_mb']:>14.1f}" if 'peak_mb' in entry else f"{'-':>14}"
+        print(f"{label:<12}{entry['seconds']:>10.3f}{peak}")
+    total = result['total']
+    peak = f"{total['peak_mb']:>14.1f}" if 'peak_mb' in total else f"{'-':>14}"
+    print(f"{'合计':<12}{total['seconds']:>10.3f}{peak}")
+
+
+def compare_with_baseline(result, baseline, threshold, min_seconds, min_mb):
+    """与基准结果比较，打印对比表，返回退化的项目列表
+
+    耗时或峰值内存超过基准的 (1 + threshold) 倍，且绝对增量超过 min_seconds / min_mb 时视为退化，
+    绝对增量下限用于忽略很短的阶段的计时噪声。
+    """
+    if baseline.get('config') != result['config']:
+        print("⚠️ 基准结果的参数与本次运行不同，对比结果仅供参考")
+
+    regressions = []
+    print(f"{'阶段':<12}{'指标':<8}{'基准':>10}{'本次':>10}{'变化':>10}")
+    entries = list(STAGES.items()) + [('total', '合计')]
+    for stage, label in entries:
+        current = result['total'] if stage == 'total' else result['stages'][stage]
+        previous = baseline.get('total') if stage == 'total' else baseline.get('stages', {}).get(stage)
+        if not previous:
+            continue
+        for metric, metric_label, floor in (('seconds', '耗时', min_seconds), ('peak_mb', '内存', min_mb)):
+            if metric not in current or metric not in previous:
+                continue
+            old, new = previous[metric], current[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = new > old * (1 + threshold) and new - old > floor
+            marker = ' ❌' if regressed else ''
+            print(f"{label:<12}{metric_label:<8}{old:>10.3f}{new:>10.3f}{change:>+10.1%}{marker}")
+            if regressed:
+                regressions.append(f"{label}{metric_label}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较流程分阶段基准')
+    parser.add_argument('--pairs', type=int, default=4, help='文件对数量')
+    parser.add_argument('--rows', type=int, default=20000, help='每个文件的行数')
+    parser.add_argument('--cols', type=int, default=10, help='每个文件的列数')
+    parser.add_argument('--column-types', nargs='+', choices=COLUMN_TYPES, default=list(DEFAULT_COLUMN_TYPES),
+                        help='列类型，按顺序循环使用')
+    parser.add_argument('--diff-ratio', type=float, default=0.01, help='不同单元格的比例')
+    parser.add_argument('-r', '--range', dest='range_text', default='', help='行范围，留空比较所有行')
+    parser.add_argument('--read-engine', choices=READ_ENGINES, default='auto', help='读取引擎')
+    parser.add_argument('--compare', dest='compare_mode', choices=COMPARE_MODES, default='text', help='值比较方式')
+    parser.add_argument('--align', dest='row_alignment', choices=ROW_ALIGNMENTS, default='position',
+                        help='行对齐方式（关键列对齐不适用，合成数据没有关键列）')
+    parser.add_argument('--data-sheets', choices=DATA_SHEET_MODES, default='all', help='原始数据工作表的输出方式')
+    parser.add_argument('--repeat', type=int, default=3, help='计时重复次数（取中位数）')
+    parser.add_argument('--no-memory', action='store_true', help='不统计峰值内存（tracemalloc 会明显变慢）')
+    parser.add_argument('-o', '--output', help='将结果保存为 JSON 文件')
+    parser.add_argument('--baseline', help='与之比较的基准结果 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=0.1, help='视为退化的相对增量（默认0.1即10%%）')
+    parser.add_argument('--min-seconds', type=float, default=0.05, help='视为退化的最小耗时增量（秒）')
+    parser.add_argument('--min-mb', type=float, default=1.0, help='视为退化的最小峰值内存增量（MB）')
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_results(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.threshold, args.min_seconds, args.min_mb)
+        if regressions:
+            print(f"❌ 相对基准退化超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"✅ 没有超过 {args.threshold:.0%} 的退化")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Excel 读取引擎基准：比较各引擎用 read_sheets（比较器实际使用的读取函数）读取合成工作簿的耗时和峰值内存（RSS）
+
+每个引擎在独立子进程中读取，峰值RSS互不影响（仅支持 Linux/macOS）。指定 --range 时按行范围只读取需要的行，
+auto 一行显示按文件大小和行范围实际选择的引擎。
+
+用法:
+    python benchmarks/bench_readers.py --rows 20000 50000 --cols 20
+    python benchmarks/bench_readers.py --rows 50000 --range 1,50000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import make_frames
+
+from excel_compare_ranges import RowRange
+from excel_compare_reader import ENGINE_MODULES, engine_available, read_sheets
+
+
+def peak_rss_mb():
+    """当前进程的峰值RSS（MB）"""
+    # Linux 上 ru_maxrss 会继承 fork 时父进程的峰值，优先读取 VmHWM
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以KB为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(engine, path, range_text):
+    """子进程：读取一次文件并输出耗时、内存和实际使用的引擎"""
+    rows = RowRange(range_text).read_rows()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    sheets, used_engine = read_sheets(path, engine, rows=rows)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': baseline,
+                      'rows': sum(len(df) for df in sheets.values()), 'engine': used_engine}))
+
+
+def measure(engine, path, range_text):
+    """在子进程中测量一个引擎"""
+    output = subprocess.run([sys.executable, __file__, '--child', engine, path, range_text],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Excel 读取引擎基准')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000], help='工作簿行数列表')
+    parser.add_argument('--cols', type=int, default=20, help='工作簿列数')
+    parser.add_argument('--range', dest='range_text', default='', help="行范围，如 '1,50000'（默认读取所有行）")
+    parser.add_argument('--child', nargs=3, metavar=('ENGINE', 'PATH', 'RANGE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    engines = ['auto'] + [engine for engine in ENGINE_MODULES if engine != 'xlrd' and engine_available(engine)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            path = os.path.join(tmp_dir, f'bench_{rows}.xlsx')
+            make_frames(rows, args.cols)[0].to_excel(path, index=False)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"\n{rows} 行 x {args.cols} 列（{size_mb:.1f} MB），行范围: {args.range_text or '所有行'}")
+            print(f"{'引擎':<32}{'耗时(s)':>10}{'读取行数':>10}{'峰值RSS(MB)':>14}{'读取增量(MB)':>14}")
+            for engine in engines:
+                result = measure(engine, path, args.range_text)
+                label = f"auto（{result['engine']}）" if engine == 'auto' else engine
+                print(f"{label:<32}{result['seconds']:>10.2f}{result['rows']:>10}{result['peak_rss_mb']:>14.1f}"
+                      f"{result['peak_rss_mb'] - result['baseline_rss_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
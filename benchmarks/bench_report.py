@@ -0,0 +1,77 @@
+"""报告写入基准：比较旧的 pandas/openpyxl 写法与逐行写出的报告引擎在大量差异时的写入耗时和文件大小
+
+默认生成约10万个差异单元格的文件对（10万行 x 10列，10%单元格不同），只计时报告写入部分。
+"+标记" 表示在原始数据工作表中标记差异单元格（highlight_diffs=True），用于衡量标记底色的额外开销。
+
+用法:
+    python benchmarks/bench_report.py --rows 100000 --cols 10 --diff-ratio 0.1
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from synthetic import make_frames
+
+from excel_compare_core import SHEET_COMPARED, ExcelComparer, sheet_statistics, with_row_numbers
+from excel_compare_diffs import DIFFERENCE_FIELDS
+from excel_compare_report import engine_available
+
+
+def write_with_pandas(path, df1, df2, comparison, row_numbers):
+    """旧实现：通过 pandas.ExcelWriter(openpyxl) 写出整个DataFrame的副本"""
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        pd.DataFrame({'项目': ['不同单元格数'], '值': [comparison['statistics']['diff_count']]}).to_excel(
+            writer, sheet_name='比较概览', index=False)
+        with_row_numbers(df1, row_numbers).to_excel(writer, sheet_name='文件A数据', index=False)
+        with_row_numbers(df2, row_numbers).to_excel(writer, sheet_name='文件B数据', index=False)
+        pd.DataFrame(list(comparison['differences'].iter_rows()), columns=DIFFERENCE_FIELDS).to_excel(
+            writer, sheet_name='差异详情', index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='报告写入基准')
+    parser.add_argument('--rows', type=int, default=100000, help='文件行数')
+    parser.add_argument('--cols', type=int, default=10, help='文件列数')
+    parser.add_argument('--diff-ratio', type=float, default=0.1, help='不同单元格的比例')
+    args = parser.parse_args()
+
+    df1, df2 = make_frames(args.rows, args.cols, args.diff_ratio)
+    row_numbers = list(range(1, args.rows + 1))
+    # 与 read_sheets 的返回值一致，以数据行号为索引
+    df1.index = df2.index = pd.RangeIndex(1, args.rows + 1)
+    compared = [ExcelComparer().compare_sheet('Sheet1', df1, df2)]
+    # 标记差异时比较结果中带有各文件的差异单元格位置
+    highlighted = [ExcelComparer(highlight_diffs=True).compare_sheet('Sheet1', df1, df2)]
+    comparison = compared[0]['comparison']
+    statistics = dict(comparison['statistics'], read_engines='',
+                      sheet_statistics=[sheet_statistics('Sheet1', SHEET_COMPARED, len(df1), len(df2),
+                                                         comparison['statistics'])])
+    pair = {'base_name': 'bench', 'file_a': 'bench-A.xlsx', 'file_b': 'bench-B.xlsx'}
+    print(f"{args.rows} 行 x {args.cols} 列，{comparison['statistics']['diff_count']} 个差异单元格")
+
+    variants = [('pandas+openpyxl（旧）', None, None, False)]
+    engines = ['openpyxl'] + (['xlsxwriter'] if engine_available('xlsxwriter') else [])
+    for engine in engines:
+        for data_sheets in ('all', 'diff', 'none'):
+            variants.append((f"{engine} / {data_sheets}", engine, data_sheets, False))
+        for data_sheets in ('all', 'diff'):
+            variants.append((f"{engine} / {data_sheets} +标记", engine, data_sheets, True))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'写入方式':<24}{'耗时(s)':>10}{'文件大小(MB)':>14}")
+        for i, (label, engine, data_sheets, highlight) in enumerate(variants):
+            path = os.path.join(tmp_dir, f'report_{i}.xlsx')
+            start = time.perf_counter()
+            if engine is None:
+                write_with_pandas(path, df1, df2, comparison, row_numbers)
+            else:
+                comparer = ExcelComparer(report_engine=engine, data_sheets=data_sheets, highlight_diffs=highlight)
+                comparer.generate_single_report(pair, highlighted if highlight else compared, statistics, path)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<24}{elapsed:>10.2f}{os.path.getsize(path) / (1024 * 1024):>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""解析缓存基准：比较直接解析XLSX、缓存未命中（解析并写入缓存）和缓存命中（内存映射读取 Arrow）的读取耗时
+
+缓存命中的耗时包括检查文件修改时间和大小、读取清单和内存映射各工作表，取 --repeat 次的中位数。
+
+用法:
+    python benchmarks/bench_sheet_cache.py --rows 20000 100000 --cols 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from synthetic import COLUMN_TYPES, DEFAULT_COLUMN_TYPES, make_frames
+
+from excel_compare_cache import sheet_cache_available
+from excel_compare_core import ExcelComparer
+from excel_compare_reader import ENGINE_MODULES, engine_available, read_sheets
+
+
+def timed(function):
+    """返回 (函数返回值, 耗时)"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def directory_size_mb(path):
+    """目录下所有文件的总大小（MB）"""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names) / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析缓存基准')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000], help='工作簿行数列表')
+    parser.add_argument('--cols', type=int, default=20, help='工作簿列数')
+    parser.add_argument('--column-types', nargs='+', choices=COLUMN_TYPES, default=list(DEFAULT_COLUMN_TYPES),
+                        help='列类型，按顺序循环使用')
+    parser.add_argument('--repeat', type=int, default=5, help='缓存命中的重复次数（取中位数）')
+    args = parser.parse_args()
+
+    if not sheet_cache_available():
+        parser.error('解析缓存需要安装 pyarrow')
+    engines = [engine for engine in ENGINE_MODULES if engine != 'xlrd' and engine_available(engine)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            path = os.path.join(tmp_dir, f'bench_{rows}.xlsx')
+            make_frames(rows, args.cols, column_types=tuple(args.column_types))[0].to_excel(path, index=False)
+            print(f"\n{rows} 行 x {args.cols} 列（{os.path.getsize(path) / (1024 * 1024):.1f} MB）")
+            print(f"{'引擎':<20}{'直接解析(s)':>12}{'未命中(s)':>12}{'命中(s)':>10}{'加速比':>8}{'缓存大小(MB)':>14}")
+            for engine in engines:
+                cache_dir = os.path.join(tmp_dir, f'cache_{rows}_{engine}')
+                comparer = ExcelComparer(read_engine=engine, sheet_cache_dir=cache_dir, log=lambda message: None)
+                _, direct = timed(lambda: read_sheets(path, engine))
+                _, cold = timed(lambda: comparer.read_workbook(path, None))
+                warm_runs = [timed(lambda: comparer.read_workbook(path, None))[1] for _ in range(args.repeat)]
+                if comparer.sheet_cache_hits != args.repeat:
+                    raise RuntimeError(f"{engine} 缓存未命中")
+                warm = statistics.median(warm_runs)
+                print(f"{engine:<20}{direct:>12.3f}{cold:>12.3f}{warm:>10.3f}{direct / warm:>7.0f}x"
+                      f"{directory_size_mb(cache_dir):>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
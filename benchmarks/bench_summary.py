@@ -0,0 +1,86 @@
+"""批量汇总基准：比较旧的"保留全部差异后统一生成汇总"与逐对累积汇总（BatchSummary）的峰值内存和耗时
+
+用合成的比较结果模拟批量比较（不读取Excel文件），每对文件的结果交给汇总后即被释放，
+旧实现则需要保留所有文件对的差异列表直到批量结束。
+
+用法:
+    python benchmarks/bench_summary.py --pairs 100 --diffs 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import synthetic  # noqa: F401  导入时把项目根目录加入 sys.path
+
+from excel_compare_diffs import DIFFERENCE_FIELDS, DiffRecords
+from excel_compare_summary import BatchSummary
+
+
+def make_result(index, diffs):
+    """生成一对文件的合成比较结果"""
+    # 10列，每列 diffs/10 个差异，按行优先排列
+    positions = np.arange(diffs)
+    columns_a = [pd.Series([f'a{index}-{i}' for i in range(diffs)]) for _ in range(10)]
+    columns_b = [pd.Series([f'b{index}-{i}' for i in range(diffs)]) for _ in range(10)]
+    differences = DiffRecords.from_cells(positions + 2, positions % 10, positions, np.zeros(diffs),
+                                         columns_a, columns_b, [f'列{j}' for j in range(10)])
+    return {
+        'pair': {'base_name': f'pair{index}', 'file_a': f'pair{index}-A.xlsx', 'file_b': f'pair{index}-B.xlsx'},
+        'differences': differences,
+        'statistics': {
+            'compared_rows': diffs, 'compared_cols': 10, 'total_cells': diffs * 10, 'diff_count': diffs,
+            'similarity': 90.0, 'skipped_rows': 0,
+        },
+    }
+
+
+def summarize_legacy(path, pairs, diffs):
+    """旧实现：保留所有结果，生成全部差异的字典列表后通过 pandas.ExcelWriter 写出"""
+    results = [make_result(index, diffs) for index in range(pairs)]
+    all_differences = []
+    for result in results:
+        pair = result['pair']
+        for row in result['differences'].iter_rows():
+            all_differences.append({'文件对': pair['base_name'], '文件A': pair['file_a'], '文件B': pair['file_b'],
+                                    **dict(zip(DIFFERENCE_FIELDS, row))})
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        pd.DataFrame(all_differences).to_excel(writer, sheet_name='所有差异详情', index=False)
+
+
+def summarize_incremental(path, pairs, diffs):
+    """新实现：每对结果加入 BatchSummary 后即释放，结束时流式写出"""
+    summary = BatchSummary(os.path.dirname(path))
+    try:
+        for index in range(pairs):
+            summary.add(index, make_result(index, diffs))
+        summary.write(path, [('总文件对数', pairs)])
+    finally:
+        summary.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量汇总基准')
+    parser.add_argument('--pairs', type=int, default=100, help='文件对数量')
+    parser.add_argument('--diffs', type=int, default=1000, help='每对文件的差异数')
+    args = parser.parse_args()
+    print(f"{args.pairs} 对文件 x 每对 {args.diffs} 个差异")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'汇总方式':<16}{'耗时(s)':>10}{'峰值内存(MB)':>14}")
+        for label, summarize in (('保留全部差异（旧）', summarize_legacy), ('逐对累积', summarize_incremental)):
+            path = os.path.join(tmp_dir, f'{summarize.__name__}.xlsx')
+            tracemalloc.start()
+            start = time.perf_counter()
+            summarize(path, args.pairs, args.diffs)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{label:<16}{elapsed:>10.2f}{peak / (1024 * 1024):>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""生成用于基准测试的合成 -A/-B Excel 文件对"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 基准测试脚本位于 benchmarks/ 目录下，需要能导入项目根目录中的模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+# 可生成的列类型：浮点数、整数、文本、日期；默认按前三种循环
+COLUMN_TYPES = ('float', 'int', 'text', 'date')
+DEFAULT_COLUMN_TYPES = ('float', 'int', 'text')
+COLUMN_PREFIXES = {'float': '数值', 'int': '整数', 'text': '文本', 'date': '日期'}
+
+
+def make_column(column_type, rows, rng):
+    """生成一列合成数据"""
+    if column_type == 'float':
+        return rng.random(rows).round(4)
+    if column_type == 'int':
+        return rng.integers(0, 10000, rows)
+    if column_type == 'text':
+        return rng.choice(['alpha', 'beta', 'gamma', 'delta'], rows)
+    if column_type == 'date':
+        return pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D')
+    raise ValueError(f"不支持的列类型: {column_type}")
+
+
+def make_frames(rows, cols, diff_ratio=0.01, seed=0, column_types=DEFAULT_COLUMN_TYPES):
+    """生成一对DataFrame，列类型按 column_types 循环，B在约 diff_ratio 比例的单元格上与A不同"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for j in range(cols):
+        column_type = column_types[j % len(column_types)]
+        data[f'{COLUMN_PREFIXES[column_type]}{j}'] = make_column(column_type, rows, rng)
+    df_a = pd.DataFrame(data)
+
+    df_b = df_a.copy()
+    changed = rng.random((rows, cols)) < diff_ratio
+    for j, column in enumerate(df_b.columns):
+        mask = changed[:, j]
+        if not mask.any():
+            continue
+        if df_b[column].dtype.kind == 'f':
+            df_b.loc[mask, column] = df_b.loc[mask, column] + 1
+        elif df_b[column].dtype.kind == 'i':
+            df_b.loc[mask, column] = -1
+        elif df_b[column].dtype.kind == 'M':
+            df_b.loc[mask, column] = df_b.loc[mask, column] + pd.Timedelta(days=1)
+        else:
+            df_b.loc[mask, column] = 'changed'
+    return df_a, df_b
+
+
+def write_pair(directory, base_name, rows, cols, diff_ratio=0.01, seed=0, column_types=DEFAULT_COLUMN_TYPES):
+    """在目录中写入 基础名称-A.xlsx / 基础名称-B.xlsx，返回文件对字典"""
+    os.makedirs(directory, exist_ok=True)
+    df_a, df_b = make_frames(rows, cols, diff_ratio, seed, column_types)
+    file_a = os.path.join(directory, f"{base_name}-A.xlsx")
+    file_b = os.path.join(directory, f"{base_name}-B.xlsx")
+    df_a.to_excel(file_a, index=False)
+    df_b.to_excel(file_b, index=False)
+    return {'base_name': base_name, 'file_a': file_a, 'file_b': file_b}
+
+
+def write_batch(directory, pairs, rows, cols, diff_ratio=0.01, column_types=DEFAULT_COLUMN_TYPES):
+    """生成一批文件对，返回文件对列表"""
+    return [write_pair(directory, f"pair{i:04d}", rows, cols, diff_ratio, seed=i, column_types=column_types)
+            for i in range(pairs)]
@@ -0,0 +1,231 @@
+"""行对齐：在逐单元格比较前确定文件A和文件B中哪些行相互对应
+
+对齐函数只处理每行的哈希值（由 ExcelComparer.row_hashes 按单元格比较规则计算），
+返回的都是0基行位置数组，与具体的比较规则和报告格式无关。
+"""
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# 行对齐方式：按行号（位置）对齐、按关键列对齐、按整行内容做序列差异对齐
+ROW_ALIGNMENTS = ('position', 'key', 'diff')
+
+# 序列差异对齐默认允许的最大编辑距离（插入行数 + 删除行数），超过后退回按行号对齐
+DEFAULT_MAX_EDITS = 2000
+
+
+def align_by_key_hashes(key_hashes_a, key_hashes_b):
+    """按关键列哈希对齐行（哈希连接），重复的键按出现顺序一一配对
+
+    返回 (匹配的A位置, 匹配的B位置, 仅在A中的位置, 仅在B中的位置)，匹配结果按A的行顺序排列。
+    """
+    key_hashes_a = np.asarray(key_hashes_a)
+    key_hashes_b = np.asarray(key_hashes_b)
+    left = pd.DataFrame({
+        'key': key_hashes_a,
+        'occurrence': pd.Series(key_hashes_a).groupby(key_hashes_a).cumcount().to_numpy(),
+        'pos_a': np.arange(len(key_hashes_a)),
+    })
+    right = pd.DataFrame({
+        'key': key_hashes_b,
+        'occurrence': pd.Series(key_hashes_b).groupby(key_hashes_b).cumcount().to_numpy(),
+        'pos_b': np.arange(len(key_hashes_b)),
+    })
+
+    matched = left.merge(right, on=['key', 'occurrence'], how='inner', sort=False)
+    matched = matched.sort_values('pos_a', kind='stable')
+    matched_a = matched['pos_a'].to_numpy()
+    matched_b = matched['pos_b'].to_numpy()
+
+    only_a = np.setdiff1d(np.arange(len(key_hashes_a)), matched_a, assume_unique=True)
+    only_b = np.setdiff1d(np.arange(len(key_hashes_b)), matched_b, assume_unique=True)
+    return matched_a, matched_b, only_a, only_b
+
+
+def align_by_sequence(hashes_a, hashes_b, max_edits=DEFAULT_MAX_EDITS):
+    """按整行哈希做序列差异（patience 锚点 + Myers），找出匹配行、插入行和删除行
+
+    先去掉公共前后缀，再以两边都只出现一次的行为锚点（最长递增子序列）切分，
+    锚点之间没有唯一行的小段用 Myers 算法对齐，最后把同一位置的一删一插配对为修改行。
+    返回值与 align_by_key_hashes 相同；配对后剩余的插入行数 + 删除行数超过 max_edits，
+    或某个无锚点区段的 Myers 编辑距离超过 max_edits（限制耗时和内存）时返回 None，由调用方退回按行号对齐。
+    """
+    hashes_a = np.asarray(hashes_a)
+    hashes_b = np.asarray(hashes_b)
+    matched_a, matched_b = [], []
+    # 插入行数 + 删除行数的下界（每个区段至少有两边行数之差的行无法配对），用于提前放弃
+    edits = 0
+    # 待处理的区段 (A起, A止, B起, B止)，用显式栈代替递归
+    regions = [(0, len(hashes_a), 0, len(hashes_b))]
+    while regions:
+        a_lo, a_hi, b_lo, b_hi = regions.pop()
+        a_lo, a_hi, b_lo, b_hi = trim_common_ends(hashes_a, hashes_b, a_lo, a_hi, b_lo, b_hi,
+                                                  matched_a, matched_b)
+        if a_lo == a_hi or b_lo == b_hi:
+            edits += (a_hi - a_lo) + (b_hi - b_lo)
+        else:
+            anchors_a, anchors_b = unique_anchors(hashes_a[a_lo:a_hi], hashes_b[b_lo:b_hi])
+            if len(anchors_a):
+                # 锚点本身匹配，只有锚点之间非空的区段需要继续处理
+                anchors_a += a_lo
+                anchors_b += b_lo
+                matched_a.append(anchors_a)
+                matched_b.append(anchors_b)
+                starts_a = np.concatenate(([a_lo], anchors_a + 1))
+                starts_b = np.concatenate(([b_lo], anchors_b + 1))
+                ends_a = np.concatenate((anchors_a, [a_hi]))
+                ends_b = np.concatenate((anchors_b, [b_hi]))
+                gaps = np.flatnonzero((ends_a > starts_a) | (ends_b > starts_b))
+                regions.extend(zip(starts_a[gaps].tolist(), ends_a[gaps].tolist(),
+                                   starts_b[gaps].tolist(), ends_b[gaps].tolist()))
+                continue
+            
+            pairs = myers_matches(hashes_a[a_lo:a_hi].tolist(), hashes_b[b_lo:b_hi].tolist(), max_edits)
+            if pairs is None:
+                return None
+            if pairs:
+                pair_a, pair_b = np.array(pairs).T
+                matched_a.append(a_lo + pair_a)
+                matched_b.append(b_lo + pair_b)
+            edits += abs((a_hi - a_lo) - (b_hi - b_lo))
+        if edits > max_edits:
+            return None
+    
+    matched_a = np.concatenate(matched_a) if matched_a else np.array([], dtype=np.int64)
+    matched_b = np.concatenate(matched_b) if matched_b else np.array([], dtype=np.int64)
+    order = np.argsort(matched_a, kind='stable')
+    matched_a = matched_a[order]
+    matched_b = matched_b[order]
+    only_a = np.setdiff1d(np.arange(len(hashes_a)), matched_a, assume_unique=True)
+    only_b = np.setdiff1d(np.arange(len(hashes_b)), matched_b, assume_unique=True)
+    alignment = pair_replaced_rows(matched_a, matched_b, only_a, only_b)
+    if len(alignment[2]) + len(alignment[3]) > max_edits:
+        return None
+    return alignment
+
+
+def pair_replaced_rows(matched_a, matched_b, only_a, only_b):
+    """把同一间隙（相邻两个相同行之间）中删除的A行和插入的B行按顺序配对为修改行
+
+    整行哈希只能匹配完全相同的行，修改过的行会表现为一删一插；配对后这些行按单元格比较，
+    间隙中多出的行仍作为插入或删除。
+    """
+    # 间隙编号 = 该行之前的相同行数，两边相同编号的间隙位于同一对相同行之间
+    gaps_a = np.searchsorted(matched_a, only_a)
+    gaps_b = np.searchsorted(matched_b, only_b)
+    replaced_a, replaced_b, removed, added = align_by_key_hashes(gaps_a, gaps_b)
+    matched_a = np.concatenate((matched_a, only_a[replaced_a]))
+    matched_b = np.concatenate((matched_b, only_b[replaced_b]))
+    order = np.argsort(matched_a, kind='stable')
+    return matched_a[order], matched_b[order], only_a[removed], only_b[added]
+
+
+def trim_common_ends(hashes_a, hashes_b, a_lo, a_hi, b_lo, b_hi, matched_a, matched_b):
+    """匹配区段的公共前缀和公共后缀，返回剩余的区段"""
+    length = min(a_hi - a_lo, b_hi - b_lo)
+    differs = hashes_a[a_lo:a_lo + length] != hashes_b[b_lo:b_lo + length]
+    prefix = int(np.argmax(differs)) if differs.any() else length
+    if prefix:
+        matched_a.append(np.arange(a_lo, a_lo + prefix))
+        matched_b.append(np.arange(b_lo, b_lo + prefix))
+        a_lo += prefix
+        b_lo += prefix
+    
+    length = min(a_hi - a_lo, b_hi - b_lo)
+    differs = hashes_a[a_hi - length:a_hi][::-1] != hashes_b[b_hi - length:b_hi][::-1]
+    suffix = int(np.argmax(differs)) if differs.any() else length
+    if suffix:
+        matched_a.append(np.arange(a_hi - suffix, a_hi))
+        matched_b.append(np.arange(b_hi - suffix, b_hi))
+        a_hi -= suffix
+        b_hi -= suffix
+    return a_lo, a_hi, b_lo, b_hi
+
+
+def unique_anchors(hashes_a, hashes_b):
+    """找出在两边都只出现一次的行，返回按A顺序排列、B位置递增的最长锚点序列 (A位置数组, B位置数组)"""
+    values_a, index_a, counts_a = np.unique(hashes_a, return_index=True, return_counts=True)
+    values_b, index_b, counts_b = np.unique(hashes_b, return_index=True, return_counts=True)
+    unique_a = counts_a == 1
+    unique_b = counts_b == 1
+    _, common_a, common_b = np.intersect1d(values_a[unique_a], values_b[unique_b],
+                                           assume_unique=True, return_indices=True)
+    positions_a = index_a[unique_a][common_a]
+    positions_b = index_b[unique_b][common_b]
+    order = np.argsort(positions_a)
+    positions_a = positions_a[order]
+    positions_b = positions_b[order]
+    selected = longest_increasing_subsequence(positions_b.tolist())
+    return positions_a[selected], positions_b[selected]
+
+
+def longest_increasing_subsequence(values):
+    """返回严格递增的最长子序列的下标数组（patience 排序，O(n log n)）"""
+    tails = []
+    tail_indices = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k > 0 else -1
+    
+    selected = []
+    i = tail_indices[-1] if tail_indices else -1
+    while i >= 0:
+        selected.append(i)
+        i = previous[i]
+    selected.reverse()
+    return np.array(selected, dtype=np.int64)
+
+
+def myers_matches(a, b, max_edits):
+    """Myers 贪心差异算法，返回匹配的 (A位置, B位置) 列表；编辑距离超过 max_edits 时返回 None"""
+    n, m = len(a), len(b)
+    max_d = min(n + m, max(max_edits, 0))
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return myers_backtrack(trace, n, m)
+    return None
+
+
+def myers_backtrack(trace, n, m):
+    """根据 Myers 算法每一步的状态回溯出匹配的行对"""
+    pairs = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        # trace[d] 保存第 d 步开始前对角线 -d-1..d+1 的状态
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1 + d + 1] < v[k + 1 + d + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = v[previous_k + d + 1] if d > 0 else 0
+        previous_y = previous_x - previous_k if d > 0 else 0
+        while x > previous_x and y > previous_y:
+            x -= 1
+            y -= 1
+            pairs.append((x, y))
+        x, y = previous_x, previous_y
+    pairs.reverse()
+    return pairs
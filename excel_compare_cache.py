@@ -0,0 +1,306 @@
+"""缓存：按文件内容哈希复用未变化文件对的比较结果和报告，以及解析后的工作表
+
+结果缓存（ResultCache）的缓存键由文件A、B的内容哈希、文件名、行范围和比较选项共同决定，任一变化都会重新比较。
+每个缓存条目包含比较结果（统计信息和差异记录）和报告副本，超过容量上限时按最近使用时间淘汰。
+
+解析缓存（SheetCache）按单个文件缓存解析后的工作表，同一个基准文件与多个版本比较时只解析一次XLSX。
+工作表以未压缩的 Arrow IPC（Feather v2）格式保存，读取时内存映射，数值列不需要复制；
+解析缓存需要安装 pyarrow（可选依赖）。
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import pandas as pd
+
+# 缓存格式版本，比较逻辑或结果结构变化时递增，使旧缓存失效
+CACHE_VERSION = 5
+
+# 默认缓存目录和容量上限
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.excel_compare_cache')
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# 解析缓存格式版本、默认目录和容量上限
+SHEET_CACHE_VERSION = 1
+DEFAULT_SHEET_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'sheets')
+DEFAULT_SHEET_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# 解析缓存条目中的清单文件名，以及记录文件内容哈希的文件扩展名
+SHEET_MANIFEST_NAME = 'manifest.pkl'
+DIGEST_EXT = '.digest'
+# 可以原样保存为 Arrow 列的 dtype 类别（整数、无符号整数、浮点数、布尔和日期时间），其余列（混合类型的 object 列）用 pickle 保存
+ARROW_DTYPE_KINDS = 'iufbM'
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """计算文件内容的SHA-256哈希"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def atomic_write(path, write):
+    """写入同目录下的临时文件后原子替换目标文件，避免并行进程读到不完整的文件"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        # mkstemp 创建的文件仅所有者可读，硬链接到结果目录的报告需要普通权限
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ResultCache:
+    """基于内容哈希、按LRU淘汰的比较结果缓存"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES, link_reports=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # 命中时是否用硬链接复用报告（失败时退回复制）
+        self.link_reports = link_reports
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, pair, options):
+        """根据文件内容、文件名和比较选项生成缓存键"""
+        key_data = {
+            'version': CACHE_VERSION,
+            'base_name': pair['base_name'],
+            'file_a': [os.path.basename(pair['file_a']), file_digest(pair['file_a'])],
+            'file_b': [os.path.basename(pair['file_b']), file_digest(pair['file_b'])],
+            'options': options,
+        }
+        encoded = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def entry_paths(self, key):
+        """返回缓存条目的结果文件和报告文件路径"""
+        return (os.path.join(self.cache_dir, f"{key}.pkl"),
+                os.path.join(self.cache_dir, f"{key}.xlsx"))
+
+    def load(self, key, report_path):
+        """读取缓存结果并把报告恢复到 report_path，未命中时返回None"""
+        result_file, report_file = self.entry_paths(key)
+        try:
+            with open(result_file, 'rb') as f:
+                result = pickle.load(f)
+            self.restore_report(report_file, report_path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        for path in (result_file, report_file):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return result
+
+    def restore_report(self, report_file, report_path):
+        """把缓存的报告硬链接或复制到结果目录"""
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        if self.link_reports:
+            try:
+                os.link(report_file, report_path)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(report_file, report_path)
+
+    def store(self, key, result, report_path):
+        """保存比较结果和报告副本，然后按容量上限淘汰旧条目"""
+        result_file, report_file = self.entry_paths(key)
+        cached = {'differences': result['differences'], 'statistics': result['statistics']}
+
+        def copy_report(f):
+            with open(report_path, 'rb') as src:
+                shutil.copyfileobj(src, f)
+
+        # 先写临时文件再替换，避免并行进程读到不完整的条目
+        atomic_write(report_file, copy_report)
+        atomic_write(result_file, lambda f: pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL))
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，按最近访问时间从旧到新删除缓存条目"""
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext not in ('.pkl', '.xlsx'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            size, mtime = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in self.entry_paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+def sheet_cache_available():
+    """检查解析缓存的依赖（pyarrow）是否已安装"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def arrow_column(series):
+    """判断列能否无损地保存为 Arrow 列（数值、布尔、日期时间和字符串列）"""
+    return series.dtype.kind in ARROW_DTYPE_KINDS or isinstance(series.dtype, pd.StringDtype)
+
+
+class SheetCache:
+    """按文件内容哈希缓存解析后的工作表，按LRU淘汰
+
+    每个条目为一个目录，包含清单（工作表名、列名、行索引和无法保存为 Arrow 的列）和每个工作表一个 .arrow 文件。
+    缓存键由文件内容哈希和读取选项（引擎、工作表、行范围）决定：只读取部分行时 pandas 的类型推断可能与读取全部行不同，
+    因此不从全部行的缓存中截取。文件的路径、修改时间和大小到内容哈希的映射另外保存，文件未修改时不需要重新计算哈希。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_SHEET_CACHE_DIR, max_bytes=DEFAULT_SHEET_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cached_digest(self, path):
+        """返回文件内容哈希，路径、修改时间和大小都未变化时复用上次计算的结果"""
+        stat = os.stat(path)
+        stat_key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        digest_path = os.path.join(self.cache_dir,
+                                   hashlib.sha256(stat_key.encode('utf-8')).hexdigest() + DIGEST_EXT)
+        try:
+            with open(digest_path, encoding='ascii') as f:
+                digest = f.read().strip()
+            if len(digest) == 64:
+                os.utime(digest_path)
+                return digest
+        except OSError:
+            pass
+        digest = file_digest(path)
+        atomic_write(digest_path, lambda f: f.write(digest.encode('ascii')))
+        return digest
+
+    def make_key(self, path, options):
+        """根据文件内容和读取选项生成缓存键"""
+        key_data = {'version': SHEET_CACHE_VERSION, 'digest': self.cached_digest(path), 'options': options}
+        encoded = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """读取缓存的工作表，返回与保存时相同的 {工作表名: DataFrame}，未命中时返回None"""
+        import pyarrow as pa
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry_dir, SHEET_MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'rb') as f:
+                manifest = pickle.load(f)
+            sheets = {}
+            for i, sheet in enumerate(manifest['sheets']):
+                sheets[sheet['name']] = self.load_sheet(pa, os.path.join(entry_dir, f"{i}.arrow"), sheet)
+        except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError):
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(manifest_path)
+        except OSError:
+            pass
+        return sheets
+
+    def load_sheet(self, pa, path, sheet):
+        """内存映射读取一个工作表的 Arrow 文件，按原来的列顺序补回其余列"""
+        columns = sheet['columns']
+        if sheet['objects'].keys() == set(range(len(columns))):
+            df = pd.DataFrame(index=pd.RangeIndex(len(sheet['index'])))
+        else:
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+            # split_blocks 避免把同类型的列合并复制为一个二维数组
+            df = table.to_pandas(split_blocks=True)
+        for position, values in sheet['objects'].items():
+            df[str(position)] = values
+        df = df[[str(position) for position in range(len(columns))]]
+        df.columns = columns
+        df.index = sheet['index']
+        return df
+
+    def store(self, key, sheets):
+        """保存解析后的工作表（先写入临时目录再改名），然后按容量上限淘汰旧条目"""
+        import pyarrow as pa
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry_dir):
+            return
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            manifest = {'sheets': []}
+            for i, (name, df) in enumerate(sheets.items()):
+                arrow_positions = [position for position in range(df.shape[1]) if arrow_column(df.iloc[:, position])]
+                objects = {position: df.iloc[:, position].to_numpy(dtype=object)
+                           for position in range(df.shape[1]) if position not in arrow_positions}
+                manifest['sheets'].append({'name': name, 'columns': df.columns, 'index': df.index, 'objects': objects})
+                if arrow_positions:
+                    data = df.iloc[:, arrow_positions]
+                    data.columns = [str(position) for position in arrow_positions]
+                    table = pa.Table.from_pandas(data, preserve_index=False)
+                    with pa.OSFile(os.path.join(tmp_dir, f"{i}.arrow"), 'wb') as sink:
+                        with pa.ipc.new_file(sink, table.schema) as writer:
+                            writer.write_table(table)
+            with open(os.path.join(tmp_dir, SHEET_MANIFEST_NAME), 'wb') as f:
+                pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # 其他进程已经保存了同一个条目
+            if not os.path.exists(entry_dir):
+                raise
+        finally:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，按最近访问时间从旧到新删除缓存条目和内容哈希记录"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith(DIGEST_EXT):
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                elif os.path.isdir(path) and not name.endswith('.tmp'):
+                    mtime = os.stat(os.path.join(path, SHEET_MANIFEST_NAME)).st_mtime
+                    size = sum(entry.stat().st_size for entry in os.scandir(path))
+                    entries.append((mtime, size, path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
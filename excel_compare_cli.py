@@ -0,0 +1,185 @@
+"""Excel 文件批量比较命令行入口（无图形界面）
+
+用法示例:
+    python -m excel_compare_cli /path/to/files
+    python -m excel_compare_cli "data/*.xlsx" --range 1-100 --output /path/to/results
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from excel_compare_align import DEFAULT_MAX_EDITS, ROW_ALIGNMENTS
+from excel_compare_cache import DEFAULT_CACHE_DIR, DEFAULT_SHEET_CACHE_DIR
+from excel_compare_columns import COLUMN_ALIGNMENTS, parse_column_aliases
+from excel_compare_core import ExcelComparer
+from excel_compare_export import EXPORT_FORMATS
+from excel_compare_files import (DEFAULT_PAIR_SUFFIXES_TEXT, PairingIndex, collect_excel_files,
+                                 format_pair_suffixes, format_replaced_files, parse_pair_suffixes)
+from excel_compare_reader import READ_ENGINES
+from excel_compare_report import DATA_SHEET_MODES, REPORT_ENGINES
+from excel_compare_rules import COMPARE_MODES, load_rules
+from excel_compare_timing import PROFILE_DIR_NAME, PROFILE_MODES, TIMING_TRACE_NAME
+
+
+def print_log(message):
+    """带时间戳输出日志"""
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    print(f"[{timestamp}] {message}", flush=True)
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='python -m excel_compare_cli',
+        description='批量比较 基础名称-A.xlsx 和 基础名称-B.xlsx 文件对，生成比较报告和汇总报告'
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help='Excel文件、目录或通配符（如 "data/*.xlsx"）')
+    parser.add_argument('-R', '--recursive', action='store_true',
+                        help='递归扫描目录中的所有子目录，通配符中的 ** 匹配任意层子目录')
+    parser.add_argument('--pair-suffixes', default=DEFAULT_PAIR_SUFFIXES_TEXT,
+                        help="文件A和文件B的文件名后缀，格式为 'A后缀:B后缀'，多组用逗号分隔"
+                             "（默认 '-A:-B'，如 --pair-suffixes=-A:-B,_old:_new）")
+    parser.add_argument('-r', '--range', dest='range_text', default='',
+                        help="数据比较行序，如 '1-100'、'1,3,4,9' 或 '1-100,250,900-950'，留空比较所有行；"
+                             "行号稀疏时 auto 引擎对小文件改用 openpyxl-readonly 只转换指定的行，"
+                             "其他 pandas 读取引擎会解析从第一行到最后一行的整个区间")
+    parser.add_argument('-s', '--sheets', default='',
+                        help="要比较的工作表名，多个用逗号分隔（如 'Sheet1,汇总'），留空比较所有同名工作表")
+    parser.add_argument('-o', '--output', dest='output_dir', default=None,
+                        help='结果输出目录（默认使用第一个文件A所在目录）')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='并行比较的进程数（默认1，0表示使用全部CPU核心）')
+    parser.add_argument('-e', '--engine', dest='read_engine', choices=READ_ENGINES, default='auto',
+                        help='Excel读取引擎（默认auto，按文件大小和扩展名自动选择）')
+    parser.add_argument('--streaming', action='store_true',
+                        help='流式比较：分块读取和比较，内存占用与文件行数无关（仅支持 .xlsx）')
+    parser.add_argument('--chunk-rows', type=int, default=10000,
+                        help='流式比较每块的行数（默认10000）')
+    parser.add_argument('--no-row-hash', dest='row_hash_precheck', action='store_false',
+                        help='关闭行哈希预检（默认先比较行哈希，只对内容不同的行逐单元格比较）')
+    parser.add_argument('--align', dest='row_alignment', choices=ROW_ALIGNMENTS, default='position',
+                        help='行对齐方式：position 按行号对齐（默认），key 按关键列匹配行，'
+                             'diff 按整行内容做序列差异（无关键列时识别插入和删除的行）')
+    parser.add_argument('-k', '--key-columns', default='',
+                        help="关键列名，多个用逗号分隔（如 '订单号,行号'），指定后默认按关键列对齐")
+    parser.add_argument('--max-row-edits', type=int, default=DEFAULT_MAX_EDITS,
+                        help=f'diff 对齐允许的最大插入+删除行数（默认{DEFAULT_MAX_EDITS}），超过后退回按行号对齐')
+    parser.add_argument('--align-columns', dest='column_alignment', choices=COLUMN_ALIGNMENTS, default='position',
+                        help='列对齐方式：position 按列位置对齐（默认），header 按表头名称对齐'
+                             '（列顺序不同或插入、删除了列时仍比较同名的列）')
+    parser.add_argument('--normalize-headers', action='store_true',
+                        help='按表头名称对齐时归一化表头（全角转半角、合并空白、忽略大小写），指定后默认按表头名称对齐')
+    parser.add_argument('--column-aliases', default='',
+                        help="列别名，格式为 '别名=列名'，多组用逗号分隔（如 '客户名称=客户名'），"
+                             "两个文件中的别名都视为对应的列名，指定后默认按表头名称对齐")
+    parser.add_argument('--compare', dest='compare_mode', choices=COMPARE_MODES, default='text',
+                        help='值比较方式：text 去除首尾空白后按字符串比较（默认），'
+                             'typed 类型感知比较（1 与 1.0 相等，数值按容差比较，日期忽略格式）')
+    parser.add_argument('--rules', dest='rules_file', default=None,
+                        help='按列的比较规则文件（JSON），指定后默认使用类型感知比较')
+    parser.add_argument('--abs-tol', type=float, default=None, help='数值比较的绝对容差（所有列的默认规则）')
+    parser.add_argument('--rel-tol', type=float, default=None, help='数值比较的相对容差（所有列的默认规则，默认1e-9）')
+    parser.add_argument('--ignore-case', action='store_true', help='字符串比较忽略大小写（所有列的默认规则）')
+    parser.add_argument('--collapse-whitespace', action='store_true',
+                        help='字符串比较时把连续空白视为一个空格（所有列的默认规则）')
+    parser.add_argument('--report-engine', choices=REPORT_ENGINES, default='auto',
+                        help='报告写入引擎（默认auto，已安装 xlsxwriter 时使用其 constant_memory 模式）')
+    parser.add_argument('--data-sheets', choices=DATA_SHEET_MODES, default='all',
+                        help='报告中的"文件A数据"/"文件B数据"工作表：all 全部行（默认），diff 仅有差异的行，none 不输出')
+    parser.add_argument('--highlight', dest='highlight_diffs', action='store_true',
+                        help='在"文件A数据"/"文件B数据"工作表中把差异单元格标为黄色，新增/删除的行标为红色')
+    parser.add_argument('--export', dest='export_format', choices=EXPORT_FORMATS, default=None,
+                        help='额外导出机器可读的差异明细和文件对统计（parquet 需要安装 pyarrow），'
+                             '比较过程中逐对追加写入，不受Excel最大行数限制')
+    parser.add_argument('--cache', dest='cache_dir', nargs='?', const=DEFAULT_CACHE_DIR, default=None,
+                        help=f'启用结果缓存，文件对内容未变化时复用上次结果（默认目录 {DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--cache-max-mb', type=int, default=1024,
+                        help='结果缓存容量上限（MB，默认1024），超出后淘汰最久未使用的条目')
+    parser.add_argument('--cache-link', action='store_true',
+                        help='命中缓存时用硬链接复用报告文件，而不是复制')
+    parser.add_argument('--sheet-cache', dest='sheet_cache_dir', nargs='?', const=DEFAULT_SHEET_CACHE_DIR, default=None,
+                        help=f'启用解析缓存，以 Arrow 格式保存解析后的工作表，文件内容未变化时不再解析XLSX'
+                             f'（需要安装 pyarrow，默认目录 {DEFAULT_SHEET_CACHE_DIR}）')
+    parser.add_argument('--sheet-cache-max-mb', type=int, default=2048,
+                        help='解析缓存容量上限（MB，默认2048），超出后淘汰最久未使用的文件')
+    parser.add_argument('--timing-trace', action='store_true',
+                        help=f'将每对文件各阶段的耗时、吞吐量和峰值内存另外保存为结果目录下的 {TIMING_TRACE_NAME}')
+    parser.add_argument('--profile', dest='profile_mode', choices=PROFILE_MODES, default=None,
+                        help=f'对文件对做性能分析：cprofile 统计函数耗时，tracemalloc 统计各阶段峰值内存，'
+                             f'结果写入结果目录下的 {PROFILE_DIR_NAME}/')
+    parser.add_argument('--profile-pairs', default='',
+                        help="只对这些文件对做性能分析（基础名称，多个用逗号分隔），留空分析所有文件对")
+    return parser
+
+
+def build_compare_rules(args):
+    """由规则文件和默认规则参数生成比较规则字典，都未指定时返回None"""
+    rules = load_rules(args.rules_file) if args.rules_file else {'default': {}, 'columns': {}}
+    overrides = {'abs_tol': args.abs_tol, 'rel_tol': args.rel_tol,
+                 'ignore_case': args.ignore_case or None, 'collapse_whitespace': args.collapse_whitespace or None}
+    overrides = {name: value for name, value in overrides.items() if value is not None}
+    if not args.rules_file and not overrides:
+        return None
+    rules['default'].update(overrides)
+    return rules
+
+
+def main(argv=None):
+    """命令行主函数，返回进程退出码"""
+    args = build_parser().parse_args(argv)
+
+    try:
+        suffixes = parse_pair_suffixes(args.pair_suffixes)
+    except ValueError as e:
+        print_log(f"参数错误：{e}")
+        return 2
+    files = collect_excel_files(args.inputs, args.recursive)
+    index = PairingIndex(suffixes)
+    index.add(files)
+    file_pairs = index.pairs()
+    print_log(f"文件分析完成：共 {len(files)} 个文件，{len(file_pairs)} 对可比较")
+    if index.replaced:
+        print_log(format_replaced_files(index.replaced))
+
+    if not file_pairs:
+        print_log(f"没有找到可配对的文件，请确保文件名格式为：{format_pair_suffixes(suffixes)}")
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    key_columns = [column.strip() for column in args.key_columns.split(',') if column.strip()]
+    sheet_names = [name.strip() for name in args.sheets.split(',') if name.strip()]
+    profile_pairs = [name.strip() for name in args.profile_pairs.split(',') if name.strip()]
+    try:
+        compare_rules = build_compare_rules(args)
+        column_aliases = parse_column_aliases(args.column_aliases)
+        comparer = ExcelComparer(range_text=args.range_text, log=print_log, workers=args.workers,
+                                 read_engine=args.read_engine, streaming=args.streaming,
+                                 chunk_rows=args.chunk_rows, row_hash_precheck=args.row_hash_precheck,
+                                 row_alignment=args.row_alignment, key_columns=key_columns,
+                                 max_row_edits=args.max_row_edits, column_alignment=args.column_alignment,
+                                 normalize_headers=args.normalize_headers, column_aliases=column_aliases,
+                                 report_engine=args.report_engine,
+                                 data_sheets=args.data_sheets, highlight_diffs=args.highlight_diffs,
+                                 export_format=args.export_format,
+                                 sheet_names=sheet_names, compare_mode=args.compare_mode,
+                                 compare_rules=compare_rules, cache_dir=args.cache_dir,
+                                 cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                                 cache_link_reports=args.cache_link, sheet_cache_dir=args.sheet_cache_dir,
+                                 sheet_cache_max_bytes=args.sheet_cache_max_mb * 1024 * 1024,
+                                 timing_trace=args.timing_trace,
+                                 profile_mode=args.profile_mode, profile_pairs=profile_pairs)
+    except (OSError, ValueError) as e:
+        print_log(f"参数错误：{e}")
+        return 2
+    batch_dir, successful, failed = comparer.run_batch(file_pairs, args.output_dir)
+
+    print_log(f"批量比较完成：成功 {successful} 对，失败 {failed} 对，结果保存在 {batch_dir}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
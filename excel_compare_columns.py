@@ -0,0 +1,173 @@
+"""列对齐：在逐单元格比较前确定文件A和文件B中哪些列相互对应，只比较对应的列
+
+两种列对齐方式:
+    position  默认。按列位置对齐，比较两个文件共有的前 min(列数) 列，多出的列记为新增列或删除列
+    header    按表头名称对齐：列顺序不同、插入或删除了列时仍比较同名的列，
+              可以归一化表头（全角转半角、去除首尾空白、合并连续空白、忽略大小写）并指定列别名
+
+列对应关系（ColumnMapping）只取决于两个文件的表头，ColumnAligner 按表头缓存，
+批量比较中表头相同的工作表和文件对只计算一次。
+"""
+import re
+import unicodedata
+from collections import deque
+
+import numpy as np
+
+# 列对齐方式：按列位置对齐、按表头名称对齐
+COLUMN_ALIGNMENTS = ('position', 'header')
+COLUMN_ALIGNMENT_LABELS = {'position': '按列位置', 'header': '按表头名称'}
+
+# 缓存的列对应关系数上限，超过后清空重新计算
+MAX_CACHED_MAPPINGS = 1024
+
+
+def normalize_header(name):
+    """归一化表头：全角转半角（NFKC）、合并连续空白并去除首尾空白、忽略大小写"""
+    text = unicodedata.normalize('NFKC', str(name))
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+def parse_column_aliases(text):
+    """解析列别名文本 "别名=列名[,别名=列名...]"，返回 ((别名, 列名), ...)，留空时返回空元组"""
+    aliases = []
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        alias, sep, name = (value.strip() for value in part.partition('='))
+        if not sep or not alias or not name or alias == name:
+            raise ValueError(f"列别名格式错误: '{part.strip()}'（格式为 '别名=列名'，多组用逗号分隔，"
+                             f"如 '客户名称=客户名,金额(元)=金额'）")
+        aliases.append((alias, name))
+    return tuple(aliases)
+
+
+def format_column_names(names, limit=20):
+    """把列名列表格式化为概览中的文本（最多列出 limit 个）"""
+    text = ', '.join(map(str, names[:limit]))
+    return text + (f" 等 {len(names)} 列" if len(names) > limit else '')
+
+
+class ColumnMapping:
+    """两个表头之间的列对应关系，创建后不再修改，可在多个工作表和线程间共享
+
+    positions_a/positions_b 为对应列在文件A和文件B中的0基位置（按文件A中的列顺序排列），
+    removed 为仅文件A有的列名（文件B删除列），added 为仅文件B有的列名（文件B新增列），
+    renamed 为按表头名称对齐时名称不同的对应列 (文件A列名, 文件B列名)（按别名或归一化后的表头匹配）。
+    """
+
+    def __init__(self, columns_a, columns_b, positions_a, positions_b, by_header=False):
+        self.width_a = len(columns_a)
+        self.width_b = len(columns_b)
+        self.positions_a = np.asarray(positions_a, dtype=np.intp)
+        self.positions_b = np.asarray(positions_b, dtype=np.intp)
+        self.names_a = [columns_a[j] for j in self.positions_a.tolist()]
+        self.names_b = [columns_b[j] for j in self.positions_b.tolist()]
+        matched_a = set(self.positions_a.tolist())
+        matched_b = set(self.positions_b.tolist())
+        self.removed = [name for j, name in enumerate(columns_a) if j not in matched_a]
+        self.added = [name for j, name in enumerate(columns_b) if j not in matched_b]
+        self.renamed = [(name_a, name_b) for name_a, name_b in zip(self.names_a, self.names_b)
+                        if by_header and name_a != name_b]
+        # 文件A列位置对应的文件B列位置（没有对应列时为-1），用于把差异单元格换算到文件B中的列
+        self.b_positions = np.full(self.width_a, -1, dtype=np.intp)
+        self.b_positions[self.positions_a] = self.positions_b
+        # 对应列就是两个文件的前 n 列（按列位置对齐，或表头顺序相同）时直接切片，不按位置取列
+        identity = np.arange(len(self.positions_a))
+        self.prefix = bool(np.array_equal(self.positions_a, identity) and np.array_equal(self.positions_b, identity))
+
+    def __len__(self):
+        return len(self.positions_a)
+
+    def select(self, df1, df2):
+        """返回只包含对应列的 (df1, df2)，列按文件A中的顺序排列"""
+        if self.prefix:
+            return df1.iloc[:, :len(self)], df2.iloc[:, :len(self)]
+        return df1.iloc[:, self.positions_a], df2.iloc[:, self.positions_b]
+
+    def columns_b(self, cols):
+        """把文件A中的列位置数组换算为文件B中对应列的位置"""
+        return self.b_positions[np.asarray(cols, dtype=np.intp)]
+
+    def names_in_b(self, names):
+        """返回文件A列名在文件B中对应的列名，没有对应列的返回None"""
+        matched = dict(zip(self.names_a, self.names_b))
+        return [matched.get(name) for name in names]
+
+    def statistics(self):
+        """新增列数和删除列数，计入工作表统计"""
+        return {'added_cols': len(self.added), 'removed_cols': len(self.removed)}
+
+    def overview(self):
+        """概览中列出新增列、删除列和名称不同的对应列（都没有时为空）"""
+        rows = []
+        if self.added:
+            rows.append(('文件B新增列', format_column_names(self.added)))
+        if self.removed:
+            rows.append(('文件B删除列', format_column_names(self.removed)))
+        if self.renamed:
+            rows.append(('名称不同的对应列', format_column_names([f"{name_a} → {name_b}"
+                                                                  for name_a, name_b in self.renamed])))
+        return rows
+
+
+class ColumnAligner:
+    """按列对齐方式计算列对应关系，并按 (文件A表头, 文件B表头) 缓存"""
+
+    def __init__(self, alignment='position', normalize=False, aliases=()):
+        if alignment not in COLUMN_ALIGNMENTS:
+            raise ValueError(f"不支持的列对齐方式: {alignment}")
+        self.alignment = alignment
+        self.normalize = normalize
+        self.aliases = tuple((alias, name) for alias, name in aliases)
+        # 别名和列名按表头相同的规则归一化，两个文件中的别名都视为对应的列名
+        self.alias_keys = {self.normalized(alias): self.normalized(name) for alias, name in self.aliases}
+        self.mappings = {}
+
+    def normalized(self, name):
+        """表头在匹配时使用的名称"""
+        return normalize_header(name) if self.normalize else str(name)
+
+    def header_key(self, name):
+        """表头的匹配键：归一化后按别名替换为对应的列名"""
+        key = self.normalized(name)
+        return self.alias_keys.get(key, key)
+
+    def align(self, columns_a, columns_b):
+        """返回两个表头的列对应关系（表头相同时复用已计算的结果）"""
+        key = (tuple(columns_a), tuple(columns_b))
+        mapping = self.mappings.get(key)
+        if mapping is None:
+            if len(self.mappings) >= MAX_CACHED_MAPPINGS:
+                self.mappings.clear()
+            mapping = self.mappings[key] = self.match(list(columns_a), list(columns_b))
+        return mapping
+
+    def match(self, columns_a, columns_b):
+        """计算列对应关系：按列位置取共有的列，或按表头匹配（同名的列按出现顺序一一对应）"""
+        if self.alignment == 'position':
+            count = min(len(columns_a), len(columns_b))
+            return ColumnMapping(columns_a, columns_b, range(count), range(count))
+
+        candidates = {}
+        for j, name in enumerate(columns_b):
+            candidates.setdefault(self.header_key(name), deque()).append(j)
+        positions_a, positions_b = [], []
+        for j, name in enumerate(columns_a):
+            matched = candidates.get(self.header_key(name))
+            if matched:
+                positions_a.append(j)
+                positions_b.append(matched.popleft())
+        if not positions_a and columns_a and columns_b:
+            raise ValueError("按表头名称对齐时两个文件没有对应的列，请检查表头或列别名")
+        return ColumnMapping(columns_a, columns_b, positions_a, positions_b, by_header=True)
+
+    def describe(self):
+        """概览中的列对齐方式"""
+        label = COLUMN_ALIGNMENT_LABELS[self.alignment]
+        options = []
+        if self.normalize:
+            options.append('归一化表头')
+        if self.aliases:
+            options.append('别名: ' + ', '.join(f"{alias}={name}" for alias, name in self.aliases))
+        return f"{label}（{'；'.join(options)}）" if options else label
@@ -0,0 +1,1365 @@
+"""Excel 文件比较核心：差异计算和报告生成（文件发现和配对见 excel_compare_files）
+
+本模块不依赖Tkinter，可在无图形界面的环境（批处理任务、容器）中直接导入使用，
+图形界面（excel_compare_tool.py）和命令行（excel_compare_cli.py）均基于此模块。
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import closing
+from datetime import datetime
+from itertools import count, islice
+
+import numpy as np
+import pandas as pd
+
+from excel_compare_align import DEFAULT_MAX_EDITS, ROW_ALIGNMENTS, align_by_key_hashes, align_by_sequence
+from excel_compare_cache import (DEFAULT_CACHE_MAX_BYTES, DEFAULT_SHEET_CACHE_MAX_BYTES, ResultCache, SheetCache,
+                                 sheet_cache_available)
+from excel_compare_columns import ColumnAligner
+from excel_compare_diffs import DIFFERENCE_FIELDS, ROW_ADDED, ROW_REMOVED, DiffRecords, format_export_value
+from excel_compare_export import DIFF_EXPORT_NAME, EXPORT_FORMATS, ResultExporter, export_available
+# 文件配对函数仍可从本模块导入
+from excel_compare_files import extract_base_name_and_type, find_file_pairs  # noqa: F401
+from excel_compare_report import (DATA_SHEET_LABELS, DATA_SHEET_MODES, EXCEL_MAX_ROWS, REPORT_ENGINES,
+                                   ReportWorkbook, group_highlights, to_cell_value, unique_sheet_name)
+from excel_compare_reader import (choose_engine, iter_worksheet_rows, open_workbook_readonly, parse_header,
+                                  read_sheets, rows_to_frame)
+from excel_compare_ranges import RowRange
+from excel_compare_rules import COMPARE_MODE_LABELS, COMPARE_MODES, ComparisonRules, parse_dates
+from excel_compare_summary import BatchSummary, combine_timings
+from excel_compare_timing import PROFILE_DIR_NAME, PROFILE_MODES, TIMING_TRACE_NAME, PairProfiler, PairTimer
+
+# 视为等价的空字符串表示
+EMPTY_STRINGS = ['', 'None', 'nan']
+
+# 行哈希预检中空值单元格的哈希值
+NA_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+# 按列组合行哈希时使用的乘数
+ROW_HASH_MULTIPLIER = np.uint64(1000003)
+
+# 并行比较时检查取消的间隔（秒）
+CANCEL_POLL_SECONDS = 0.2
+
+# 工作表的比较状态
+SHEET_COMPARED = '已比较'
+SHEET_NO_ROWS = '无可比较的行'
+SHEET_ONLY_A = '仅文件A有'
+SHEET_ONLY_B = '仅文件B有'
+
+# "工作表统计"的字段
+SHEET_STATISTICS_FIELDS = ['工作表', '状态', '文件A行数', '文件B行数', '比较行数', '比较列数', '不同单元格数',
+                           '相似度(%)', '哈希预检跳过行数', '新增行数', '删除行数', '新增列数', '删除列数']
+
+# 报告中固定的工作表名，按工作表生成的原始数据等工作表不能与之重名
+REPORT_SHEET_NAMES = ('比较概览', '工作表统计', '差异详情')
+
+
+def iter_row_chunks(rows_a, rows_b, row_numbers, chunk_rows):
+    """同步遍历A和B的数据行，按块生成 (行号列表, A数据行列表, B数据行列表)
+    
+    rows_a/rows_b 只包含要比较的行（由读取时按行范围过滤），row_numbers 为对应的升序行号（1基）；任一文件结束即停止。
+    """
+    chunk_numbers, chunk_a, chunk_b = [], [], []
+    for row_number, row_a, row_b in zip(row_numbers, rows_a, rows_b):
+        chunk_numbers.append(row_number)
+        chunk_a.append(row_a)
+        chunk_b.append(row_b)
+        if len(chunk_numbers) >= chunk_rows:
+            yield chunk_numbers, chunk_a, chunk_b
+            chunk_numbers, chunk_a, chunk_b = [], [], []
+    
+    if chunk_numbers:
+        yield chunk_numbers, chunk_a, chunk_b
+
+
+def normalized_numbers(values):
+    """统一数值列中的空值表示，使行哈希只取决于单元格的值"""
+    if values.dtype.kind == 'f':
+        return np.where(np.isnan(values), np.nan, values)
+    return values
+
+
+def format_key(row_values):
+    """将一行中若干列（如关键列）的值格式化为 列名=值 文本"""
+    return ', '.join(f"{column}={format_export_value(value)}" for column, value in row_values.items())
+
+
+def with_row_numbers(df, row_numbers):
+    """复制DataFrame并在首列插入原始行号"""
+    export_df = df.copy()
+    export_df.insert(0, '原始行号', row_numbers)
+    return export_df
+
+
+def format_read_engines(engine_a, engine_b):
+    """格式化文件A/B实际使用的读取引擎"""
+    if engine_a == engine_b:
+        return engine_a
+    return f"A: {engine_a} / B: {engine_b}"
+
+
+def sheet_label(name_a, name_b):
+    """工作表在报告中的名称，两个文件中的名称不同时（没有同名工作表）同时显示"""
+    return name_a if name_a == name_b else f"{name_a} / {name_b}"
+
+
+def sheet_statistics(sheet, status, rows_a=None, rows_b=None, statistics=None):
+    """生成一个工作表的统计信息，未比较的工作表只有名称、状态和行数"""
+    return dict(statistics or {}, sheet=sheet, status=status, rows_a=rows_a, rows_b=rows_b)
+
+
+def sheet_statistics_row(entry):
+    """把一个工作表的统计信息转换为"工作表统计"中的一行"""
+    compared = entry['status'] == SHEET_COMPARED
+    return [
+        entry['sheet'], entry['status'], entry['rows_a'], entry['rows_b'],
+        entry.get('compared_rows'), entry.get('compared_cols'), entry.get('diff_count'),
+        f"{entry['similarity']:.2f}%" if compared else None, entry.get('skipped_rows'),
+        entry.get('added_rows', 0) if compared else None, entry.get('removed_rows', 0) if compared else None,
+        entry.get('added_cols', 0) if compared else None, entry.get('removed_cols', 0) if compared else None,
+    ]
+
+
+def combine_statistics(statistics_list):
+    """合并多个工作表的统计信息：单元格数和行数相加，比较列数取最大值，相似度按合计重新计算"""
+    if len(statistics_list) == 1:
+        return dict(statistics_list[0])
+    combined = {}
+    for name in ('total_cells', 'diff_count', 'different_cells', 'compared_rows', 'skipped_rows',
+                 'matched_rows', 'changed_rows', 'added_rows', 'removed_rows', 'added_cols', 'removed_cols'):
+        values = [statistics[name] for statistics in statistics_list if name in statistics]
+        if values:
+            combined[name] = sum(values)
+    combined['compared_cols'] = max(statistics['compared_cols'] for statistics in statistics_list)
+    total_cells = combined['total_cells']
+    combined['similarity'] = (((total_cells - combined['different_cells']) / total_cells * 100)
+                              if total_cells > 0 else 100)
+    return combined
+
+
+def values_equal(val1, val2):
+    """比较两个值是否相等，处理NaN和空值"""
+    if pd.isna(val1) and pd.isna(val2):
+        return True
+    if pd.isna(val1) or pd.isna(val2):
+        return False
+    
+    str1 = str(val1).strip()
+    str2 = str(val2).strip()
+    
+    if str1 in EMPTY_STRINGS and str2 in EMPTY_STRINGS:
+        return True
+    
+    return str1 == str2
+
+
+def get_difference_type(val1, val2):
+    """获取差异类型"""
+    if pd.isna(val1) and not pd.isna(val2):
+        return "文件A为空值"
+    elif not pd.isna(val1) and pd.isna(val2):
+        return "文件B为空值"
+    elif str(val1).strip() == "" and str(val2).strip() != "":
+        return "文件A为空字符串"
+    elif str(val1).strip() != "" and str(val2).strip() == "":
+        return "文件B为空字符串"
+    else:
+        return "值不同"
+
+
+def compare_pair_in_worker(options, pair, save_dir):
+    """在工作进程中比较单对文件，返回 (比较结果, 日志消息列表)"""
+    messages = []
+    comparer = ExcelComparer(log=messages.append, **options)
+    result = comparer.compare_file_pair(pair, save_dir)
+    return result, messages
+
+
+class ExcelComparer:
+    """批量比较Excel文件对并生成报告"""
+    
+    def __init__(self, range_text='', log=None, workers=1, read_engine='auto',
+                 streaming=False, chunk_rows=10000, row_hash_precheck=True,
+                 row_alignment='position', key_columns=(), max_row_edits=DEFAULT_MAX_EDITS,
+                 column_alignment='position', normalize_headers=False, column_aliases=(),
+                 report_engine='auto', data_sheets='all', highlight_diffs=False, export_format=None,
+                 sheet_names=None, compare_mode='text', compare_rules=None,
+                 cache_dir=None, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, cache_link_reports=False,
+                 sheet_cache_dir=None, sheet_cache_max_bytes=DEFAULT_SHEET_CACHE_MAX_BYTES,
+                 timing_trace=False, profile_mode=None, profile_pairs=()):
+        # 行范围（如 "1-100"、"1,3,4,9"，留空比较所有行），创建时编译并校验一次，对每个工作表分别应用
+        self.row_range = RowRange(range_text)
+        self.range_text = self.row_range.text
+        # 要比较的工作表名（None为比较全部同名工作表）
+        self.sheet_names = tuple(sheet_names) if sheet_names else None
+        # 日志回调，默认输出到标准输出
+        self.log = log or print
+        # 并行比较的进程数（1为在当前进程中逐对比较，0为使用全部CPU核心）
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        # Excel读取引擎（auto为按文件大小和扩展名自动选择）
+        self.read_engine = read_engine
+        # 流式比较模式：分块读取和比较，适用于超出内存的大文件
+        self.streaming = streaming
+        self.chunk_rows = chunk_rows
+        # 行哈希预检：内容相同的行不做逐单元格比较
+        self.row_hash_precheck = row_hash_precheck
+        # 行对齐方式（按行号、按关键列或按内容差异）、关键列名和差异对齐允许的最大插入/删除行数
+        self.key_columns = tuple(key_columns or ())
+        self.max_row_edits = max_row_edits
+        self.row_alignment = 'key' if self.key_columns and row_alignment == 'position' else row_alignment
+        if self.row_alignment not in ROW_ALIGNMENTS:
+            raise ValueError(f"不支持的行对齐方式: {row_alignment}")
+        if self.row_alignment == 'key' and not self.key_columns:
+            raise ValueError("按关键列对齐时必须指定关键列")
+        if streaming and self.row_alignment != 'position':
+            raise ValueError("流式比较仅支持按行号对齐")
+        # 列对齐方式（按列位置或按表头名称）、是否归一化表头和列别名 ((别名, 列名), ...)，
+        # 指定归一化或别名时默认按表头名称对齐；列对应关系按表头缓存，表头相同的工作表只计算一次
+        self.normalize_headers = normalize_headers
+        self.column_aliases = tuple(tuple(alias) for alias in column_aliases or ())
+        if (normalize_headers or self.column_aliases) and column_alignment == 'position':
+            column_alignment = 'header'
+        self.column_alignment = column_alignment
+        self.columns = ColumnAligner(column_alignment, normalize_headers, self.column_aliases)
+        # 值比较方式（文本/类型感知）和按列的比较规则字典，指定比较规则时默认使用类型感知比较
+        self.compare_rules = ComparisonRules.from_dict(compare_rules).to_dict() if compare_rules else None
+        self.compare_mode = 'typed' if self.compare_rules and compare_mode == 'text' else compare_mode
+        if self.compare_mode not in COMPARE_MODES:
+            raise ValueError(f"不支持的值比较方式: {compare_mode}")
+        self.rules = ComparisonRules.from_dict(self.compare_rules) if self.compare_mode == 'typed' else None
+        # 报告写入引擎和原始数据工作表的输出方式（全部行/仅有差异的行/不输出）
+        self.report_engine = report_engine
+        self.data_sheets = data_sheets
+        if report_engine not in REPORT_ENGINES:
+            raise ValueError(f"不支持的报告写入引擎: {report_engine}")
+        if data_sheets not in DATA_SHEET_MODES:
+            raise ValueError(f"不支持的原始数据工作表选项: {data_sheets}")
+        # 在原始数据工作表中标记差异单元格和仅在一个文件中存在的行
+        self.highlight_diffs = highlight_diffs
+        # 机器可读导出格式（parquet/csv/jsonl，None为不导出），在主进程中逐对追加写入
+        self.export_format = export_format
+        if export_format is not None:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f"不支持的导出格式: {export_format}")
+            if not export_available(export_format):
+                raise ValueError("导出 Parquet 需要安装 pyarrow")
+        # 结果缓存（cache_dir为None时不启用）
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_link_reports = cache_link_reports
+        self.cache = ResultCache(cache_dir, cache_max_bytes, cache_link_reports) if cache_dir else None
+        # 解析缓存（sheet_cache_dir为None时不启用）：按文件内容缓存解析后的工作表，同一文件再次比较时不重新解析
+        self.sheet_cache_dir = sheet_cache_dir
+        self.sheet_cache_max_bytes = sheet_cache_max_bytes
+        self.sheet_cache = None
+        if sheet_cache_dir:
+            if not sheet_cache_available():
+                raise ValueError("解析缓存需要安装 pyarrow")
+            self.sheet_cache = SheetCache(sheet_cache_dir, sheet_cache_max_bytes)
+        self.sheet_cache_hits = 0  # 当前文件对从解析缓存读取的文件数
+        # 耗时记录：是否另外保存为 JSON；性能分析方式（cprofile/tracemalloc，None为不分析）和要分析的文件对（空为全部）
+        self.timing_trace = timing_trace
+        self.profile_mode = profile_mode
+        self.profile_pairs = tuple(profile_pairs or ())
+        if profile_mode is not None and profile_mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的性能分析方式: {profile_mode}")
+        self.timer = PairTimer()  # 当前文件对的各阶段耗时
+        self.batch_started = None  # 最近一次批量比较的开始时间
+        self.batch_results = []  # 存储批量比较结果
+        self.cancelled = False  # 最近一次批量比较是否被取消
+    
+    def log_message(self, message):
+        """输出日志消息"""
+        self.log(message)
+    
+    def comparer_options(self):
+        """返回重建比较器所需的比较选项（用于工作进程）"""
+        return {
+            'range_text': self.range_text,
+            # 工作进程据此在进程内按顺序比较工作表，不再启动线程池
+            'workers': self.workers,
+            'read_engine': self.read_engine,
+            'streaming': self.streaming,
+            'chunk_rows': self.chunk_rows,
+            'row_hash_precheck': self.row_hash_precheck,
+            'row_alignment': self.row_alignment,
+            'key_columns': self.key_columns,
+            'max_row_edits': self.max_row_edits,
+            'column_alignment': self.column_alignment,
+            'normalize_headers': self.normalize_headers,
+            'column_aliases': self.column_aliases,
+            'report_engine': self.report_engine,
+            'data_sheets': self.data_sheets,
+            'highlight_diffs': self.highlight_diffs,
+            'sheet_names': self.sheet_names,
+            'compare_mode': self.compare_mode,
+            'compare_rules': self.compare_rules,
+            'cache_dir': self.cache_dir,
+            'cache_max_bytes': self.cache_max_bytes,
+            'cache_link_reports': self.cache_link_reports,
+            'sheet_cache_dir': self.sheet_cache_dir,
+            'sheet_cache_max_bytes': self.sheet_cache_max_bytes,
+            'profile_mode': self.profile_mode,
+            'profile_pairs': self.profile_pairs,
+        }
+    
+    def cache_key_options(self):
+        """返回影响比较结果的选项，作为结果缓存键的一部分"""
+        return {name: value for name, value in self.comparer_options().items()
+                if name != 'workers' and not name.startswith(('cache_', 'sheet_cache_', 'profile_'))}
+    
+    def run_batch(self, file_pairs, output_dir=None, progress=None, cancel_event=None):
+        """批量比较文件对，返回 (结果目录, 成功数, 失败数)
+        
+        progress 为可选回调 progress(已完成对数, 总对数, 比较结果)，每对文件完成后调用；
+        cancel_event 为可选的 threading.Event，设置后不再开始新的文件对，并用已完成（包括取消时正在比较）的文件对生成汇总报告。
+        """
+        self.log_message(f"开始批量比较 {len(file_pairs)} 对文件...")
+        
+        # 清空之前的结果
+        self.batch_results = []
+        self.cancelled = False
+        self.batch_started = time.perf_counter()
+        
+        # 获取保存目录（默认使用第一个文件的目录）
+        save_dir = output_dir or os.path.dirname(file_pairs[0]['file_a'])
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        # 创建批量比较结果目录
+        batch_dir = os.path.join(save_dir, f"批量比较结果_{timestamp}")
+        os.makedirs(batch_dir, exist_ok=True)
+        
+        successful_comparisons = 0
+        failed_comparisons = 0
+        results_by_index = {}
+        
+        # 差异明细和文件对统计的导出文件，每对文件完成后立即追加
+        exporter = ResultExporter(batch_dir, self.export_format) if self.export_format else None
+        # 汇总统计逐对累积，差异明细溢写到临时文件，内存占用与文件对数量无关
+        summary = BatchSummary(batch_dir)
+        try:
+            try:
+                # 按完成顺序接收每对文件的比较结果
+                pair_results = self.iter_pair_results(file_pairs, batch_dir, cancel_event)
+                for done, (index, pair, result, error) in enumerate(pair_results, 1):
+                    if error is not None:
+                        failed_comparisons += 1
+                        self.log_message(f"❌ {pair['base_name']} 比较出错：{error}")
+                    elif result:
+                        successful_comparisons += 1
+                        self.log_message(f"✅ [{done}/{len(file_pairs)}] {pair['base_name']} 比较完成")
+                        summary.add(index, result)
+                        # 只保留统计信息，差异明细已写入汇总的临时文件
+                        results_by_index[index] = {name: value for name, value in result.items()
+                                                   if name != 'differences'}
+                    else:
+                        failed_comparisons += 1
+                        self.log_message(f"❌ {pair['base_name']} 比较失败")
+                    
+                    if exporter:
+                        exporter.write_result(pair, result, error)
+                    if progress:
+                        progress(done, len(file_pairs), result)
+            finally:
+                if exporter:
+                    exporter.close()
+            
+            if exporter:
+                self.log_message(f"差异明细已导出：{exporter.diff_path}")
+            
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancelled = True
+                self.log_message(f"⚠️ 批量比较已取消，已完成 {successful_comparisons + failed_comparisons}/{len(file_pairs)} 对")
+            
+            # 按文件对原始顺序保存结果，保证汇总报告顺序稳定
+            self.batch_results = [results_by_index[index] for index in sorted(results_by_index)]
+            
+            # 生成批量比较汇总报告
+            summary_started = time.perf_counter()
+            self.generate_batch_summary(batch_dir, file_pairs, successful_comparisons, failed_comparisons, summary)
+            if self.timing_trace:
+                self.write_timing_trace(batch_dir, file_pairs, time.perf_counter() - summary_started)
+        finally:
+            summary.close()
+        
+        return batch_dir, successful_comparisons, failed_comparisons
+    
+    def iter_pair_results(self, file_pairs, batch_dir, cancel_event=None):
+        """逐对比较文件，按完成顺序生成 (序号, 文件对, 比较结果, 错误信息)
+        
+        取消后不再开始新的文件对，已经开始的文件对完成后仍然生成其结果。
+        """
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+        
+        if self.workers <= 1 or len(file_pairs) <= 1:
+            for i, pair in enumerate(file_pairs):
+                if cancelled():
+                    return
+                try:
+                    self.log_message(f"正在比较第 {i + 1}/{len(file_pairs)} 对：{pair['base_name']}")
+                    yield i, pair, self.compare_file_pair(pair, batch_dir), None
+                except Exception as e:
+                    yield i, pair, None, str(e)
+            return
+        
+        workers = min(self.workers, len(file_pairs))
+        self.log_message(f"使用 {workers} 个进程并行比较")
+        options = self.comparer_options()
+        # 使用spawn启动工作进程，避免在图形界面等多线程进程中fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(compare_pair_in_worker, options, pair, batch_dir): (i, pair)
+                for i, pair in enumerate(file_pairs)
+            }
+            pending = set(futures)
+            while pending:
+                # 定时检查取消：不必等到下一对文件完成才响应
+                done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, pair = futures[future]
+                    try:
+                        result, messages = future.result()
+                    except Exception as e:
+                        yield i, pair, None, str(e)
+                        continue
+                    for message in messages:
+                        self.log_message(message)
+                    yield i, pair, result, None
+                if cancelled():
+                    # 立即取消尚未开始的文件对；已经开始的文件对会写出报告，等待其完成并计入结果，汇总与结果目录一致
+                    pending = {future for future in pending if not future.cancel()}
+    
+    def compare_file_pair(self, pair, save_dir):
+        """比较单对文件，结果中的 timing 为各阶段的耗时记录；指定了性能分析时对该文件对做 cProfile/tracemalloc 分析"""
+        self.timer = PairTimer()
+        self.sheet_cache_hits = 0
+        if self.profile_mode is None or (self.profile_pairs and pair['base_name'] not in self.profile_pairs):
+            result = self.compare_file_pair_cached(pair, save_dir)
+        else:
+            profiler = PairProfiler(self.profile_mode, os.path.join(save_dir, PROFILE_DIR_NAME), pair['base_name'])
+            with profiler:
+                result = self.compare_file_pair_cached(pair, save_dir)
+            self.log_message(f"📊 {pair['base_name']} 性能分析结果：{', '.join(profiler.paths)}")
+        if result:
+            result['timing'] = self.timer.record(result['statistics'], result.get('cache_hit', False))
+        return result
+    
+    def compare_file_pair_cached(self, pair, save_dir):
+        """比较单对文件（启用结果缓存时，内容未变化的文件对直接复用上次的结果和报告）"""
+        if self.cache is None:
+            return self.run_comparison(pair, save_dir)
+        
+        report_path = os.path.join(save_dir, f"{pair['base_name']}_比较报告.xlsx")
+        try:
+            key = self.cache.make_key(pair, self.cache_key_options())
+        except OSError as e:
+            self.log_message(f"比较 {pair['base_name']} 时出错: {str(e)}")
+            return None
+        
+        result = self.cache.load(key, report_path)
+        if result is not None:
+            self.log_message(f"♻️ {pair['base_name']} 文件未变化，复用缓存的比较结果")
+            result['pair'] = pair
+            result['cache_hit'] = True
+            return result
+        
+        result = self.run_comparison(pair, save_dir)
+        if result:
+            try:
+                self.cache.store(key, result, report_path)
+            except OSError as e:
+                self.log_message(f"⚠️ {pair['base_name']} 写入结果缓存失败: {str(e)}")
+            result['cache_hit'] = False
+        return result
+    
+    def read_workbook(self, path, read_rows):
+        """读取一个文件的工作表，返回 (以数据行号为索引的 {工作表名: DataFrame}, 实际使用的引擎)
+        
+        启用解析缓存时，文件内容和读取选项（引擎、工作表、行范围）都未变化则直接从缓存加载，否则解析后存入缓存。
+        """
+        if self.sheet_cache is None:
+            return read_sheets(path, self.read_engine, self.sheet_names, read_rows)
+        
+        engine = choose_engine(path, self.read_engine, read_rows)
+        options = {'engine': engine, 'sheet_names': self.sheet_names, 'rows': self.row_range.merged}
+        try:
+            key = self.sheet_cache.make_key(path, options)
+        except OSError as e:
+            self.log_message(f"⚠️ {os.path.basename(path)} 无法使用解析缓存: {str(e)}")
+            return read_sheets(path, engine, self.sheet_names, read_rows)
+        
+        sheets = self.sheet_cache.load(key)
+        if sheets is not None:
+            self.sheet_cache_hits += 1
+            return sheets, f"{engine}（解析缓存）"
+        
+        sheets, engine = read_sheets(path, engine, self.sheet_names, read_rows)
+        try:
+            self.sheet_cache.store(key, sheets)
+        except (OSError, ValueError) as e:
+            self.log_message(f"⚠️ {os.path.basename(path)} 写入解析缓存失败: {str(e)}")
+        return sheets, engine
+    
+    def run_comparison(self, pair, save_dir):
+        """按当前比较模式比较单对文件"""
+        if self.streaming:
+            return self.compare_file_pair_streaming(pair, save_dir)
+        return self.compare_file_pair_in_memory(pair, save_dir)
+    
+    def compare_file_pair_in_memory(self, pair, save_dir):
+        """将两个文件完整读入内存后比较（每个文件只打开一次，同名工作表并行比较）"""
+        try:
+            # 读取Excel文件的全部（或指定的）工作表，只解析行范围内的行
+            read_rows = self.row_range.read_rows()
+            with self.timer.stage('read_a'):
+                sheets_a, engine_a = self.read_workbook(pair['file_a'], read_rows)
+            with self.timer.stage('read_b'):
+                sheets_b, engine_b = self.read_workbook(pair['file_b'], read_rows)
+            read_engines = format_read_engines(engine_a, engine_b)
+            matched, only_a, only_b = self.match_sheets(list(sheets_a), list(sheets_b))
+            
+            # 对齐行并计算差异
+            sheet_results = self.compare_sheets(sheets_a, sheets_b, matched)
+            compared = [result for result in sheet_results if result is not None]
+            if not compared:
+                return None
+            
+            # 按工作表统计，包括没有可比较的行和只在一个文件中存在的工作表
+            entries = []
+            for (name_a, name_b), result in zip(matched, sheet_results):
+                if result is None:
+                    entries.append(sheet_statistics(sheet_label(name_a, name_b), SHEET_NO_ROWS,
+                                                    len(sheets_a[name_a]), len(sheets_b[name_b])))
+                else:
+                    entries.append(sheet_statistics(result['sheet'], SHEET_COMPARED, len(result['df1']),
+                                                    len(result['df2']), result['comparison']['statistics']))
+            entries += [sheet_statistics(name, SHEET_ONLY_A, rows_a=len(sheets_a[name])) for name in only_a]
+            entries += [sheet_statistics(name, SHEET_ONLY_B, rows_b=len(sheets_b[name])) for name in only_b]
+            statistics = combine_statistics([result['comparison']['statistics'] for result in compared])
+            statistics.update(read_engines=read_engines, sheet_statistics=entries)
+            
+            # 生成单个比较报告
+            report_filename = f"{pair['base_name']}_比较报告.xlsx"
+            report_path = os.path.join(save_dir, report_filename)
+            
+            with self.timer.stage('report'):
+                self.generate_single_report(pair, compared, statistics, report_path)
+            
+            # 返回比较结果用于汇总
+            return {
+                'pair': pair,
+                'differences': DiffRecords.concat([result['comparison']['differences'] for result in compared]),
+                'statistics': statistics,
+                'sheet_cache_hits': self.sheet_cache_hits
+            }
+            
+        except Exception as e:
+            self.log_message(f"比较 {pair['base_name']} 时出错: {str(e)}")
+            return None
+    
+    def match_sheets(self, names_a, names_b):
+        """按名称匹配两个文件的工作表，返回 ([(A中的名称, B中的名称)], 仅文件A有的, 仅文件B有的)
+        
+        按文件A中的顺序排列；指定了工作表时只匹配其中的工作表。
+        未指定工作表且两个文件没有同名工作表时，比较各自的第一个工作表。
+        """
+        if self.sheet_names is not None:
+            absent = [name for name in self.sheet_names if name not in names_a and name not in names_b]
+            if absent:
+                self.log_message(f"⚠️ 工作表在两个文件中都不存在: {', '.join(absent)}")
+            names_a = [name for name in names_a if name in self.sheet_names]
+            names_b = [name for name in names_b if name in self.sheet_names]
+        
+        matched = [(name, name) for name in names_a if name in names_b]
+        if not matched:
+            if self.sheet_names is not None or not names_a or not names_b:
+                raise ValueError("两个文件中没有可比较的同名工作表")
+            self.log_message(f"⚠️ 两个文件没有同名的工作表，比较各自的第一个工作表: {names_a[0]} / {names_b[0]}")
+            matched = [(names_a[0], names_b[0])]
+        
+        only_a = [name for name in names_a if name not in {name_a for name_a, _ in matched}]
+        only_b = [name for name in names_b if name not in {name_b for _, name_b in matched}]
+        return matched, only_a, only_b
+    
+    def compare_sheets(self, sheets_a, sheets_b, matched):
+        """比较匹配的工作表，返回与 matched 顺序一致的结果列表（没有可比较的行时为None）
+        
+        各工作表相互独立，在线程池中并行比较；多进程比较文件对时每个进程内按顺序比较，避免线程过多。
+        """
+        def compare(names):
+            name_a, name_b = names
+            return self.compare_sheet(sheet_label(name_a, name_b), sheets_a[name_a], sheets_b[name_b])
+        
+        threads = min(len(matched), os.cpu_count() or 1) if self.workers == 1 else 1
+        if threads <= 1:
+            return [compare(names) for names in matched]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(compare, matched))
+    
+    def compare_sheet(self, sheet, df1, df2):
+        """按行范围选出一个工作表要比较的行，对齐并计算差异；没有可比较的行时返回None
+        
+        df1/df2 以数据行号为索引（read_sheets 的返回值）。
+        """
+        # 按行范围选出要比较的行（0基位置）
+        with self.timer.stage('select'):
+            positions_a, positions_b = self.select_rows(df1, df2)
+            if len(positions_a) == 0 or len(positions_b) == 0:
+                return None
+            
+            # 提取指定行进行比较
+            df1_compare = df1.iloc[positions_a]
+            df2_compare = df2.iloc[positions_b]
+            row_numbers_a = df1_compare.index.tolist()
+            row_numbers_b = df2_compare.index.tolist()
+            # 列对应关系（表头相同时复用缓存）
+            columns = self.columns.align(df1.columns, df2.columns)
+        
+        with self.timer.stage('diff'):
+            comparison = self.compare_frames(df1_compare, df2_compare, row_numbers_a, row_numbers_b, columns)
+        comparison['differences'].set_sheet(sheet)
+        comparison['statistics'].update(columns.statistics())
+        comparison['overview'] += columns.overview()
+        return {
+            'sheet': sheet,
+            'df1': df1_compare,
+            'df2': df2_compare,
+            'row_numbers_a': row_numbers_a,
+            'row_numbers_b': row_numbers_b,
+            'comparison': comparison,
+        }
+    
+    def select_rows(self, df1, df2):
+        """按行范围选出文件A和文件B要比较的行，返回两个0基位置数组（按行范围的输入顺序）
+        
+        df1/df2 以数据行号为索引（读取时可能只解析了行范围内的行），行范围按各自的索引裁剪，不展开为行号列表。
+        按行号对齐时只保留两个文件都存在的行；按关键列对齐时两个文件分别按各自读到的行过滤。
+        """
+        if self.row_range.all_rows:
+            if self.row_alignment == 'position':
+                # 如果为空，比较两个文件都存在的所有行
+                min_rows = min(len(df1), len(df2))
+                return np.arange(min_rows), np.arange(min_rows)
+            return np.arange(len(df1)), np.arange(len(df2))
+        
+        positions_a = self.row_range.positions(df1.index)
+        if self.row_alignment != 'position':
+            return positions_a, self.row_range.positions(df2.index)
+        # 按文件A中的行号查找在文件B中的位置（-1表示该行不存在）
+        positions_b = df2.index.get_indexer(df1.index[positions_a])
+        valid = positions_b >= 0
+        return positions_a[valid], positions_b[valid]
+    
+    def compare_frames(self, df1, df2, row_numbers_a, row_numbers_b, columns):
+        """对齐两个DataFrame的行并计算差异，返回包含差异、统计信息和报告附加内容的字典
+        
+        columns 为两个DataFrame的列对应关系（ColumnMapping），只比较对应的列。
+        """
+        if self.row_alignment == 'key':
+            return self.compare_frames_by_key(df1, df2, row_numbers_a, row_numbers_b, columns)
+        if self.row_alignment == 'diff':
+            return self.compare_frames_by_sequence(df1, df2, row_numbers_a, row_numbers_b, columns)
+        return self.compare_frames_by_position(df1, df2, row_numbers_a, columns)
+    
+    def compare_frames_by_position(self, df1, df2, row_numbers_a, columns, overview=()):
+        """按行号对齐：行哈希预检后，只对内容不同的行计算单元格差异"""
+        differences, skipped_rows = self.calculate_changed_row_differences(df1, df2, row_numbers_a, columns)
+        min_rows = min(len(df1), len(df2))
+        changed = np.flatnonzero(np.isin(row_numbers_a[:min_rows], differences.rows))
+        highlights = None
+        if self.highlight_diffs:
+            # 按行号对齐时两个文件的差异单元格行位置相同，列位置按列对应关系换算
+            rows, cols = differences.cell_coordinates()
+            positions = pd.Index(row_numbers_a[:min_rows]).get_indexer(rows)
+            highlights = ((positions, cols, ()), (positions, columns.columns_b(cols), ()))
+        return self.build_comparison(differences, min_rows, len(columns), skipped_rows, overview=overview,
+                                     diff_rows=(changed, changed), highlights=highlights)
+    
+    def compare_frames_by_key(self, df1, df2, row_numbers_a, row_numbers_b, columns):
+        """按关键列对齐行（哈希连接）后比较，分别报告匹配行的单元格差异、新增行和删除行
+        
+        按表头名称对齐列时，关键列为文件A中的列名，文件B中使用对应的列。
+        """
+        key_columns = list(self.key_columns)
+        if self.column_alignment == 'header':
+            key_columns_b = columns.names_in_b(key_columns)
+        else:
+            key_columns_b = [column if column in df2.columns else None for column in key_columns]
+        missing = [column for column, column_b in zip(key_columns, key_columns_b)
+                   if column not in df1.columns or column_b is None]
+        if missing:
+            raise ValueError(f"关键列在文件中不存在: {', '.join(map(str, missing))}")
+        
+        keys1 = df1[key_columns]
+        keys2 = df2[key_columns_b]
+        key_hashes1, key_hashes2 = self.row_hashes(keys1, keys2)
+        alignment = align_by_key_hashes(key_hashes1, key_hashes2)
+        key_label = f"关键列: {', '.join(map(str, key_columns))}"
+        return self.compare_aligned_rows(df1, df2, row_numbers_a, row_numbers_b, columns, alignment,
+                                         key_label, keys1, keys2)
+    
+    def compare_frames_by_sequence(self, df1, df2, row_numbers_a, row_numbers_b, columns):
+        """按整行内容（对应的列）做序列差异对齐后比较，编辑距离超过上限时退回按行号对齐"""
+        rows1, rows2 = columns.select(df1, df2)
+        hashes1, hashes2 = self.row_hashes(rows1, rows2)
+        alignment = align_by_sequence(hashes1, hashes2, self.max_row_edits)
+        if alignment is None:
+            self.log_message(f"插入/删除的行数超过上限 {self.max_row_edits}，改为按行号对齐")
+            return self.compare_frames_by_position(df1, df2, row_numbers_a, columns, overview=[
+                ('行对齐方式', f"按行号（差异对齐超过编辑距离上限 {self.max_row_edits}）")])
+        return self.compare_aligned_rows(df1, df2, row_numbers_a, row_numbers_b, columns, alignment,
+                                         '整行', rows1, rows2)
+    
+    def compare_aligned_rows(self, df1, df2, row_numbers_a, row_numbers_b, columns, alignment, row_label,
+                             rows1, rows2):
+        """比较对齐后的匹配行，并把仅在一个文件中存在的行记为整行差异（rows1/rows2 为整行差异中显示的列）"""
+        matched_a, matched_b, removed, added = alignment
+        
+        # 匹配行逐单元格比较，原始行号使用文件A的行号
+        matched_row_numbers = [row_numbers_a[i] for i in matched_a]
+        differences, skipped_rows = self.calculate_changed_row_differences(
+            df1.iloc[matched_a], df2.iloc[matched_b], matched_row_numbers, columns)
+        changed_row_numbers = np.unique(differences.rows)
+        changed_rows = len(changed_row_numbers)
+        changed = np.isin(matched_row_numbers, changed_row_numbers)
+        diff_rows = (np.sort(np.concatenate((matched_a[changed], removed))),
+                     np.sort(np.concatenate((matched_b[changed], added))))
+        highlights = None
+        if self.highlight_diffs:
+            # 差异单元格按匹配行换算为两个文件中的行位置，删除行和新增行整行标记
+            rows, cols = differences.cell_coordinates()
+            matched = pd.Index(matched_row_numbers).get_indexer(rows)
+            highlights = ((matched_a[matched], cols, removed),
+                          (matched_b[matched], columns.columns_b(cols), added))
+        
+        # 删除行使用文件A行号，新增行使用文件B行号
+        differences = DiffRecords.concat([
+            differences,
+            DiffRecords.from_rows([row_numbers_a[i] for i in removed], row_label,
+                                  [format_key(rows1.iloc[i]) for i in removed], ROW_REMOVED),
+            DiffRecords.from_rows([row_numbers_b[i] for i in added], row_label,
+                                  [format_key(rows2.iloc[i]) for i in added], ROW_ADDED),
+        ])
+        
+        alignment_name = row_label if self.row_alignment == 'key' else '按内容差异对齐'
+        overview = [
+            ('行对齐方式', alignment_name),
+            ('匹配行数', len(matched_a)),
+            ('有差异的匹配行数', changed_rows),
+            ('文件B新增行数', len(added)),
+            ('文件B删除行数', len(removed)),
+        ]
+        # 没有新增行或删除行时不生成对应的工作表
+        sheets = {}
+        if len(added):
+            sheets['新增行'] = with_row_numbers(df2.iloc[added], [row_numbers_b[i] for i in added])
+        if len(removed):
+            sheets['删除行'] = with_row_numbers(df1.iloc[removed], [row_numbers_a[i] for i in removed])
+        comparison = self.build_comparison(differences, len(matched_a), len(columns), skipped_rows,
+                                           unmatched_rows=len(added) + len(removed),
+                                           overview=overview, sheets=sheets, diff_rows=diff_rows,
+                                           highlights=highlights)
+        comparison['statistics'].update({
+            'matched_rows': len(matched_a),
+            'changed_rows': changed_rows,
+            'added_rows': len(added),
+            'removed_rows': len(removed),
+        })
+        return comparison
+    
+    def build_comparison(self, differences, compared_rows, compared_cols, skipped_rows,
+                         unmatched_rows=0, overview=(), sheets=None, diff_rows=None, highlights=None):
+        """汇总比较结果；未匹配的整行按该行全部单元格不同计入相似度
+        
+        diff_rows 为 (文件A中有差异的行位置, 文件B中有差异的行位置)，用于只输出有差异的原始数据行。
+        highlights 为文件A和文件B各自的 (差异单元格行位置, 列位置, 整行标记的行位置)，用于在原始数据中标记差异。
+        """
+        total_cells = (compared_rows + unmatched_rows) * compared_cols
+        diff_count = len(differences)
+        different_cells = diff_count - unmatched_rows + unmatched_rows * compared_cols
+        similarity = ((total_cells - different_cells) / total_cells * 100) if total_cells > 0 else 100
+        return {
+            'differences': differences,
+            'statistics': {
+                'total_cells': total_cells,
+                'diff_count': diff_count,
+                'different_cells': different_cells,
+                'similarity': similarity,
+                'compared_rows': compared_rows,
+                'compared_cols': compared_cols,
+                'skipped_rows': skipped_rows
+            },
+            'overview': list(overview),
+            'sheets': sheets or {},
+            'diff_rows': diff_rows,
+            'highlights': highlights
+        }
+    
+    def compare_file_pair_streaming(self, pair, save_dir):
+        """流式比较单对文件：分块读取A和B，逐块计算差异并追加写入报告
+        
+        两个文件都不会整体载入内存，内存占用与文件行数无关（只与块大小和差异数量有关）。
+        每个文件只打开一次，匹配的工作表按顺序逐个比较。
+        每块数据单独做类型推断，同一列在不同块中类型不一致时，结果可能与内存模式略有不同。
+        """
+        try:
+            read_rows = self.row_range.read_rows()
+            
+            with closing(self.open_workbook_timed('read_a', pair['file_a'])) as workbook_a, \
+                    closing(self.open_workbook_timed('read_b', pair['file_b'])) as workbook_b:
+                worksheets_a = {sheet.title: sheet for sheet in workbook_a.worksheets}
+                worksheets_b = {sheet.title: sheet for sheet in workbook_b.worksheets}
+                matched, only_a, only_b = self.match_sheets(list(worksheets_a), list(worksheets_b))
+                
+                # 逐行写出的报告工作簿，每行追加后即写入临时文件；
+                # 原始数据工作表按匹配的工作表预先创建，比较多个工作表时名称后加 "-工作表名"
+                report_path = os.path.join(save_dir, f"{pair['base_name']}_比较报告.xlsx")
+                workbook = ReportWorkbook(report_path, self.report_engine)
+                try:
+                    overview_sheet = workbook.add_sheet('比较概览')
+                    sheet_stats_sheet = workbook.add_sheet('工作表统计')
+                    used_names = set(REPORT_SHEET_NAMES)
+                    data_sheets = []
+                    for name_a, name_b in matched:
+                        if self.data_sheets == 'none':
+                            data_sheets.append((None, None))
+                            continue
+                        suffix = f"-{sheet_label(name_a, name_b)}" if len(matched) > 1 else ''
+                        data_sheets.append((workbook.add_sheet(unique_sheet_name('文件A数据' + suffix, used_names)),
+                                            workbook.add_sheet(unique_sheet_name('文件B数据' + suffix, used_names))))
+                    # 差异详情的表头在写入第一条差异时再写，没有差异时改为写入说明（与内存模式相同）
+                    diff_sheet = workbook.add_sheet('差异详情')
+                    
+                    entries = []
+                    compared_statistics = []
+                    column_mappings = []
+                    difference_chunks = []
+                    for (name_a, name_b), (sheet_a, sheet_b) in zip(matched, data_sheets):
+                        sheet = sheet_label(name_a, name_b)
+                        sheet_result = self.compare_worksheet_streaming(
+                            sheet, self.timer.timed_iter('read_a', iter_worksheet_rows(worksheets_a[name_a], read_rows)),
+                            self.timer.timed_iter('read_b', iter_worksheet_rows(worksheets_b[name_b], read_rows)),
+                            count(1) if read_rows is None else self.row_range.iter_read_rows(),
+                            sheet_a, sheet_b, diff_sheet)
+                        if sheet_result is None:
+                            entries.append(sheet_statistics(sheet, SHEET_NO_ROWS))
+                            continue
+                        differences, statistics, columns = sheet_result
+                        difference_chunks.append(differences)
+                        compared_statistics.append(statistics)
+                        column_mappings.append((sheet, columns))
+                        entries.append(sheet_statistics(sheet, SHEET_COMPARED, statistics['compared_rows'],
+                                                        statistics['compared_rows'], statistics))
+                    entries += [sheet_statistics(name, SHEET_ONLY_A) for name in only_a]
+                    entries += [sheet_statistics(name, SHEET_ONLY_B) for name in only_b]
+                    
+                    if not compared_statistics:
+                        workbook.discard()
+                        return None
+                    
+                    # 计算统计信息
+                    statistics = combine_statistics(compared_statistics)
+                    statistics.update(read_engines='openpyxl-readonly', sheet_statistics=entries)
+                    compared_rows = statistics['compared_rows']
+                    diff_count = statistics['diff_count']
+                    
+                    with self.timer.stage('report'):
+                        if diff_sheet.row_count == 0:
+                            diff_sheet.append(['说明'])
+                            diff_sheet.append(['两个文件在指定范围内完全相同'])
+                        sheet_stats_sheet.append(SHEET_STATISTICS_FIELDS)
+                        for entry in entries:
+                            sheet_stats_sheet.append([to_cell_value(value) for value in sheet_statistics_row(entry)])
+                        overview_rows = [
+                            ('基础文件名', pair['base_name']),
+                            ('文件A', os.path.basename(pair['file_a'])),
+                            ('文件B', os.path.basename(pair['file_b'])),
+                            ('比较时间', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                            ('比较行范围', self.range_text or '所有行'),
+                            ('比较的工作表', ', '.join(entry['sheet'] for entry in entries
+                                                       if entry['status'] == SHEET_COMPARED)),
+                            ('文件A行数', compared_rows),
+                            ('文件A列数', max(columns.width_a for _, columns in column_mappings)),
+                            ('文件B行数', compared_rows),
+                            ('文件B列数', max(columns.width_b for _, columns in column_mappings)),
+                            ('比较的行数', compared_rows), ('比较的列数', statistics['compared_cols']),
+                            ('不同单元格数', diff_count), ('相似度(%)', f"{statistics['similarity']:.2f}%"),
+                            ('读取引擎', 'openpyxl-readonly'), ('比较模式', '流式'),
+                            ('哈希预检跳过行数', statistics['skipped_rows']),
+                            ('原始数据工作表', self.data_sheet_overview()),
+                        ] + self.compare_rule_overview()
+                        for sheet, columns in column_mappings:
+                            prefix = f"{sheet}: " if len(column_mappings) > 1 else ''
+                            overview_rows += [(prefix + item, value) for item, value in columns.overview()]
+                        overview_rows += self.unmatched_sheet_overview(entries)
+                        if diff_count >= EXCEL_MAX_ROWS:
+                            overview_rows.append(('说明', f"差异数超过Excel最大行数，差异详情仅包含前 {EXCEL_MAX_ROWS - 1} 条"))
+                        overview_sheet.append(['项目', '值'])
+                        for row in overview_rows:
+                            overview_sheet.append(list(row))
+                        
+                        workbook.close()
+                except BaseException:
+                    # 出错时关闭并删除未完成的报告
+                    workbook.discard()
+                    raise
+            
+            return {
+                'pair': pair,
+                'differences': DiffRecords.concat(difference_chunks),
+                'statistics': statistics
+            }
+            
+        except Exception as e:
+            self.log_message(f"比较 {pair['base_name']} 时出错: {str(e)}")
+            return None
+    
+    def open_workbook_timed(self, stage, path):
+        """以只读模式打开工作簿，耗时计入指定的读取阶段"""
+        with self.timer.stage(stage):
+            return open_workbook_readonly(path)
+    
+    def compare_worksheet_streaming(self, sheet, rows_a, rows_b, data_row_numbers, sheet_a, sheet_b, diff_sheet):
+        """流式比较一个工作表，原始数据和差异详情追加到报告的工作表中；没有可比较的行时返回None
+        
+        rows_a/rows_b 为表头和读取时按行范围过滤后的数据行，data_row_numbers 为数据行对应的升序行号。
+        
+        返回 (差异记录, 统计信息, 列对应关系)，差异只保留差异值副本。
+        """
+        header_a = next(rows_a, None)
+        header_b = next(rows_b, None)
+        if not header_a or not header_b:
+            return None
+        columns_a = parse_header(header_a)
+        columns_b = parse_header(header_b)
+        columns = self.columns.align(columns_a, columns_b)
+        if sheet_a is not None:
+            sheet_a.append(['原始行号'] + columns_a)
+            sheet_b.append(['原始行号'] + columns_b)
+        
+        # 每块的差异只保留差异值副本，块数据随即释放
+        difference_chunks = []
+        diff_count = 0
+        compared_rows = 0
+        skipped_rows = 0
+        for row_numbers, chunk_a, chunk_b in iter_row_chunks(rows_a, rows_b, data_row_numbers, self.chunk_rows):
+            with self.timer.stage('read_a'):
+                df1 = rows_to_frame(chunk_a, columns_a)
+            with self.timer.stage('read_b'):
+                df2 = rows_to_frame(chunk_b, columns_b)
+            with self.timer.stage('diff'):
+                chunk_differences, chunk_skipped_rows = self.calculate_changed_row_differences(
+                    df1, df2, row_numbers, columns)
+                chunk_differences = chunk_differences.compact()
+                chunk_differences.set_sheet(sheet)
+            
+            with self.timer.stage('report'):
+                if sheet_a is not None:
+                    highlights_a = highlights_b = None
+                    if self.data_sheets == 'diff':
+                        changed = np.flatnonzero(np.isin(row_numbers, chunk_differences.rows))
+                        if self.highlight_diffs:
+                            highlights_a, highlights_b = self.chunk_highlights(chunk_differences, row_numbers,
+                                                                               columns, changed)
+                        self.append_data_rows(sheet_a, df1.iloc[changed], [row_numbers[i] for i in changed],
+                                              highlights_a)
+                        self.append_data_rows(sheet_b, df2.iloc[changed], [row_numbers[i] for i in changed],
+                                              highlights_b)
+                    else:
+                        if self.highlight_diffs:
+                            highlights_a, highlights_b = self.chunk_highlights(chunk_differences, row_numbers,
+                                                                               columns)
+                        self.append_data_rows(sheet_a, df1, row_numbers, highlights_a)
+                        self.append_data_rows(sheet_b, df2, row_numbers, highlights_b)
+                # 差异详情超过Excel最大行数的部分不写入工作表
+                if len(chunk_differences) and diff_sheet.row_count == 0:
+                    diff_sheet.append(DIFFERENCE_FIELDS)
+                writable = max(EXCEL_MAX_ROWS - diff_sheet.row_count, 0)
+                for row in islice(chunk_differences.iter_rows(), writable):
+                    diff_sheet.append([to_cell_value(value) for value in row])
+            
+            difference_chunks.append(chunk_differences)
+            diff_count += len(chunk_differences)
+            compared_rows += len(row_numbers)
+            skipped_rows += chunk_skipped_rows
+        
+        if compared_rows == 0:
+            return None
+        
+        total_cells = compared_rows * len(columns)
+        similarity = ((total_cells - diff_count) / total_cells * 100) if total_cells > 0 else 100
+        return DiffRecords.concat(difference_chunks), dict({
+            'total_cells': total_cells,
+            'diff_count': diff_count,
+            'different_cells': diff_count,
+            'similarity': similarity,
+            'compared_rows': compared_rows,
+            'compared_cols': len(columns),
+            'skipped_rows': skipped_rows
+        }, **columns.statistics()), columns
+    
+    def chunk_highlights(self, differences, row_numbers, columns, kept_rows=None):
+        """流式比较时一块数据中文件A和文件B各自要标记的差异单元格，kept_rows 为实际写出的块内行位置
+        
+        按行号对齐时两个文件的行位置相同，文件B的列位置按列对应关系换算。
+        """
+        rows, cols = differences.cell_coordinates()
+        # 块内行号升序，按行号查找块内的行位置
+        positions = np.searchsorted(np.asarray(row_numbers), rows)
+        return (group_highlights(positions, cols, kept_rows=kept_rows),
+                group_highlights(positions, columns.columns_b(cols), kept_rows=kept_rows))
+    
+    def append_data_rows(self, sheet, df, row_numbers, highlights=None):
+        """向原始数据工作表追加一块数据行，首列为原始行号；highlights 中的单元格标记底色（列位置不含行号列）"""
+        highlights = highlights or {}
+        for i, (row_number, values) in enumerate(zip(row_numbers, df.itertuples(index=False))):
+            row = [row_number] + [to_cell_value(value) for value in values]
+            if i in highlights:
+                sheet.append(row, [j + 1 for j in highlights[i]])
+            else:
+                sheet.append(row)
+    
+    def calculate_changed_row_differences(self, df1, df2, original_row_indices, columns):
+        """先比较行哈希（只含对应的列），只对哈希不同的行逐单元格计算差异，返回 (差异记录, 预检跳过的行数)"""
+        if not self.row_hash_precheck:
+            return self.calculate_differences(df1, df2, original_row_indices, columns), 0
+        
+        min_rows = min(len(df1), len(df2))
+        hashes1, hashes2 = self.row_hashes(*columns.select(df1.iloc[:min_rows], df2.iloc[:min_rows]))
+        changed = np.flatnonzero(hashes1 != hashes2)
+        skipped_rows = min_rows - len(changed)
+        if len(changed) == 0:
+            return DiffRecords(), skipped_rows
+        if skipped_rows == 0:
+            return self.calculate_differences(df1, df2, original_row_indices, columns), 0
+        
+        changed_rows = [original_row_indices[i] for i in changed]
+        differences = self.calculate_differences(df1.iloc[changed], df2.iloc[changed], changed_rows, columns)
+        return differences, skipped_rows
+    
+    def row_hashes(self, df1, df2):
+        """计算两个DataFrame每行的哈希值，单元格按values_equal的规则归一化后参与计算
+        
+        类型感知比较时，整数列与浮点数列统一按浮点数计算哈希（与按容差比较一致，哈希相同的值必然相等）。
+        """
+        hashes1 = np.zeros(len(df1), dtype=np.uint64)
+        hashes2 = np.zeros(len(df2), dtype=np.uint64)
+        for j in range(len(df1.columns)):
+            column1 = df1.iloc[:, j]
+            column2 = df2.iloc[:, j]
+            if column1.dtype == column2.dtype and column1.dtype.kind in 'biufmM':
+                # 同类型数值/日期列直接按值计算哈希
+                column_hash1 = pd.util.hash_array(normalized_numbers(column1.to_numpy()))
+                column_hash2 = pd.util.hash_array(normalized_numbers(column2.to_numpy()))
+            elif self.rules is not None and column1.dtype.kind in 'iuf' and column2.dtype.kind in 'iuf':
+                column_hash1 = pd.util.hash_array(normalized_numbers(column1.to_numpy(dtype=float)))
+                column_hash2 = pd.util.hash_array(normalized_numbers(column2.to_numpy(dtype=float)))
+            else:
+                column_hash1 = self.normalized_string_hashes(column1)
+                column_hash2 = self.normalized_string_hashes(column2)
+            # 按列顺序组合哈希（uint64溢出回绕）
+            hashes1 = hashes1 * ROW_HASH_MULTIPLIER ^ column_hash1
+            hashes2 = hashes2 * ROW_HASH_MULTIPLIER ^ column_hash2
+        return hashes1, hashes2
+    
+    def normalized_string_hashes(self, column):
+        """按values_equal的规则归一化一列值并计算哈希：等价的空字符串统一为''，空值使用固定哈希"""
+        na = column.isna().to_numpy()
+        if isinstance(column.dtype, pd.StringDtype):
+            stripped = column.str.strip().to_numpy(dtype=object, na_value='')
+        else:
+            stripped = self.stripped_strings(column.astype(object))
+        normalized = np.where(np.isin(stripped, EMPTY_STRINGS), '', stripped).astype(object)
+        hashes = pd.util.hash_array(normalized)
+        hashes[na] = NA_HASH
+        return hashes
+    
+    def calculate_differences(self, df1, df2, original_row_indices, columns):
+        """计算两个DataFrame之间的差异（按列向量化比较，结果与逐单元格比较一致）
+        
+        只比较列对应关系 columns 中的列，差异的列位置为文件A中的列位置。
+        返回 DiffRecords：只记录不一致单元格的位置和差异类型编码，值引用比较的列而不复制。
+        """
+        min_rows = min(len(df1), len(df2))
+        if min_rows == 0 or len(columns) == 0:
+            return DiffRecords()
+        
+        # 逐对应列生成不一致掩码，只记录不一致单元格的位置和差异类型（列数据按文件A中的列位置存放）
+        row_parts, col_parts, type_parts = [], [], []
+        columns1 = [None] * len(df1.columns)
+        columns2 = [None] * len(df1.columns)
+        for j, j_b in zip(columns.positions_a.tolist(), columns.positions_b.tolist()):
+            columns1[j] = df1.iloc[:min_rows, j]
+            columns2[j] = df2.iloc[:min_rows, j_b]
+            rule = self.rules.for_column(df1.columns[j]) if self.rules else None
+            mismatch, diff_types = self.column_differences(columns1[j], columns2[j], rule)
+            rows = np.flatnonzero(mismatch)
+            if len(rows):
+                row_parts.append(rows)
+                col_parts.append(np.full(len(rows), j))
+                type_parts.append(diff_types[rows])
+        
+        if not row_parts:
+            return DiffRecords()
+        
+        rows = np.concatenate(row_parts)
+        cols = np.concatenate(col_parts)
+        types = np.concatenate(type_parts)
+        # 按行优先排序，保持与逐行逐列遍历相同的输出顺序
+        order = np.lexsort((cols, rows))
+        rows = rows[order]
+        return DiffRecords.from_cells(np.asarray(original_row_indices)[rows], cols[order], rows, types[order],
+                                      columns1, columns2, df1.columns)
+    
+    def column_differences(self, column1, column2, rule=None):
+        """比较两列数据，返回不一致掩码和差异类型编码（语义与values_equal/get_difference_type相同）
+        
+        rule 不为None时按该列的规则做类型感知比较，空值和差异类型的判断不变。
+        """
+        values1 = column1.to_numpy()
+        values2 = column2.to_numpy()
+        na1 = pd.isna(values1)
+        na2 = pd.isna(values2)
+        
+        if rule is not None and values1.dtype.kind in 'iuf' and values2.dtype.kind in 'iuf':
+            # 类型感知：两列都是数值（类型可以不同，如整数与浮点数）时直接按容差比较
+            equal = rule.numbers_equal(values1.astype(float), values2.astype(float))
+            mismatch = ~(equal | (na1 & na2))
+            diff_types = np.select([na1 & ~na2, ~na1 & na2], [1, 2], default=0)
+            return mismatch, diff_types
+        
+        if rule is not None and rule.ignore_date_format and (values1.dtype.kind == 'M') != (values2.dtype.kind == 'M'):
+            # 类型感知：一列为日期时间、另一列为文本时，把文本解析为日期后直接比较，
+            # 其余的值（无法解析或日期不同）再按文本规则判断是否相等和差异类型
+            if values1.dtype.kind == 'M':
+                equal = (pd.Series(values1) == parse_dates(self.stripped_strings(column2.astype(object)))).to_numpy()
+            else:
+                equal = (parse_dates(self.stripped_strings(column1.astype(object))) == pd.Series(values2)).to_numpy()
+            mismatch = np.zeros(len(values1), dtype=bool)
+            diff_types = np.zeros(len(values1), dtype=int)
+            rest = np.flatnonzero(~equal)
+            if len(rest):
+                mismatch[rest], diff_types[rest] = self.column_differences(column1.iloc[rest], column2.iloc[rest])
+            return mismatch, diff_types
+        
+        if values1.dtype == values2.dtype and values1.dtype.kind in 'biufmM':
+            # 同类型数值/日期列：值相等即字符串表示相等，无需逐个转换为字符串
+            with np.errstate(invalid='ignore'):
+                equal = values1 == values2
+            if values1.dtype.kind == 'f':
+                # 0.0 与 -0.0 数值相等但字符串表示不同
+                equal &= np.signbit(values1) == np.signbit(values2)
+            mismatch = ~(equal | (na1 & na2))
+            diff_types = np.select([na1 & ~na2, ~na1 & na2], [1, 2], default=0)
+            return mismatch, diff_types
+        
+        # 其他列：按去除首尾空白后的字符串比较（日期等值先转换为pandas标量，与iloc取值一致）
+        str1 = self.stripped_strings(column1.astype(object))
+        str2 = self.stripped_strings(column2.astype(object))
+        both_empty = np.isin(str1, EMPTY_STRINGS) & np.isin(str2, EMPTY_STRINGS)
+        if rule is None:
+            equal = (na1 & na2) | (~na1 & ~na2 & (both_empty | (str1 == str2)))
+        else:
+            # 类型感知：折叠后的字符串相同即相等，其余非空值再按数值容差或日期比较
+            folded_equal = rule.fold_strings(str1) == rule.fold_strings(str2)
+            equal = (na1 & na2) | (~na1 & ~na2 & (both_empty | folded_equal))
+            candidates = np.flatnonzero(~equal & ~na1 & ~na2 & (str1 != '') & (str2 != ''))
+            if len(candidates):
+                equal[candidates] = rule.values_equal(str1[candidates], str2[candidates])
+        blank1 = str1 == ''
+        blank2 = str2 == ''
+        diff_types = np.select(
+            [na1 & ~na2, ~na1 & na2, blank1 & ~blank2, ~blank1 & blank2],
+            [1, 2, 3, 4], default=0
+        )
+        return ~equal, diff_types
+    
+    def stripped_strings(self, values):
+        """将一列值转换为去除首尾空白的字符串数组"""
+        result = np.empty(len(values), dtype=object)
+        result[:] = [str(value).strip() for value in values]
+        return result
+    
+    def generate_single_report(self, pair, compared, statistics, save_path):
+        """生成单个文件对的比较报告（逐行写出，不再复制整个DataFrame）
+        
+        compared 为各工作表的比较结果（compare_sheet 的返回值），只比较一个工作表时各工作表名与单表报告相同，
+        比较多个工作表时原始数据和附加工作表名后加 "-工作表名"。
+        """
+        multiple = len(compared) > 1
+        used_names = set(REPORT_SHEET_NAMES)
+        
+        def sheet_name(prefix, sheet):
+            return unique_sheet_name(f"{prefix}-{sheet}" if multiple else prefix, used_names)
+        
+        with ReportWorkbook(save_path, self.report_engine) as workbook:
+            # 1. 概览报告（写入的差异条数确定后再写，工作表顺序按创建顺序）
+            overview_sheet = workbook.add_sheet('比较概览')
+            
+            # 2. 工作表统计
+            sheet_stats_sheet = workbook.add_sheet('工作表统计')
+            sheet_stats_sheet.append(SHEET_STATISTICS_FIELDS)
+            for entry in statistics['sheet_statistics']:
+                sheet_stats_sheet.append([to_cell_value(value) for value in sheet_statistics_row(entry)])
+            
+            # 3. 各工作表的文件A数据 / 文件B数据（启用标记时差异单元格和新增/删除的行标记底色）
+            for result in compared:
+                df1, df2 = result['df1'], result['df2']
+                row_numbers_a, row_numbers_b = result['row_numbers_a'], result['row_numbers_b']
+                highlights = result['comparison']['highlights'] or (None, None)
+                if self.data_sheets == 'all':
+                    highlights_a, highlights_b = [None if cells is None else group_highlights(*cells)
+                                                  for cells in highlights]
+                    workbook.add_sheet(sheet_name('文件A数据', result['sheet'])).write_frame(
+                        df1, row_numbers_a, highlights_a)
+                    workbook.add_sheet(sheet_name('文件B数据', result['sheet'])).write_frame(
+                        df2, row_numbers_b, highlights_b)
+                elif self.data_sheets == 'diff':
+                    positions_a, positions_b = result['comparison']['diff_rows']
+                    highlights_a, highlights_b = [None if cells is None else group_highlights(*cells, kept_rows=kept)
+                                                  for cells, kept in zip(highlights, (positions_a, positions_b))]
+                    workbook.add_sheet(sheet_name('文件A数据', result['sheet'])).write_frame(
+                        df1.iloc[positions_a], [row_numbers_a[i] for i in positions_a], highlights_a)
+                    workbook.add_sheet(sheet_name('文件B数据', result['sheet'])).write_frame(
+                        df2.iloc[positions_b], [row_numbers_b[i] for i in positions_b], highlights_b)
+            
+            # 4. 差异详情（超过Excel最大行数的部分不写入）
+            differences = DiffRecords.concat([result['comparison']['differences'] for result in compared])
+            diff_sheet = workbook.add_sheet('差异详情')
+            if differences:
+                written = diff_sheet.write_rows(DIFFERENCE_FIELDS, differences.iter_rows())
+            else:
+                written = 0
+                diff_sheet.append(['说明'])
+                diff_sheet.append(['两个文件在指定范围内完全相同'])
+            
+            # 5. 行对齐等附加工作表（如新增行、删除行）
+            for result in compared:
+                for extra_name, sheet_df in result['comparison']['sheets'].items():
+                    workbook.add_sheet(sheet_name(extra_name, result['sheet'])).write_frame(sheet_df)
+            
+            overview_rows = [
+                ('基础文件名', pair['base_name']),
+                ('文件A', os.path.basename(pair['file_a'])),
+                ('文件B', os.path.basename(pair['file_b'])),
+                ('比较时间', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                ('比较行范围', self.range_text or '所有行'),
+                ('比较的工作表', ', '.join(result['sheet'] for result in compared)),
+                ('文件A行数', sum(len(result['df1']) for result in compared)),
+                ('文件A列数', max(len(result['df1'].columns) for result in compared)),
+                ('文件B行数', sum(len(result['df2']) for result in compared)),
+                ('文件B列数', max(len(result['df2'].columns) for result in compared)),
+                ('比较的行数', statistics['compared_rows']), ('比较的列数', statistics['compared_cols']),
+                ('不同单元格数', statistics['diff_count']), ('相似度(%)', f"{statistics['similarity']:.2f}%"),
+                ('读取引擎', statistics['read_engines']), ('比较模式', '内存'),
+                ('哈希预检跳过行数', statistics['skipped_rows']),
+                ('原始数据工作表', self.data_sheet_overview()),
+            ] + self.compare_rule_overview()
+            for result in compared:
+                prefix = f"{result['sheet']}: " if multiple else ''
+                overview_rows += [(prefix + item, value) for item, value in result['comparison']['overview']]
+            overview_rows += self.unmatched_sheet_overview(statistics['sheet_statistics'])
+            if written < len(differences):
+                overview_rows.append(('说明', f"差异数超过Excel最大行数，差异详情仅包含前 {written} 条"))
+            overview_sheet.append(['项目', '值'])
+            for item, value in overview_rows:
+                overview_sheet.append([item, to_cell_value(value)])
+    
+    def data_sheet_overview(self):
+        """概览中的原始数据工作表输出方式"""
+        label = DATA_SHEET_LABELS[self.data_sheets]
+        if self.highlight_diffs and self.data_sheets != 'none':
+            label += "（差异单元格标黄，新增/删除的行标红）"
+        return label
+    
+    def compare_rule_overview(self):
+        """概览中的列对齐方式、值比较方式和比较规则"""
+        rows = [('列对齐方式', self.columns.describe()), ('值比较方式', COMPARE_MODE_LABELS[self.compare_mode])]
+        if self.rules is not None:
+            rows.append(('比较规则', self.rules.describe()))
+        return rows
+    
+    def unmatched_sheet_overview(self, entries):
+        """概览中列出只在一个文件中存在的工作表"""
+        rows = []
+        for status, item in ((SHEET_ONLY_A, '仅文件A有的工作表'), (SHEET_ONLY_B, '仅文件B有的工作表')):
+            names = [entry['sheet'] for entry in entries if entry['status'] == status]
+            if names:
+                rows.append((item, ', '.join(names)))
+        return rows
+    
+    def format_cache_usage(self):
+        """统计本批次结果缓存的命中情况"""
+        if self.cache is None:
+            return '未启用'
+        hits = sum(1 for result in self.batch_results if result.get('cache_hit'))
+        misses = len(self.batch_results) - hits
+        return f"命中 {hits} 对 / 未命中 {misses} 对"
+    
+    def format_sheet_cache_usage(self):
+        """统计本批次解析缓存的命中情况（按文件计，复用结果缓存和流式比较的文件对不读取工作表，不计入）"""
+        if self.sheet_cache is None:
+            return '未启用'
+        read = [result['sheet_cache_hits'] for result in self.batch_results
+                if 'sheet_cache_hits' in result and not result.get('cache_hit')]
+        hits = sum(read)
+        return f"命中 {hits} 个文件 / 未命中 {2 * len(read) - hits} 个文件"
+    
+    def format_difference_detail(self):
+        """说明本批次差异明细的完整程度和导出文件"""
+        total = sum(result['statistics']['diff_count'] for result in self.batch_results)
+        text = f"共 {total} 条"
+        if total > EXCEL_MAX_ROWS - 1:
+            text += f"，\"所有差异详情\"工作表仅包含前 {EXCEL_MAX_ROWS - 1} 条"
+        if self.export_format:
+            text += f"，完整明细已导出为 {DIFF_EXPORT_NAME}.{self.export_format}"
+        return text
+    
+    def generate_batch_summary(self, batch_dir, file_pairs, successful, failed, summary):
+        """生成批量比较汇总报告（summary 为逐对累积的 BatchSummary）"""
+        summary_path = os.path.join(batch_dir, "批量比较汇总.xlsx")
+        summary_rows = [
+            ('比较时间', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+            ('批量状态', '已取消（部分结果）' if self.cancelled else '已完成'),
+            ('总文件对数', len(file_pairs)),
+            ('成功比较', successful),
+            ('失败比较', failed),
+            ('成功率(%)', f"{(successful / len(file_pairs) * 100):.1f}%" if file_pairs else "0%"),
+            ('比较行范围', self.range_text or '所有行'),
+            ('列对齐方式', self.columns.describe()),
+            ('结果缓存', self.format_cache_usage()),
+            ('解析缓存', self.format_sheet_cache_usage()),
+            ('比较耗时(s)', round(time.perf_counter() - self.batch_started, 3)),
+            ('结果目录', batch_dir),
+            ('差异明细', self.format_difference_detail()),
+        ]
+        summary.write(summary_path, summary_rows, self.report_engine)
+        
+        self.log_message(f"详细汇总报告已生成：{summary_path}")
+    
+    def write_timing_trace(self, batch_dir, file_pairs, summary_seconds):
+        """将本批次各文件对的耗时记录保存为 JSON（阶段耗时、吞吐量和峰值内存）"""
+        pairs = [dict(base_name=result['pair']['base_name'], file_a=result['pair']['file_a'],
+                      file_b=result['pair']['file_b'], **result['timing'])
+                 for result in self.batch_results if 'timing' in result]
+        trace = {
+            'batch_dir': batch_dir,
+            'total_pairs': len(file_pairs),
+            'workers': self.workers,
+            'streaming': self.streaming,
+            'read_engine': self.read_engine,
+            'elapsed_seconds': time.perf_counter() - self.batch_started,
+            'summary_seconds': summary_seconds,
+            'totals': combine_timings(pairs),
+            'pairs': pairs,
+        }
+        trace_path = os.path.join(batch_dir, TIMING_TRACE_NAME)
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False, indent=2)
+        self.log_message(f"耗时记录已保存：{trace_path}")
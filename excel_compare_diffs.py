@@ -0,0 +1,171 @@
+"""差异记录的紧凑列式存储
+
+每条差异只占用几个定长数组元素：原始行号、列位置和值位置为 int32，差异类型为 uint8 编码。
+单元格值不复制，而是引用比较时的列数据（pandas.Series），
+只在写报告、导出或汇总时才逐块取值并格式化为"差异详情"的行。
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# 差异记录的字段
+DIFFERENCE_FIELDS = ['工作表', '原始行号', '列号', '列名', '文件A值', '文件B值', '差异类型']
+
+# 单元格差异类型（按编码顺序排列，编码0为"值不同"）
+DIFFERENCE_TYPES = ("值不同", "文件A为空值", "文件B为空值", "文件A为空字符串", "文件B为空字符串")
+
+# 整行差异类型（按关键列或按内容差异对齐时）：仅在文件B中存在的行、仅在文件A中存在的行
+ROW_ADDED = "文件B新增行"
+ROW_REMOVED = "文件B删除行"
+
+# 全部差异类型，差异记录中保存的是在此元组中的编码
+DIFF_TYPE_NAMES = DIFFERENCE_TYPES + (ROW_ADDED, ROW_REMOVED)
+ROW_DIFF_CODES = (DIFF_TYPE_NAMES.index(ROW_ADDED), DIFF_TYPE_NAMES.index(ROW_REMOVED))
+
+# 整行差异中缺失一侧显示的值
+MISSING_ROW = '[无此行]'
+
+# 逐块取值格式化时每块的记录数
+MATERIALIZE_CHUNK_ROWS = 10000
+
+
+def format_export_value(value):
+    """格式化导出值"""
+    if pd.isna(value):
+        return "[空值]"
+    elif str(value).strip() == "":
+        return "[空字符串]"
+    else:
+        return value
+
+
+class DiffBlock:
+    """一组引用同一份列数据的差异记录，按输出顺序排列
+
+    第 k 条记录的值为 columns_a[cols[k]].iat[positions[k]]（文件B同理），列名为 column_names[cols[k]]，
+    sheet 为差异所在的工作表名。
+    """
+
+    def __init__(self, rows, cols, positions, types, columns_a, columns_b, column_names, sheet=None):
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.cols = np.asarray(cols, dtype=np.int32)
+        self.positions = np.asarray(positions, dtype=np.int32)
+        self.types = np.asarray(types, dtype=np.uint8)
+        self.columns_a = list(columns_a)
+        self.columns_b = list(columns_b)
+        self.column_names = list(column_names)
+        self.sheet = sheet
+
+    def __len__(self):
+        return len(self.rows)
+
+    def compact(self):
+        """只保留被引用的值（按列取出后重新编号），不再引用完整的列数据"""
+        positions = np.empty_like(self.positions)
+        columns_a = [None] * len(self.column_names)
+        columns_b = [None] * len(self.column_names)
+        for j in np.unique(self.cols).tolist():
+            mask = self.cols == j
+            used, positions[mask] = np.unique(self.positions[mask], return_inverse=True)
+            columns_a[j] = self.columns_a[j].iloc[used].reset_index(drop=True)
+            columns_b[j] = self.columns_b[j].iloc[used].reset_index(drop=True)
+        return DiffBlock(self.rows, self.cols, positions, self.types, columns_a, columns_b, self.column_names,
+                         self.sheet)
+
+    def iter_rows(self):
+        """逐块取值，按 DIFFERENCE_FIELDS 的顺序生成每条差异"""
+        for start in range(0, len(self), MATERIALIZE_CHUNK_ROWS):
+            stop = start + MATERIALIZE_CHUNK_ROWS
+            cols = self.cols[start:stop]
+            positions = self.positions[start:stop]
+            values_a = np.empty(len(cols), dtype=object)
+            values_b = np.empty(len(cols), dtype=object)
+            for j in np.unique(cols).tolist():
+                selected = np.flatnonzero(cols == j)
+                values_a[selected] = list(self.columns_a[j].iloc[positions[selected]])
+                values_b[selected] = list(self.columns_b[j].iloc[positions[selected]])
+
+            types = self.types[start:stop].tolist()
+            for row, j, value_a, value_b, code in zip(self.rows[start:stop].tolist(), cols.tolist(),
+                                                      values_a, values_b, types):
+                if code in ROW_DIFF_CODES:
+                    # 整行差异没有列号，值为格式化后的整行文本
+                    yield self.sheet, row, None, self.column_names[j], value_a, value_b, DIFF_TYPE_NAMES[code]
+                else:
+                    yield (self.sheet, row, j + 1, self.column_names[j], format_export_value(value_a),
+                           format_export_value(value_b), DIFF_TYPE_NAMES[code])
+
+
+class DiffRecords:
+    """一对文件的全部差异记录，由若干 DiffBlock 按顺序组成
+
+    序列化（缓存、工作进程返回结果）时自动压缩为只包含差异值的副本。
+    """
+
+    def __init__(self, blocks=()):
+        self.blocks = [block for block in blocks if len(block)]
+
+    @classmethod
+    def from_cells(cls, rows, cols, positions, types, columns_a, columns_b, column_names):
+        """由单元格差异的位置和类型编码创建，columns_a/columns_b 为比较的列（不复制）"""
+        return cls([DiffBlock(rows, cols, positions, types, columns_a, columns_b, column_names)])
+
+    @classmethod
+    def from_rows(cls, rows, row_label, row_texts, diff_type):
+        """创建仅在一个文件中存在的整行差异，row_texts 为每行的文本，缺失一侧显示为"[无此行]" """
+        texts = pd.Series(list(row_texts), dtype=object)
+        missing = pd.Series([MISSING_ROW] * len(texts), dtype=object)
+        column_a, column_b = (texts, missing) if diff_type == ROW_REMOVED else (missing, texts)
+        return cls([DiffBlock(rows, np.zeros(len(texts)), np.arange(len(texts)),
+                              np.full(len(texts), DIFF_TYPE_NAMES.index(diff_type)),
+                              [column_a], [column_b], [row_label])])
+
+    @classmethod
+    def concat(cls, parts):
+        """按顺序拼接多组差异记录"""
+        return cls([block for part in parts for block in part.blocks])
+
+    def __len__(self):
+        return sum(len(block) for block in self.blocks)
+
+    @property
+    def rows(self):
+        """全部差异的原始行号数组"""
+        if not self.blocks:
+            return np.array([], dtype=np.int32)
+        return np.concatenate([block.rows for block in self.blocks])
+
+    def cell_coordinates(self):
+        """返回单元格差异（不含整行差异）的 (原始行号数组, 列位置数组)"""
+        rows = [block.rows[~np.isin(block.types, ROW_DIFF_CODES)] for block in self.blocks]
+        cols = [block.cols[~np.isin(block.types, ROW_DIFF_CODES)] for block in self.blocks]
+        if not rows:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def column_counts(self):
+        """按列名统计差异数，按列名首次出现的顺序排列"""
+        counts = Counter()
+        for block in self.blocks:
+            used, first, block_counts = np.unique(block.cols, return_index=True, return_counts=True)
+            for k in np.argsort(first).tolist():
+                counts[block.column_names[used[k]]] += int(block_counts[k])
+        return counts
+
+    def set_sheet(self, sheet):
+        """记录全部差异所在的工作表名"""
+        for block in self.blocks:
+            block.sheet = sheet
+
+    def compact(self):
+        """返回只包含差异值副本的差异记录，不再引用比较时的完整列数据"""
+        return DiffRecords([block.compact() for block in self.blocks])
+
+    def iter_rows(self):
+        """按 DIFFERENCE_FIELDS 的顺序逐条生成差异（值已格式化）"""
+        for block in self.blocks:
+            yield from block.iter_rows()
+
+    def __getstate__(self):
+        return {'blocks': [block.compact() for block in self.blocks]}
@@ -0,0 +1,169 @@
+"""机器可读的比较结果导出：批量比较过程中逐对追加写入差异明细和文件对统计
+
+支持的格式:
+    parquet  列式存储，需要安装 pyarrow（可选依赖）
+    csv      UTF-8 编码，首行为字段名
+    jsonl    每行一个 JSON 对象
+
+字段与汇总报告的"所有差异详情"/"文件对概览"工作表一致，不受Excel最大行数限制。
+每对文件完成后立即写入，内存占用只与单对文件的差异数有关。
+"""
+import csv
+import importlib.util
+import json
+import os
+from itertools import islice
+
+from excel_compare_report import to_cell_value
+
+# 可选的导出格式
+EXPORT_FORMATS = ('parquet', 'csv', 'jsonl')
+
+# 差异明细的字段和类型（与"所有差异详情"工作表一致，单元格值统一导出为文本）
+DIFF_EXPORT_SCHEMA = [
+    ('文件对', 'string'),
+    ('文件A', 'string'),
+    ('文件B', 'string'),
+    ('工作表', 'string'),
+    ('原始行号', 'int64'),
+    ('列号', 'int64'),
+    ('列名', 'string'),
+    ('文件A值', 'string'),
+    ('文件B值', 'string'),
+    ('差异类型', 'string'),
+]
+
+# 文件对统计的字段和类型（与"文件对概览"工作表一致，另加读取引擎和错误信息）
+PAIR_EXPORT_SCHEMA = [
+    ('基础名称', 'string'),
+    ('文件A', 'string'),
+    ('文件B', 'string'),
+    ('比较行数', 'int64'),
+    ('比较列数', 'int64'),
+    ('总单元格数', 'int64'),
+    ('差异单元格数', 'int64'),
+    ('相似度(%)', 'float64'),
+    ('预检跳过行数', 'int64'),
+    ('新增行数', 'int64'),
+    ('删除行数', 'int64'),
+    ('新增列数', 'int64'),
+    ('删除列数', 'int64'),
+    ('读取引擎', 'string'),
+    ('状态', 'string'),
+    ('报告文件', 'string'),
+    ('错误信息', 'string'),
+]
+
+# 导出文件的基础名称
+DIFF_EXPORT_NAME = '差异明细'
+PAIR_EXPORT_NAME = '文件对统计'
+
+# Parquet 每个行组的最大行数
+PARQUET_BATCH_ROWS = 100000
+
+
+def export_available(export_format):
+    """检查导出格式的依赖是否已安装"""
+    if export_format == 'parquet':
+        return importlib.util.find_spec('pyarrow') is not None
+    return export_format in EXPORT_FORMATS
+
+
+def to_text(value):
+    """把单元格值转换为导出用的文本，空值导出为空"""
+    value = to_cell_value(value)
+    return None if value is None else str(value)
+
+
+class TableWriter:
+    """按固定字段逐批追加写入一个 Parquet/CSV/JSONL 文件"""
+
+    def __init__(self, path, export_format, schema):
+        self.path = path
+        self.export_format = export_format
+        self.fields = [name for name, _ in schema]
+        if export_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self.arrow_schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in schema])
+            self.writer = pq.ParquetWriter(path, self.arrow_schema)
+        elif export_format == 'csv':
+            self.file = open(path, 'w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.fields)
+        elif export_format == 'jsonl':
+            self.file = open(path, 'w', encoding='utf-8')
+        else:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+
+    def write(self, rows):
+        """追加若干行，每行是与字段顺序一致的值列表"""
+        if self.export_format == 'parquet':
+            import pyarrow as pa
+
+            for start in range(0, len(rows), PARQUET_BATCH_ROWS):
+                batch = rows[start:start + PARQUET_BATCH_ROWS]
+                columns = {name: [row[j] for row in batch] for j, name in enumerate(self.fields)}
+                self.writer.write_table(pa.Table.from_pydict(columns, schema=self.arrow_schema))
+        elif self.export_format == 'csv':
+            self.writer.writerows(rows)
+        else:
+            for row in rows:
+                self.file.write(json.dumps(dict(zip(self.fields, row)), ensure_ascii=False) + '\n')
+
+    def close(self):
+        """写出并关闭文件"""
+        if self.export_format == 'parquet':
+            self.writer.close()
+        else:
+            self.file.close()
+
+
+class ResultExporter:
+    """在批量比较过程中把每对文件的差异明细和统计信息追加写入导出文件"""
+
+    def __init__(self, batch_dir, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+        self.diff_path = os.path.join(batch_dir, f"{DIFF_EXPORT_NAME}.{export_format}")
+        self.pair_path = os.path.join(batch_dir, f"{PAIR_EXPORT_NAME}.{export_format}")
+        self.diff_writer = TableWriter(self.diff_path, export_format, DIFF_EXPORT_SCHEMA)
+        self.pair_writer = TableWriter(self.pair_path, export_format, PAIR_EXPORT_SCHEMA)
+
+    def write_result(self, pair, result, error=None):
+        """写入一对文件的比较结果，result 为None时记录为比较失败"""
+        file_a = os.path.basename(pair['file_a'])
+        file_b = os.path.basename(pair['file_b'])
+        if not result:
+            self.pair_writer.write([[pair['base_name'], file_a, file_b] + [None] * 11
+                                    + ['比较失败', None, error]])
+            return
+
+        stats = result['statistics']
+        self.pair_writer.write([[to_cell_value(value) for value in [
+            pair['base_name'], file_a, file_b,
+            stats['compared_rows'], stats['compared_cols'], stats['total_cells'], stats['diff_count'],
+            round(stats['similarity'], 4), stats['skipped_rows'],
+            stats.get('added_rows', 0), stats.get('removed_rows', 0),
+            stats.get('added_cols', 0), stats.get('removed_cols', 0), stats.get('read_engines'),
+            '有差异' if stats['diff_count'] > 0 else '完全相同',
+            f"{pair['base_name']}_比较报告.xlsx", None
+        ]]])
+        # 差异记录逐块取值，避免一次性生成全部行
+        diff_rows = result['differences'].iter_rows()
+        while True:
+            rows = [[
+                pair['base_name'], file_a, file_b, sheet,
+                to_cell_value(row_number), to_cell_value(column), str(column_name),
+                to_text(value_a), to_text(value_b), diff_type
+            ] for sheet, row_number, column, column_name, value_a, value_b, diff_type
+                in islice(diff_rows, PARQUET_BATCH_ROWS)]
+            if not rows:
+                break
+            self.diff_writer.write(rows)
+
+    def close(self):
+        """关闭导出文件"""
+        self.diff_writer.close()
+        self.pair_writer.close()
@@ -0,0 +1,180 @@
+"""文件发现和配对：展开目录（可递归）、通配符和文件路径，按文件名后缀把文件A和文件B配对
+
+配对后缀为 (文件A后缀, 文件B后缀)，默认 "-A"/"-B"，可以指定多组（如 "-A:-B,_old:_new"），
+按顺序使用第一组匹配的后缀。PairingIndex 按文件增量维护配对结果，添加文件时只解析新增的文件名。
+"""
+import glob
+import os
+
+# 支持的Excel文件扩展名
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# 默认的配对后缀（文件A后缀, 文件B后缀）
+DEFAULT_PAIR_SUFFIXES = (('-A', '-B'),)
+DEFAULT_PAIR_SUFFIXES_TEXT = '-A:-B'
+
+# 未匹配任何后缀的文件类型
+UNKNOWN_TYPE = 'Unknown'
+
+
+def is_excel_file(path):
+    """判断是否为Excel文件（忽略Excel打开文件时生成的 ~$ 临时文件）"""
+    filename = os.path.basename(path)
+    return filename.lower().endswith(EXCEL_EXTENSIONS) and not filename.startswith('~$')
+
+
+def parse_pair_suffixes(text):
+    """解析配对后缀文本 "A后缀:B后缀[,A后缀:B后缀...]"，返回 ((A后缀, B后缀), ...)，留空时返回默认后缀"""
+    text = (text or '').strip()
+    if not text:
+        return DEFAULT_PAIR_SUFFIXES
+
+    suffixes = []
+    for part in text.split(','):
+        suffix_a, sep, suffix_b = (value.strip() for value in part.partition(':'))
+        if not sep or not suffix_a or not suffix_b or suffix_a == suffix_b:
+            raise ValueError(f"配对后缀格式错误: '{part.strip()}'（格式为 'A后缀:B后缀'，多组用逗号分隔，"
+                             f"如 '-A:-B,_old:_new'）")
+        suffixes.append((suffix_a, suffix_b))
+    return tuple(suffixes)
+
+
+def format_pair_suffixes(suffixes):
+    """把配对后缀格式化为 "基础名称-A.xlsx 和 基础名称-B.xlsx" 形式的说明"""
+    return '；'.join(f"基础名称{suffix_a}.xlsx 和 基础名称{suffix_b}.xlsx" for suffix_a, suffix_b in suffixes)
+
+
+def extract_base_name_and_type(filename, suffixes=DEFAULT_PAIR_SUFFIXES):
+    """提取文件的基础名称和类型（A、B或Unknown）"""
+    # 移除文件扩展名
+    name_without_ext = os.path.splitext(filename)[0]
+
+    # 按顺序检查是否以某组后缀结尾
+    for suffix_a, suffix_b in suffixes:
+        if name_without_ext.endswith(suffix_a):
+            return name_without_ext[:-len(suffix_a)], 'A'
+        if name_without_ext.endswith(suffix_b):
+            return name_without_ext[:-len(suffix_b)], 'B'
+    return name_without_ext, UNKNOWN_TYPE
+
+
+class PairingIndex:
+    """增量维护的文件配对索引
+
+    paths 按添加顺序记录每个文件的 (基础名称, 类型)；groups 为按基础名称分组的 {类型: 文件路径}
+    （同一基础名称和类型有多个文件时以最后添加的为准，与 find_file_pairs 相同）；
+    members 记录每个基础名称下的全部文件，用于在配对状态变化时找出需要刷新的文件；
+    replaced 为被后添加的同名文件替换、不参与比较的文件（如递归扫描时不同子目录中的同名文件）。
+    """
+
+    def __init__(self, suffixes=DEFAULT_PAIR_SUFFIXES):
+        self.suffixes = tuple(suffixes)
+        self.paths = {}
+        self.groups = {}
+        self.members = {}
+        self.replaced = []
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, file_paths):
+        """添加文件（已添加的跳过），返回 (新增的文件路径列表, 配对状态可能变化的基础名称集合)"""
+        added, changed = [], set()
+        for file_path in file_paths:
+            if file_path in self.paths:
+                continue
+            base_name, file_type = extract_base_name_and_type(os.path.basename(file_path), self.suffixes)
+            self.paths[file_path] = (base_name, file_type)
+            files = self.groups.setdefault(base_name, {})
+            if file_type != UNKNOWN_TYPE and file_type in files:
+                self.replaced.append(files[file_type])
+            files[file_type] = file_path
+            self.members.setdefault(base_name, []).append(file_path)
+            added.append(file_path)
+            changed.add(base_name)
+        return added, changed
+
+    def clear(self):
+        """清空索引"""
+        self.paths.clear()
+        self.groups.clear()
+        self.members.clear()
+        self.replaced.clear()
+
+    def pairs(self):
+        """返回配对列表（按基础名称首次出现的顺序）"""
+        return [{'base_name': base_name, 'file_a': files['A'], 'file_b': files['B']}
+                for base_name, files in self.groups.items() if 'A' in files and 'B' in files]
+
+    def files_of(self, base_names):
+        """返回这些基础名称下的全部文件路径"""
+        return [file_path for base_name in base_names for file_path in self.members.get(base_name, ())]
+
+    def describe(self, file_path):
+        """返回文件在列表中显示的 (文件名, 类型, 状态, 配对文件)"""
+        base_name, file_type = self.paths[file_path]
+        files = self.groups[base_name]
+        if file_type != UNKNOWN_TYPE and files[file_type] != file_path:
+            status = "⚠️ 同名文件"
+            pair_file = f"已被 {files[file_type]} 替换"
+        elif 'A' in files and 'B' in files:
+            status = "✅ 已配对"
+            if file_type == 'A':
+                pair_file = os.path.basename(files['B'])
+            elif file_type == 'B':
+                pair_file = os.path.basename(files['A'])
+            else:
+                pair_file = "无配对"
+        else:
+            status = "❌ 未配对"
+            pair_file = "无配对"
+        return os.path.basename(file_path), file_type, status, pair_file
+
+
+def find_file_pairs(file_paths, suffixes=DEFAULT_PAIR_SUFFIXES):
+    """查找文件配对，返回 (配对列表, 按基础名称分组的文件字典)"""
+    index = PairingIndex(suffixes)
+    index.add(file_paths)
+    return index.pairs(), index.groups
+
+
+def format_replaced_files(replaced, limit=5):
+    """说明被同名文件替换、不参与比较的文件（最多列出 limit 个）"""
+    names = ', '.join(replaced[:limit]) + (f" 等 {len(replaced)} 个" if len(replaced) > limit else '')
+    return f"⚠️ 以下文件与其他文件的基础名称和类型相同，只比较最后添加的文件：{names}"
+
+
+def scan_excel_files(directory, recursive=False):
+    """列出目录中的Excel文件（按路径排序），recursive 为True时包括所有子目录"""
+    if not recursive:
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if is_excel_file(name) and os.path.isfile(os.path.join(directory, name))]
+
+    files = []
+    for root, dirs, names in os.walk(directory):
+        # 按名称顺序遍历子目录，跳过隐藏目录
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        files.extend(os.path.join(root, name) for name in sorted(names) if is_excel_file(name))
+    return files
+
+
+def collect_excel_files(inputs, recursive=False):
+    """展开目录、通配符和文件路径，返回去重后的Excel文件列表（绝对路径，保持输入顺序）
+
+    recursive 为True时递归扫描目录，通配符中的 ** 匹配任意层子目录。
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = scan_excel_files(item, recursive)
+        elif glob.has_magic(item):
+            candidates = sorted(glob.glob(item, recursive=recursive))
+        else:
+            candidates = [item]
+
+        for path in candidates:
+            if os.path.isfile(path) and is_excel_file(path):
+                files.append(os.path.abspath(path))
+
+    # 去重并保持输入顺序
+    return list(dict.fromkeys(files))
@@ -0,0 +1,116 @@
+"""行范围：解析 "1-100"、"1,3,4,9" 以及混合写法 "1-100,250,900-950"
+
+行号为数据行号（1基，不含表头）。比较时按输入顺序逐段选取；
+读取时只需要各段的并集（升序），用于把行范围下推到读取引擎，只解析需要的行。
+行范围在批量比较开始前编译为 RowRange 并校验一次，之后所有文件对共用，不展开为行号列表。
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# 行范围中的一段：单个行号或 起始行-结束行
+RANGE_PART = re.compile(r'(\d+)\s*(?:-\s*(\d+))?')
+
+
+def parse_row_ranges(range_text):
+    """解析行范围文本，返回 [(起始行, 结束行)] 列表（含两端，按输入顺序），留空时返回None"""
+    range_text = (range_text or '').strip()
+    if not range_text:
+        return None
+
+    ranges = []
+    for part in range_text.split(','):
+        part = part.strip()
+        match = RANGE_PART.fullmatch(part)
+        if match is None:
+            raise ValueError(f"行范围格式错误: '{part}'（支持 '1-100'、'1,3,4,9' 或 '1-100,250,900-950'）")
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        if start < 1 or end < start:
+            raise ValueError(f"行范围无效: '{part}'（行号从1开始，起始行不能大于结束行）")
+        ranges.append((start, end))
+    return ranges
+
+
+def merge_row_ranges(ranges):
+    """合并重叠或相邻的段，返回按起始行升序排列的互不相交的段"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RowRange:
+    """编译后的行范围（不可变）：只保存各段的起止行号，按每个文件实际读到的行裁剪时每段只需 O(1)"""
+
+    __slots__ = ('text', 'segments', 'merged', 'overlapping')
+
+    def __init__(self, range_text=''):
+        text = (range_text or '').strip()
+        segments = tuple(parse_row_ranges(text) or ())
+        merged = tuple(merge_row_ranges(segments))
+        # 原始文本、按输入顺序的段、合并后升序互不相交的段、各段之间是否有重叠（重叠时需要去重）
+        object.__setattr__(self, 'text', text)
+        object.__setattr__(self, 'segments', segments)
+        object.__setattr__(self, 'merged', merged)
+        object.__setattr__(self, 'overlapping', segment_rows(segments) != segment_rows(merged))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RowRange 不可修改")
+
+    @property
+    def all_rows(self):
+        """是否比较所有行（行范围留空）"""
+        return not self.segments
+
+    def read_rows(self):
+        """返回读取时需要解析的行号（升序、不重复），留空时返回None表示读取所有行
+
+        合并后只有一段时为 range，否则为 NumPy 数组。
+        """
+        if self.all_rows:
+            return None
+        if len(self.merged) == 1:
+            start, end = self.merged[0]
+            return range(start, end + 1)
+        return np.concatenate([np.arange(start, end + 1) for start, end in self.merged])
+
+    def iter_read_rows(self):
+        """按升序逐个生成读取时需要解析的行号，不展开为列表"""
+        for start, end in self.merged:
+            yield from range(start, end + 1)
+
+    def clip(self, start, stop):
+        """返回行范围中落在 [start, stop) 内的行号数组（按输入顺序，重复的行只保留第一次出现）"""
+        parts = [np.arange(max(first, start), min(last + 1, stop)) for first, last in self.segments
+                 if first < stop and last >= start]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate(parts)
+        if self.overlapping:
+            _, first_positions = np.unique(rows, return_index=True)
+            rows = rows[np.sort(first_positions)]
+        return rows
+
+    def positions(self, index):
+        """返回行范围内的行在以数据行号为索引的 index 中的0基位置数组（按输入顺序，不存在的行被跳过）
+
+        行范围留空时返回全部位置。
+        """
+        if self.all_rows:
+            return np.arange(len(index))
+        if len(index) == 0:
+            return np.empty(0, dtype=np.intp)
+        if isinstance(index, pd.RangeIndex) and index.step == 1:
+            return self.clip(index.start, index.stop) - index.start
+        positions = index.get_indexer(self.clip(index.min(), index.max() + 1))
+        return positions[positions >= 0]
+
+
+def segment_rows(segments):
+    """各段包含的行数之和"""
+    return sum(end - start + 1 for start, end in segments)
@@ -0,0 +1,185 @@
+"""Excel 读取后端：按文件大小和扩展名自动选择解析引擎
+
+支持的引擎:
+    openpyxl           pandas 默认引擎，兼容性最好
+    openpyxl-readonly  openpyxl 只读模式逐行读取单元格值，内存占用更低
+    calamine           基于 Rust 的 python-calamine，速度最快（可选依赖）
+    xlrd               旧版 .xls 文件（可选依赖）
+"""
+import importlib.util
+import os
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# 可选的读取引擎，auto 表示按文件自动选择
+READ_ENGINES = ('auto', 'openpyxl', 'openpyxl-readonly', 'calamine', 'xlrd')
+
+# 引擎对应的Python模块，用于检测可选依赖是否已安装
+ENGINE_MODULES = {
+    'openpyxl': 'openpyxl',
+    'openpyxl-readonly': 'openpyxl',
+    'calamine': 'python_calamine',
+    'xlrd': 'xlrd',
+}
+
+# 超过该大小的 .xlsx 文件视为大文件，优先使用更快或更省内存的引擎
+LARGE_FILE_BYTES = 5 * 1024 * 1024
+
+# 行范围选中的行少于需要转换的行（第1行到最后一行）的该比例时视为稀疏，auto 使用只读模式只转换选中的行
+SPARSE_ROWS_RATIO = 0.5
+
+
+def engine_available(engine):
+    """检查读取引擎的依赖是否已安装"""
+    return importlib.util.find_spec(ENGINE_MODULES[engine]) is not None
+
+
+def sparse_rows(rows):
+    """行范围（升序的数据行号）是否稀疏：pandas 引擎总是转换第1行到最后一行，选中的行只占其中一小部分"""
+    return rows is not None and len(rows) > 0 and len(rows) < SPARSE_ROWS_RATIO * rows[-1]
+
+
+def choose_engine(path, engine='auto', rows=None):
+    """根据文件扩展名、大小和要读取的行（升序的数据行号，None为全部行）选择读取引擎
+
+    小文件默认使用 openpyxl；只读取稀疏的行（如 "1,50000"）时使用 openpyxl 只读模式，只转换选中的行。
+    大文件优先使用 calamine，即使需要解析从第一行到最后一行的整个区间也比只读模式逐行读取快。
+    """
+    if engine != 'auto':
+        if engine not in ENGINE_MODULES:
+            raise ValueError(f"不支持的读取引擎: {engine}")
+        return engine
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.xls':
+        # 旧版 .xls 文件 openpyxl 无法读取
+        return 'calamine' if engine_available('calamine') else 'xlrd'
+
+    if os.path.getsize(path) >= LARGE_FILE_BYTES:
+        return 'calamine' if engine_available('calamine') else 'openpyxl-readonly'
+    if sparse_rows(rows):
+        return 'openpyxl-readonly'
+    return 'openpyxl'
+
+
+def read_sheets(path, engine='auto', sheet_names=None, rows=None):
+    """只打开一次文件读取多个工作表，返回 ({工作表名: DataFrame}, 实际使用的引擎)
+
+    sheet_names 为None时读取全部工作表，否则只读取其中在文件中存在的工作表；结果按文件中的顺序排列。
+    rows 为升序的数据行号（1基，不含表头，range 或数组）时只解析这些行：pandas 引擎通过 skiprows/nrows
+    读取从第一行到最后一行的连续区间（这些引擎总是转换到 skiprows + nrows 为止的全部行，离散行号分多个窗口读取
+    会重复转换前面的行，因此按一个区间读取），openpyxl 只读模式只转换 rows 中的行；
+    engine 为 auto 且行范围稀疏时按 choose_engine 的规则改用只读模式。
+    返回的DataFrame以数据行号为索引。
+    """
+    engine = choose_engine(path, engine, rows)
+    if engine == 'openpyxl-readonly':
+        return read_sheets_readonly(path, sheet_names, rows), engine
+    if rows is None:
+        options = {}
+    else:
+        # 可调用的 skiprows 与 nrows 同时使用时 pandas 会漏读行，离散行号也按连续区间读取
+        options = {'skiprows': range(1, rows[0]), 'nrows': rows[-1] - rows[0] + 1}
+    with pd.ExcelFile(path, engine=engine) as workbook:
+        sheets = {name: workbook.parse(name, **options) for name in workbook.sheet_names
+                  if sheet_names is None or name in sheet_names}
+    first_row = 1 if rows is None else rows[0]
+    for df in sheets.values():
+        df.index = pd.RangeIndex(first_row, first_row + len(df))
+    return sheets, engine
+
+
+def convert_cell_value(value):
+    """按 pandas openpyxl 引擎的规则转换单元格值"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def open_workbook_readonly(path):
+    """以只读模式打开 .xlsx 文件，调用方负责关闭"""
+    from openpyxl import load_workbook
+
+    if os.path.splitext(path)[1].lower() == '.xls':
+        raise ValueError("逐行读取仅支持 .xlsx 文件")
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+def iter_worksheet_rows(sheet, rows=None):
+    """逐行生成只读工作表的单元格值列表（去除行尾空单元格和表尾空行），内存占用与行数无关
+
+    rows 为升序的数据行号（1基，不含表头）时只生成表头和这些行，其余行不转换单元格值，读到最后一行即停止。
+    """
+    if rows is None:
+        sheet_rows = sheet.iter_rows(values_only=True)
+    else:
+        wanted = rows if isinstance(rows, range) else set(map(int, rows))
+        # 表头为第0行，数据行号与 enumerate 的序号一致
+        all_rows = sheet.iter_rows(max_row=rows[-1] + 1, values_only=True)
+        sheet_rows = (row for row_number, row in enumerate(all_rows) if row_number == 0 or row_number in wanted)
+
+    # 连续空行暂不输出，遇到后续非空行时再补齐，从而去掉表尾空行
+    pending_empty_rows = 0
+    for row in sheet_rows:
+        values = [convert_cell_value(value) for value in row]
+        # 去掉行尾空单元格
+        while values and values[-1] == '':
+            values.pop()
+        if not values:
+            pending_empty_rows += 1
+            continue
+        for _ in range(pending_empty_rows):
+            yield []
+        pending_empty_rows = 0
+        yield values
+
+
+def parse_header(header_row):
+    """解析表头行，返回与 pd.read_excel 一致的列名（空列名为 Unnamed: n，重复列名加后缀）"""
+    parser = TextParser([header_row], header=0, skip_blank_lines=False)
+    try:
+        return list(parser.read().columns)
+    finally:
+        parser.close()
+
+
+def rows_to_frame(rows, columns):
+    """将一批数据行按 pd.read_excel 的规则转换为DataFrame（空值识别和类型推断）"""
+    width = len(columns)
+    data = [(row + [''] * (width - len(row)))[:width] for row in rows]
+    parser = TextParser(data, header=None, names=columns, skip_blank_lines=False)
+    try:
+        return parser.read()
+    finally:
+        parser.close()
+
+
+def read_sheets_readonly(path, sheet_names=None, rows=None):
+    """使用 openpyxl 只读模式读取多个工作表（只打开一次文件），返回以数据行号为索引的 {工作表名: DataFrame}"""
+    workbook = open_workbook_readonly(path)
+    try:
+        sheets = {sheet.title: rows_to_sheet_frame(list(iter_worksheet_rows(sheet, rows)))
+                  for sheet in workbook.worksheets if sheet_names is None or sheet.title in sheet_names}
+    finally:
+        workbook.close()
+    for df in sheets.values():
+        df.index = pd.RangeIndex(1, len(df) + 1) if rows is None else pd.Index(rows[:len(df)])
+    return sheets
+
+
+def rows_to_sheet_frame(data):
+    """将整个工作表的行（首行为表头）按 pd.read_excel 的规则转换为DataFrame"""
+    if not data:
+        return pd.DataFrame()
+    max_width = max(len(row) for row in data)
+    data = [row + [''] * (max_width - len(row)) for row in data]
+
+    # 通过 TextParser 完成表头处理、空值识别和类型推断，与 pd.read_excel 相同
+    parser = TextParser(data, header=0, skip_blank_lines=False)
+    try:
+        return parser.read()
+    finally:
+        parser.close()
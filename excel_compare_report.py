@@ -0,0 +1,252 @@
+"""比较报告写入后端：逐行写出工作表，内存占用与报告行数无关
+
+支持的引擎:
+    xlsxwriter  constant_memory 模式，每写完一行即刷到临时文件，速度最快（可选依赖）
+    openpyxl    只写模式（write_only），未安装 xlsxwriter 时使用
+"""
+import importlib.util
+import os
+from datetime import date, datetime, time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+# 可选的报告写入引擎，auto 表示优先使用 xlsxwriter
+REPORT_ENGINES = ('auto', 'xlsxwriter', 'openpyxl')
+
+# 原始数据工作表（文件A数据/文件B数据）的输出方式：全部行、仅有差异的行、不输出
+DATA_SHEET_MODES = ('all', 'diff', 'none')
+DATA_SHEET_LABELS = {'all': '全部行', 'diff': '仅有差异的行', 'none': '不输出'}
+
+# Excel 工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+# Excel 工作表名的最大长度和不允许出现的字符
+SHEET_NAME_MAX_LENGTH = 31
+SHEET_NAME_INVALID_CHARS = '[]:*?/\\'
+
+# 日期时间单元格的显示格式，与 pandas.to_excel 的默认格式一致
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+# 原始数据工作表中标记差异的底色：值不同的单元格、仅在一个文件中存在的整行
+HIGHLIGHT_COLORS = {'cell': '#FFEB9C', 'row': '#FFC7CE'}
+
+
+def engine_available(engine):
+    """检查报告写入引擎的依赖是否已安装"""
+    return importlib.util.find_spec(engine) is not None
+
+
+def choose_report_engine(engine='auto'):
+    """选择报告写入引擎，auto 时优先使用 xlsxwriter"""
+    if engine == 'auto':
+        return 'xlsxwriter' if engine_available('xlsxwriter') else 'openpyxl'
+    if engine not in REPORT_ENGINES:
+        raise ValueError(f"不支持的报告写入引擎: {engine}")
+    return engine
+
+
+def to_cell_value(value):
+    """转换为可写入Excel单元格的值（空值写为空单元格，numpy 标量转为 Python 类型）"""
+    if isinstance(value, str):
+        return value
+    if pd.isna(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (int, float, bool, datetime, date, time)):
+        return value
+    return str(value)
+
+
+def group_highlights(cell_rows, cell_cols, whole_rows=(), kept_rows=None):
+    """把要标记的单元格按行分组，返回 {行位置: 列位置列表}，整行标记的行值为None
+
+    kept_rows 为实际写出的行位置（升序，只输出有差异的行时），不为None时行位置换算为在 kept_rows 中的序号，
+    不在其中的行被忽略。
+    """
+    cell_rows = np.asarray(cell_rows, dtype=np.int64)
+    cell_cols = np.asarray(cell_cols, dtype=np.int64)
+    whole_rows = np.asarray(whole_rows, dtype=np.int64)
+    if kept_rows is not None:
+        cell_rows, cell_cols = remap_rows(cell_rows, kept_rows, cell_cols)
+        whole_rows, = remap_rows(whole_rows, kept_rows)
+
+    highlights = {}
+    if len(cell_rows):
+        order = np.lexsort((cell_cols, cell_rows))
+        cell_rows, cell_cols = cell_rows[order], cell_cols[order]
+        boundaries = np.flatnonzero(np.diff(cell_rows)) + 1
+        starts = np.concatenate(([0], boundaries))
+        for row, cols in zip(cell_rows[starts].tolist(), np.split(cell_cols, boundaries)):
+            highlights[row] = cols.tolist()
+    for row in whole_rows.tolist():
+        highlights[row] = None
+    return highlights
+
+
+def remap_rows(rows, kept_rows, *columns):
+    """把行位置换算为在升序的 kept_rows 中的序号，去掉不在其中的行（columns 中的数组同步过滤）"""
+    kept_rows = np.asarray(kept_rows, dtype=np.int64)
+    index = np.searchsorted(kept_rows, rows)
+    valid = index < len(kept_rows)
+    valid[valid] = kept_rows[index[valid]] == rows[valid]
+    return (index[valid],) + tuple(column[valid] for column in columns)
+
+
+def unique_sheet_name(name, used):
+    """生成合法且不与 used 中已有名称重复（不区分大小写）的工作表名，并加入 used"""
+    name = ''.join('_' if char in SHEET_NAME_INVALID_CHARS else char for char in str(name)).strip("'")
+    name = name[:SHEET_NAME_MAX_LENGTH] or 'Sheet'
+    taken = {existing.lower() for existing in used}
+    candidate = name
+    suffix = 1
+    while candidate.lower() in taken:
+        suffix += 1
+        tail = f"({suffix})"
+        candidate = name[:SHEET_NAME_MAX_LENGTH - len(tail)] + tail
+    used.add(candidate)
+    return candidate
+
+
+class HighlightStyles:
+    """标记差异的单元格样式，每个工作簿在第一次使用时创建一次，之后所有标记的单元格共用"""
+
+    def __init__(self, workbook, engine):
+        self.workbook = workbook
+        self.engine = engine
+        self.styles = {}
+
+    def get(self, kind, value):
+        """返回 kind（cell/row）对应的样式；xlsxwriter 的日期时间值需要带显示格式的样式"""
+        dated = self.engine == 'xlsxwriter' and isinstance(value, (datetime, date, time))
+        key = (kind, dated)
+        if key not in self.styles:
+            if self.engine == 'xlsxwriter':
+                properties = {'bg_color': HIGHLIGHT_COLORS[kind]}
+                if dated:
+                    properties['num_format'] = DATETIME_FORMAT
+                self.styles[key] = self.workbook.add_format(properties)
+            else:
+                from openpyxl.styles import PatternFill
+
+                color = HIGHLIGHT_COLORS[kind].lstrip('#')
+                self.styles[key] = PatternFill(fill_type='solid', start_color=color, end_color=color)
+        return self.styles[key]
+
+
+class ReportSheet:
+    """报告中的一个工作表，只能按顺序逐行追加"""
+
+    def __init__(self, worksheet, engine, styles=None):
+        self.worksheet = worksheet
+        self.engine = engine
+        self.styles = styles
+        self.row_count = 0
+
+    def append(self, values, highlight=()):
+        """追加一行（值需已经过 to_cell_value 转换）
+
+        highlight 为要标记底色的列位置，为None时标记整行；样式只作用于这些单元格，随该行一起写出。
+        """
+        if highlight is None:
+            columns, kind = range(len(values)), 'row'
+        else:
+            columns, kind = highlight, 'cell'
+        if self.engine == 'xlsxwriter':
+            self.worksheet.write_row(self.row_count, 0, values)
+            # constant_memory 模式下当前行尚未写出，可以直接用带样式的值覆盖
+            for j in columns:
+                self.worksheet.write(self.row_count, j, values[j], self.styles.get(kind, values[j]))
+        else:
+            if columns:
+                from openpyxl.cell import WriteOnlyCell
+
+                values = list(values)
+                for j in columns:
+                    cell = WriteOnlyCell(self.worksheet, value=values[j])
+                    cell.fill = self.styles.get(kind, values[j])
+                    values[j] = cell
+            self.worksheet.append(values)
+        self.row_count += 1
+
+    def write_frame(self, df, row_numbers=None, highlights=None):
+        """写入表头和DataFrame的全部行，row_numbers 不为None时在首列写入原始行号
+
+        highlights 为 group_highlights 的返回值（按DataFrame中的行位置和列位置），这些单元格标记底色。
+        """
+        header = list(df.columns)
+        offset = 0 if row_numbers is None else 1
+        if row_numbers is not None:
+            header = ['原始行号'] + header
+        self.append(header)
+        highlights = highlights or {}
+        for i, values in enumerate(df.itertuples(index=False)):
+            row = [to_cell_value(value) for value in values]
+            if row_numbers is not None:
+                row = [row_numbers[i]] + row
+            if i not in highlights:
+                self.append(row)
+            elif highlights[i] is None:
+                self.append(row, None)
+            else:
+                self.append(row, [j + offset for j in highlights[i]])
+
+    def write_rows(self, header, rows):
+        """写入表头和逐条生成的行，超过Excel最大行数的部分不写入，返回写入的行数"""
+        self.append(list(header))
+        written = 0
+        for values in islice(rows, max(EXCEL_MAX_ROWS - self.row_count, 0)):
+            self.append([to_cell_value(value) for value in values])
+            written += 1
+        return written
+
+
+class ReportWorkbook:
+    """逐行写入的报告工作簿，工作表按创建顺序排列，可交替向不同工作表追加行"""
+
+    def __init__(self, path, engine='auto'):
+        self.path = path
+        self.engine = choose_report_engine(engine)
+        if self.engine == 'xlsxwriter':
+            import xlsxwriter
+
+            self.workbook = xlsxwriter.Workbook(path, {
+                'constant_memory': True,
+                'default_date_format': DATETIME_FORMAT,
+            })
+        else:
+            from openpyxl import Workbook
+
+            self.workbook = Workbook(write_only=True)
+        self.styles = HighlightStyles(self.workbook, self.engine)
+
+    def add_sheet(self, name):
+        """新建工作表"""
+        if self.engine == 'xlsxwriter':
+            return ReportSheet(self.workbook.add_worksheet(name), self.engine, self.styles)
+        return ReportSheet(self.workbook.create_sheet(name), self.engine, self.styles)
+
+    def close(self):
+        """写出并关闭工作簿"""
+        if self.engine == 'xlsxwriter':
+            self.workbook.close()
+        else:
+            self.workbook.save(self.path)
+
+    def discard(self):
+        """放弃未完成的报告：关闭工作簿（释放临时文件）并删除已写出的文件"""
+        if self.engine == 'xlsxwriter':
+            self.workbook.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
@@ -0,0 +1,166 @@
+"""按列的比较规则：类型感知比较、数值容差、日期格式无关比较、大小写和空白折叠
+
+两种值比较方式:
+    text   默认。去除首尾空白后按字符串比较（1 与 1.0、日期与日期文本视为不同）
+    typed  类型感知：数值按容差比较，日期按时间点比较，字符串可忽略大小写和合并空白
+
+规则文件为 JSON，default 为所有列的默认规则，columns 按列名（文件A的列名）覆盖其中的选项:
+    {"default": {"rel_tol": 1e-9}, "columns": {"金额": {"abs_tol": 0.01}, "名称": {"ignore_case": true}}}
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+# 值比较方式：按字符串比较、类型感知比较
+COMPARE_MODES = ('text', 'typed')
+COMPARE_MODE_LABELS = {'text': '文本', 'typed': '类型感知'}
+
+# 规则选项及其默认值：绝对容差、相对容差、忽略大小写、合并连续空白、日期按时间点比较（忽略格式）
+RULE_OPTIONS = {
+    'abs_tol': 0.0,
+    'rel_tol': 1e-9,
+    'ignore_case': False,
+    'collapse_whitespace': False,
+    'ignore_date_format': True,
+}
+
+# 看起来像日期或时间的文本：年-月-日、日/月/年（分隔符为 - / .）、时:分、英文月份名，其余文本不尝试解析为日期
+DATE_LIKE = (r'\s*(?:\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}|\d{1,2}:\d{2}'
+             r'|\d{1,2}\s+[A-Za-z]{3}|[A-Za-z]{3,9}\.?\s+\d{1,2})')
+# 以 / 或 . 分隔的年月日，替换为 - 后可以按 ISO 8601 向量化解析
+SLASH_DATE = r'^(\s*\d{4})[/.](\d{1,2})[/.](\d{1,2})'
+
+
+class ColumnRule:
+    """一列的比较规则，所有比较都按列向量化执行"""
+
+    def __init__(self, **options):
+        unknown = sorted(set(options) - set(RULE_OPTIONS))
+        if unknown:
+            raise ValueError(f"不支持的比较规则选项: {', '.join(unknown)}")
+        options = dict(RULE_OPTIONS, **options)
+        self.abs_tol = float(options['abs_tol'])
+        self.rel_tol = float(options['rel_tol'])
+        if self.abs_tol < 0 or self.rel_tol < 0:
+            raise ValueError("数值容差不能为负数")
+        self.ignore_case = bool(options['ignore_case'])
+        self.collapse_whitespace = bool(options['collapse_whitespace'])
+        self.ignore_date_format = bool(options['ignore_date_format'])
+
+    def to_dict(self):
+        """返回规则选项字典"""
+        return {name: getattr(self, name) for name in RULE_OPTIONS}
+
+    def fold_strings(self, strings):
+        """按规则折叠去除首尾空白后的字符串（忽略大小写、合并连续空白）"""
+        if not self.ignore_case and not self.collapse_whitespace:
+            return strings
+        folded = pd.Series(strings, dtype=object)
+        if self.collapse_whitespace:
+            folded = folded.str.replace(r'\s+', ' ', regex=True)
+        if self.ignore_case:
+            folded = folded.str.casefold()
+        return folded.to_numpy(dtype=object)
+
+    def numbers_equal(self, numbers1, numbers2):
+        """按容差比较两组浮点数（与 math.isclose 相同：差值不超过绝对容差或相对容差乘以较大的绝对值）"""
+        with np.errstate(invalid='ignore', over='ignore'):
+            difference = np.abs(numbers1 - numbers2)
+            tolerance = np.maximum(self.abs_tol, self.rel_tol * np.maximum(np.abs(numbers1), np.abs(numbers2)))
+            return (numbers1 == numbers2) | (difference <= tolerance)
+
+    def values_equal(self, strings1, strings2):
+        """比较字符串不相等的非空值：都能解析为数值时按容差比较，否则都能解析为日期时按时间点比较"""
+        numbers1 = pd.to_numeric(pd.Series(strings1, dtype=object), errors='coerce').to_numpy(dtype=float)
+        numbers2 = pd.to_numeric(pd.Series(strings2, dtype=object), errors='coerce').to_numpy(dtype=float)
+        numeric = ~np.isnan(numbers1) & ~np.isnan(numbers2)
+        equal = numeric & self.numbers_equal(numbers1, numbers2)
+
+        # 两边都不是数值的值尝试按日期比较（一边是数值时不视为日期，避免 "2024" 与 "2024-01-01" 相等）
+        if self.ignore_date_format:
+            candidates = np.flatnonzero(np.isnan(numbers1) & np.isnan(numbers2))
+            if len(candidates):
+                dates1 = parse_dates(strings1[candidates])
+                dates2 = parse_dates(strings2[candidates])
+                equal[candidates] = dates1.notna().to_numpy() & (dates1 == dates2).to_numpy()
+        return equal
+
+
+def parse_dates(strings):
+    """将字符串解析为时间点，无法解析的为 NaT
+
+    只解析看起来像日期或时间的文本：先按 ISO 8601 向量化解析（年月日之间的 / 和 . 视为 -），
+    其余的再按 format='mixed' 逐个推断格式，不把大量普通文本逐个交给 dateutil。
+    """
+    strings = pd.Series(strings, dtype=object)
+    likely = strings.str.match(DATE_LIKE, na=False)
+    candidates = strings[likely]
+    if candidates.empty:
+        return pd.Series(pd.NaT, index=strings.index, dtype='datetime64[ns]')
+    parsed = pd.to_datetime(candidates.str.replace(SLASH_DATE, r'\1-\2-\3', regex=True),
+                            errors='coerce', format='ISO8601')
+    leftovers = parsed.isna()
+    if leftovers.any():
+        parsed = parsed.where(~leftovers, pd.to_datetime(candidates[leftovers], errors='coerce', format='mixed'))
+    return parsed.reindex(strings.index)
+
+
+class ComparisonRules:
+    """所有列的比较规则：默认规则和按列名覆盖的规则"""
+
+    def __init__(self, default=None, columns=None):
+        self.default_options = dict(default or {})
+        self.column_options = {str(name): dict(options) for name, options in (columns or {}).items()}
+        self.default = ColumnRule(**self.default_options)
+        self.columns = {name: ColumnRule(**dict(self.default_options, **options))
+                        for name, options in self.column_options.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """由规则字典（规则文件的内容）创建"""
+        data = data or {}
+        unknown = sorted(set(data) - {'default', 'columns'})
+        if unknown:
+            raise ValueError(f"规则文件中有不支持的项: {', '.join(unknown)}")
+        return cls(data.get('default'), data.get('columns'))
+
+    def to_dict(self):
+        """返回规则字典，可写回规则文件，也用于工作进程和结果缓存键"""
+        return {'default': self.default.to_dict(),
+                'columns': {name: rule.to_dict() for name, rule in self.columns.items()}}
+
+    def for_column(self, name):
+        """返回一列（按文件A的列名）使用的规则"""
+        return self.columns.get(str(name), self.default)
+
+    def describe(self):
+        """规则的简短说明，用于报告概览"""
+        text = format_rule(self.default)
+        if self.columns:
+            text += "；" + "；".join(f"{name}: {format_rule(rule)}" for name, rule in self.columns.items())
+        return text
+
+
+def format_rule(rule):
+    """格式化一条规则"""
+    parts = [f"绝对容差 {rule.abs_tol:g}", f"相对容差 {rule.rel_tol:g}"]
+    if rule.ignore_case:
+        parts.append("忽略大小写")
+    if rule.collapse_whitespace:
+        parts.append("合并空白")
+    if not rule.ignore_date_format:
+        parts.append("日期按文本比较")
+    return ', '.join(parts)
+
+
+def load_rules(path):
+    """读取 JSON 规则文件，返回规则字典"""
+    with open(path, encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"规则文件格式错误: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("规则文件格式错误: 顶层必须是对象")
+    return ComparisonRules.from_dict(data).to_dict()
@@ -0,0 +1,218 @@
+"""批量汇总：每对文件完成后立即更新汇总统计，差异明细溢写到磁盘临时文件
+
+汇总报告在批量结束时按文件对原始顺序一次性流式写出，
+内存占用只与最大的单对文件有关，与文件对数量无关。
+"""
+import os
+import pickle
+import tempfile
+from itertools import islice
+
+from excel_compare_export import DIFF_EXPORT_SCHEMA
+from excel_compare_report import EXCEL_MAX_ROWS, ReportWorkbook, to_cell_value
+from excel_compare_timing import TIMING_STAGES, format_rate
+
+# "所有差异详情"工作表的字段（与差异明细导出一致）
+SUMMARY_DIFF_FIELDS = [name for name, _ in DIFF_EXPORT_SCHEMA]
+
+# 每次溢写到磁盘的差异条数
+SPILL_CHUNK_ROWS = 100000
+
+
+class BatchSummary:
+    """逐对累积批量汇总所需的统计信息，差异明细按块溢写到临时文件"""
+
+    def __init__(self, spill_dir=None):
+        # 以下字典都以文件对序号为键，写出时按序号排序，与完成顺序无关
+        self.pair_rows = {}
+        self.sheet_rows = {}
+        self.diff_stat_rows = {}
+        self.diff_file_rows = {}
+        self.timings = {}
+        self.total_differences = 0
+        # 差异明细临时文件（关闭后自动删除）和每对文件的 (偏移量, 块数)
+        self.spill = tempfile.TemporaryFile(dir=spill_dir)
+        self.spill_chunks = {}
+
+    def add(self, index, result):
+        """加入一对文件的比较结果：更新各项统计并把差异明细写入临时文件"""
+        pair = result['pair']
+        stats = result['statistics']
+        differences = result['differences']
+        diff_count = stats['diff_count']
+        file_a = os.path.basename(pair['file_a'])
+        file_b = os.path.basename(pair['file_b'])
+        report_name = f"{pair['base_name']}_比较报告.xlsx"
+
+        self.pair_rows[index] = [
+            pair['base_name'], file_a, file_b,
+            stats['compared_rows'], stats['compared_cols'], stats['total_cells'], diff_count,
+            f"{stats['similarity']:.2f}%", stats['skipped_rows'],
+            stats.get('added_rows', 0), stats.get('removed_rows', 0),
+            stats.get('added_cols', 0), stats.get('removed_cols', 0),
+            '有差异' if diff_count > 0 else '完全相同', report_name
+        ]
+
+        # 按工作表统计（未比较的工作表只有状态）
+        self.sheet_rows[index] = []
+        for entry in stats.get('sheet_statistics', ()):
+            compared = 'similarity' in entry
+            self.sheet_rows[index].append([
+                pair['base_name'], entry['sheet'], entry['status'],
+                entry.get('compared_rows'), entry.get('compared_cols'), entry.get('total_cells'),
+                entry.get('diff_count'), f"{entry['similarity']:.2f}%" if compared else None,
+                entry.get('added_rows', 0) if compared else None, entry.get('removed_rows', 0) if compared else None,
+                entry.get('added_cols', 0) if compared else None, entry.get('removed_cols', 0) if compared else None
+            ])
+
+        if differences:
+            # 按列统计差异，找出差异最多的列
+            col_diff_count = differences.column_counts()
+            max_diff_col = max(col_diff_count.items(), key=lambda x: x[1])
+            self.diff_stat_rows[index] = [
+                pair['base_name'], len(differences), to_cell_value(max_diff_col[0]), max_diff_col[1],
+                f"{(len(differences) / stats['total_cells'] * 100):.2f}%" if stats['total_cells'] > 0 else "0%"
+            ]
+            self.spill_differences(index, pair['base_name'], file_a, file_b, differences)
+        else:
+            self.diff_stat_rows[index] = [pair['base_name'], 0, '无', 0, "0.00%"]
+
+        if diff_count > 0:
+            self.diff_file_rows[index] = [
+                pair['base_name'], pair['file_a'], pair['file_b'], diff_count,
+                f"{stats['similarity']:.2f}%", report_name
+            ]
+        self.total_differences += len(differences)
+
+        # 各阶段耗时记录（复用缓存的文件对只有总耗时）
+        if result.get('timing'):
+            self.timings[index] = (pair['base_name'], result['timing'])
+
+    def spill_differences(self, index, base_name, file_a, file_b, differences):
+        """把一对文件的差异明细转换为"所有差异详情"的行，分块写入临时文件"""
+        self.spill.seek(0, os.SEEK_END)
+        offset = self.spill.tell()
+        chunks = 0
+        diff_rows = differences.iter_rows()
+        while True:
+            rows = [(base_name, file_a, file_b) + row for row in islice(diff_rows, SPILL_CHUNK_ROWS)]
+            if not rows:
+                break
+            pickle.dump(rows, self.spill, protocol=pickle.HIGHEST_PROTOCOL)
+            chunks += 1
+        self.spill_chunks[index] = (offset, chunks)
+
+    def iter_difference_rows(self):
+        """按文件对原始顺序逐块读回差异明细行"""
+        for index in sorted(self.spill_chunks):
+            offset, chunks = self.spill_chunks[index]
+            self.spill.seek(offset)
+            for _ in range(chunks):
+                yield from pickle.load(self.spill)
+
+    def write(self, summary_path, summary_rows, report_engine='auto'):
+        """流式写出汇总报告，summary_rows 为"汇总统计"工作表的 (项目, 值) 列表"""
+        with ReportWorkbook(summary_path, report_engine) as workbook:
+            # 1. 汇总统计
+            sheet = workbook.add_sheet('汇总统计')
+            sheet.append(['项目', '值'])
+            for item, value in summary_rows:
+                sheet.append([item, to_cell_value(value)])
+
+            # 2. 文件对概览
+            sheet = workbook.add_sheet('文件对概览')
+            sheet.append(['基础名称', '文件A', '文件B', '比较行数', '比较列数', '总单元格数', '差异单元格数',
+                          '相似度(%)', '预检跳过行数', '新增行数', '删除行数', '新增列数', '删除列数', '状态',
+                          '报告文件'])
+            for index in sorted(self.pair_rows):
+                sheet.append(self.pair_rows[index])
+
+            # 3. 工作表统计（每对文件的每个工作表一行）
+            sheet = workbook.add_sheet('工作表统计')
+            sheet.append(['文件对', '工作表', '状态', '比较行数', '比较列数', '总单元格数', '差异单元格数',
+                          '相似度(%)', '新增行数', '删除行数', '新增列数', '删除列数'])
+            for index in sorted(self.sheet_rows):
+                for row in self.sheet_rows[index]:
+                    sheet.append([to_cell_value(value) for value in row])
+
+            # 4. 所有差异详情（超过Excel最大行数的部分不写入工作表）
+            sheet = workbook.add_sheet('所有差异详情')
+            if self.total_differences:
+                sheet.append(SUMMARY_DIFF_FIELDS)
+                for row in self.iter_difference_rows():
+                    if sheet.row_count >= EXCEL_MAX_ROWS:
+                        break
+                    sheet.append([to_cell_value(value) for value in row])
+            else:
+                sheet.append(['说明'])
+                sheet.append(['所有文件对在指定范围内都完全相同，没有发现任何差异。'])
+
+            # 5. 差异统计分析（按文件对统计差异数量和差异最多的列）
+            if self.total_differences:
+                sheet = workbook.add_sheet('差异统计分析')
+                sheet.append(['文件对', '总差异数', '差异最多的列', '该列差异数', '差异率(%)'])
+                for index in sorted(self.diff_stat_rows):
+                    sheet.append(self.diff_stat_rows[index])
+
+            # 6. 有差异的文件列表（仅包含有差异的文件）
+            sheet = workbook.add_sheet('有差异的文件')
+            if self.diff_file_rows:
+                sheet.append(['文件对', '文件A路径', '文件B路径', '差异单元格数', '相似度(%)', '详细报告'])
+                for index in sorted(self.diff_file_rows):
+                    sheet.append(self.diff_file_rows[index])
+            else:
+                sheet.append(['说明'])
+                sheet.append(['所有文件对都完全相同，没有差异。'])
+
+            # 7. 耗时统计（每对文件各阶段的耗时、吞吐量、本对和进程的峰值内存，末行为各对之和）
+            if self.timings:
+                sheet = workbook.add_sheet('耗时统计')
+                sheet.append(['文件对', '状态'] + [f"{label}(s)" for label in TIMING_STAGES.values()] +
+                             ['总耗时(s)', '比较行数', '比较单元格数', '行/秒', '单元格/秒', '峰值内存(MB)',
+                              '进程峰值内存(MB)'])
+                timings = [self.timings[index] for index in sorted(self.timings)]
+                for base_name, timing in timings:
+                    sheet.append(timing_row(base_name, '复用缓存' if timing['cache_hit'] else '已比较', timing))
+                sheet.append(timing_row('合计（各对耗时之和）', None, combine_timings([timing for _, timing in timings])))
+
+    def close(self):
+        """关闭并删除差异明细临时文件"""
+        self.spill.close()
+
+
+def timing_row(name, status, timing):
+    """耗时统计工作表中的一行"""
+    stages = timing['stages']
+    peaks = [timing['peak_rss_mb'], timing['process_peak_rss_mb']]
+    return [name, status] + [round(stages[stage], 3) if stage in stages else None for stage in TIMING_STAGES] + [
+        round(timing['total_seconds'], 3), timing['compared_rows'], timing['total_cells'],
+        format_rate(timing['rows_per_second']), format_rate(timing['cells_per_second']),
+    ] + [None if peak is None else round(peak, 1) for peak in peaks]
+
+
+def combine_timings(timings):
+    """合计多对文件的耗时记录（并行比较时耗时之和大于批量比较的实际耗时），峰值内存取最大值
+
+    吞吐量只按实际比较（未复用缓存）的文件对计算。
+    """
+    compared = [timing for timing in timings if not timing['cache_hit']]
+    compared_seconds = sum(timing['total_seconds'] for timing in compared)
+    compared_rows = sum(timing['compared_rows'] for timing in compared)
+    compared_cells = sum(timing['total_cells'] for timing in compared)
+    return {
+        'cache_hit': False,
+        'stages': {stage: sum(timing['stages'].get(stage, 0.0) for timing in timings) for stage in TIMING_STAGES},
+        'total_seconds': sum(timing['total_seconds'] for timing in timings),
+        'compared_rows': sum(timing['compared_rows'] for timing in timings),
+        'total_cells': sum(timing['total_cells'] for timing in timings),
+        'rows_per_second': compared_rows / compared_seconds if compared_seconds > 0 else None,
+        'cells_per_second': compared_cells / compared_seconds if compared_seconds > 0 else None,
+        'peak_rss_mb': max_peak(timings, 'peak_rss_mb'),
+        'process_peak_rss_mb': max_peak(timings, 'process_peak_rss_mb'),
+    }
+
+
+def max_peak(timings, name):
+    """多对文件耗时记录中某项峰值内存的最大值，都没有记录时返回None"""
+    peaks = [timing[name] for timing in timings if timing[name] is not None]
+    return max(peaks) if peaks else None
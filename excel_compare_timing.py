@@ -0,0 +1,207 @@
+"""耗时统计：记录单对文件比较各阶段的耗时、吞吐量和峰值内存，以及可选的 cProfile/tracemalloc 性能分析
+
+每对文件的峰值内存在 Linux 上为该对文件比较期间的峰值常驻内存（开始时重置进程的 VmHWM），
+其他系统不支持重置，只记录进程到目前为止的峰值。
+
+每对文件的耗时记录随比较结果返回（多进程比较时在工作进程中记录），
+批量结束时写入汇总报告的"耗时统计"工作表，并可另外保存为 JSON。
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不记录进程峰值内存
+    resource = None
+
+# Linux 上重置和读取进程峰值常驻内存的文件
+CLEAR_REFS_PATH = '/proc/self/clear_refs'
+PROC_STATUS_PATH = '/proc/self/status'
+
+# 单对文件比较的阶段，按流程顺序排列
+TIMING_STAGES = {
+    'read_a': '读取文件A',
+    'read_b': '读取文件B',
+    'select': '行范围选取',
+    'diff': '差异计算',
+    'report': '写入报告',
+}
+
+# 性能分析方式：cProfile 统计函数耗时，tracemalloc 统计各阶段峰值内存和内存分配最多的代码行
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+# 性能分析结果目录（位于批量结果目录下）和耗时记录 JSON 文件名
+PROFILE_DIR_NAME = '性能分析'
+TIMING_TRACE_NAME = '耗时统计.json'
+# 性能分析文本报告中列出的条目数
+PROFILE_TOP_ENTRIES = 40
+
+MB = 1024 * 1024
+
+# 重置峰值之前观测到的进程峰值常驻内存（MB），重置后进程峰值取它与当前峰值中的较大者
+observed_peak_mb = 0.0
+
+
+def peak_rss_mb():
+    """返回当前进程的峰值常驻内存（MB，Linux 上为上次重置以来的峰值），不支持时返回None"""
+    try:
+        with open(PROC_STATUS_PATH) as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以KB为单位
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss():
+    """把进程的峰值常驻内存重置为当前值（仅 Linux），返回是否成功；重置前的峰值计入进程峰值"""
+    global observed_peak_mb
+    peak = peak_rss_mb()
+    try:
+        with open(CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    if peak is not None:
+        observed_peak_mb = max(observed_peak_mb, peak)
+    return True
+
+
+def process_peak_rss_mb():
+    """返回进程到目前为止的峰值常驻内存（MB，包括重置之前的峰值），不支持时返回None"""
+    peak = peak_rss_mb()
+    return None if peak is None else max(observed_peak_mb, peak)
+
+
+class PairTimer:
+    """记录一对文件各阶段的耗时，启用 tracemalloc 时同时记录各阶段的峰值内存
+
+    多个工作表并行比较时，同一阶段的耗时为各线程耗时之和。
+    同一进程内的文件对按顺序比较，创建时重置进程峰值内存，记录的峰值内存只包含这对文件。
+    """
+
+    def __init__(self):
+        self.pair_peak = reset_peak_rss()
+        self.started = time.perf_counter()
+        self.seconds = dict.fromkeys(TIMING_STAGES, 0.0)
+        self.peak_bytes = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """计入指定阶段的代码块"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.seconds[name] += elapsed
+                if tracing:
+                    _, peak = tracemalloc.get_traced_memory()
+                    self.peak_bytes[name] = max(self.peak_bytes.get(name, 0), peak - base)
+
+    def timed_iter(self, name, iterable):
+        """逐个生成 iterable 的元素，取下一个元素的耗时计入指定阶段（用于流式读取）"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+            yield item
+
+    def record(self, statistics=None, cache_hit=False):
+        """返回耗时记录字典：各阶段耗时、总耗时、吞吐量和峰值内存"""
+        total = time.perf_counter() - self.started
+        rows = statistics['compared_rows'] if statistics else 0
+        cells = statistics['total_cells'] if statistics else 0
+        record = {
+            'cache_hit': cache_hit,
+            'stages': {} if cache_hit else dict(self.seconds),
+            'total_seconds': total,
+            'compared_rows': rows,
+            'total_cells': cells,
+            # 复用缓存时没有实际比较，不计算吞吐量
+            'rows_per_second': rows / total if total > 0 and not cache_hit else None,
+            'cells_per_second': cells / total if total > 0 and not cache_hit else None,
+            # 本对文件比较期间的峰值内存（不支持重置时为None）和进程到目前为止的峰值内存
+            'peak_rss_mb': peak_rss_mb() if self.pair_peak else None,
+            'process_peak_rss_mb': process_peak_rss_mb(),
+        }
+        if self.peak_bytes:
+            record['stage_peak_mb'] = {name: size / MB for name, size in self.peak_bytes.items()}
+        return record
+
+
+class PairProfiler:
+    """对单对文件做 cProfile 或 tracemalloc 性能分析，结果写入 output_dir
+
+    cProfile 只统计当前线程（多个工作表在线程池中并行比较时不包含其他线程），
+    输出 .prof（可用 snakeviz 等工具查看）和按累计耗时排序的文本报告；
+    tracemalloc 输出比较结束时仍占用内存最多的代码行，各阶段峰值内存记录在耗时记录的 stage_peak_mb 中。
+    """
+
+    def __init__(self, mode, output_dir, base_name):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的性能分析方式: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.base_name = base_name
+        self.profile = None
+        self.paths = []
+
+    def __enter__(self):
+        if self.mode == 'cprofile':
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, self.base_name)
+        if self.mode == 'cprofile':
+            self.profile.disable()
+            self.profile.dump_stats(f"{prefix}.prof")
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats('cumulative').print_stats(PROFILE_TOP_ENTRIES)
+            self.write_text(f"{prefix}_cprofile.txt", text.getvalue())
+            self.paths = [f"{prefix}.prof", f"{prefix}_cprofile.txt"]
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            lines = [f"比较结束时仍占用内存最多的 {PROFILE_TOP_ENTRIES} 个代码行（各阶段峰值内存见耗时统计）:"]
+            lines += [str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP_ENTRIES]]
+            self.write_text(f"{prefix}_tracemalloc.txt", '\n'.join(lines) + '\n')
+            self.paths = [f"{prefix}_tracemalloc.txt"]
+        return False
+
+    def write_text(self, path, text):
+        """写入文本报告"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def format_rate(value):
+    """格式化吞吐量（每秒行数/单元格数）"""
+    return None if value is None else round(value)
@@ -1,12 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
 import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
-import re
+
+from excel_compare_align import ROW_ALIGNMENTS
+from excel_compare_cache import DEFAULT_CACHE_DIR, DEFAULT_SHEET_CACHE_DIR
+from excel_compare_columns import COLUMN_ALIGNMENTS, parse_column_aliases
+from excel_compare_core import ExcelComparer
+from excel_compare_export import EXPORT_FORMATS
+from excel_compare_files import (DEFAULT_PAIR_SUFFIXES_TEXT, PairingIndex, format_pair_suffixes,
+                                 format_replaced_files, parse_pair_suffixes, scan_excel_files)
+from excel_compare_reader import READ_ENGINES
+from excel_compare_report import DATA_SHEET_LABELS
+from excel_compare_rules import COMPARE_MODES, load_rules
+
+# 文件列表每次（每个Tk事件循环周期）插入的行数，大量文件分批插入，界面保持响应
+FILE_LIST_BATCH_ROWS = 500
 
 class ExcelCompareTool:
     def __init__(self, root):
@@ -15,12 +28,25 @@ class ExcelCompareTool:
         self.root.geometry("900x700")
         self.root.configure(bg='#f0f0f0')
         
-        # 存储文件路径和数据
-        self.selected_files = []
+        # 文件配对索引（增量更新）和配对结果
+        self.pairing = PairingIndex()
         self.file_pairs = []
+        # 文件列表中已插入的行（文件路径 -> Treeview项）和等待插入的文件
+        self.tree_items = {}
+        self.pending_rows = deque()
+        self.insert_job = None
         self.batch_results = []  # 存储批量比较结果
         
+        # 后台比较线程通过队列把日志、进度和结果交回Tk主线程
+        self.events = queue.Queue()
+        self.worker_thread = None
+        self.cancel_event = threading.Event()
+        
+        # 按列的比较规则文件（JSON），未选择时只使用界面上的默认规则
+        self.rules_file = None
+        
         self.setup_ui()
+        self.root.after(100, self.poll_events)
         
     def setup_ui(self):
         # 主标题
@@ -50,11 +76,25 @@ class ExcelCompareTool:
                               command=self.select_multiple_files)
         select_btn.pack(side=tk.LEFT, padx=5)
         
+        folder_btn = tk.Button(btn_frame, text="📂 选择文件夹",
+                               font=('Arial', 12, 'bold'), bg='#3498db', fg='white',
+                               command=self.select_folder)
+        folder_btn.pack(side=tk.LEFT, padx=5)
+        
         clear_btn = tk.Button(btn_frame, text="🗑️ 清空列表", 
                              font=('Arial', 12, 'bold'), bg='#e74c3c', fg='white',
                              command=self.clear_files)
         clear_btn.pack(side=tk.LEFT, padx=5)
         
+        # 配对后缀（修改后按回车或开始比较时重新配对）
+        tk.Label(btn_frame, text="配对后缀:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT, padx=(15, 0))
+        self.suffix_entry = tk.Entry(btn_frame, font=('Arial', 10), width=16)
+        self.suffix_entry.insert(0, DEFAULT_PAIR_SUFFIXES_TEXT)
+        self.suffix_entry.pack(side=tk.LEFT, padx=5)
+        self.suffix_entry.bind('<Return>', self.apply_pair_suffixes)
+        tk.Label(btn_frame, text="(如 '-A:-B,_old:_new')", font=('Arial', 8),
+                 bg='#f0f0f0', fg='#7f8c8d').pack(side=tk.LEFT)
+        
         # 文件列表显示
         list_frame = tk.Frame(file_frame, bg='#f0f0f0')
         list_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -97,15 +137,174 @@ class ExcelCompareTool:
         self.range_entry.pack(side=tk.LEFT, padx=10)
         
         # 添加行选择格式提示
-        format_label = tk.Label(range_frame, text="(支持格式: '1-100'或'1,3,4,9'或留空比较所有行)", 
+        format_label = tk.Label(range_frame, text="(支持格式: '1-100'、'1,3,4,9'或'1-100,250,900-950'，留空比较所有行；"
+                                                "行号稀疏时 auto 引擎对小文件只转换指定的行)", 
                                font=('Arial', 8), bg='#f0f0f0', fg='#7f8c8d')
         format_label.pack(side=tk.LEFT)
         
-        # 开始比较按钮
-        compare_btn = tk.Button(self.root, text="🔍 开始批量比较", font=('Arial', 14, 'bold'),
-                               bg='#27ae60', fg='white', height=2, width=20,
-                               command=self.start_batch_comparison)
-        compare_btn.pack(pady=20)
+        # 行对齐方式和关键列（填写关键列时按关键列对齐）
+        key_frame = tk.Frame(config_frame, bg='#f0f0f0')
+        key_frame.pack(pady=(0, 10))
+        
+        tk.Label(key_frame, text="行对齐:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.alignment_var = tk.StringVar(value='position')
+        alignment_combo = ttk.Combobox(key_frame, textvariable=self.alignment_var, values=ROW_ALIGNMENTS,
+                                       state='readonly', width=10)
+        alignment_combo.pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(key_frame, text="关键列:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.key_entry = tk.Entry(key_frame, font=('Arial', 10), width=20)
+        self.key_entry.pack(side=tk.LEFT, padx=10)
+        
+        key_hint_label = tk.Label(key_frame, text="(如 '订单号,行号'；无关键列时选 diff 按整行内容识别插入和删除的行)",
+                                  font=('Arial', 8), bg='#f0f0f0', fg='#7f8c8d')
+        key_hint_label.pack(side=tk.LEFT)
+        
+        # 列对齐方式、表头归一化和列别名（归一化或填写别名时按表头名称对齐）
+        column_frame = tk.Frame(config_frame, bg='#f0f0f0')
+        column_frame.pack(pady=(0, 10))
+        
+        tk.Label(column_frame, text="列对齐:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.column_alignment_var = tk.StringVar(value='position')
+        column_alignment_combo = ttk.Combobox(column_frame, textvariable=self.column_alignment_var,
+                                              values=COLUMN_ALIGNMENTS, state='readonly', width=10)
+        column_alignment_combo.pack(side=tk.LEFT, padx=10)
+        
+        self.normalize_headers_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(column_frame, text="归一化表头", variable=self.normalize_headers_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        tk.Label(column_frame, text="列别名:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT, padx=(10, 0))
+        self.column_alias_entry = tk.Entry(column_frame, font=('Arial', 10), width=20)
+        self.column_alias_entry.pack(side=tk.LEFT, padx=10)
+        
+        column_hint_label = tk.Label(column_frame, text="(header 按表头名称匹配列；别名如 '客户名称=客户名')",
+                                     font=('Arial', 8), bg='#f0f0f0', fg='#7f8c8d')
+        column_hint_label.pack(side=tk.LEFT)
+        
+        # 要比较的工作表（留空比较两个文件中所有同名工作表）
+        sheet_frame = tk.Frame(config_frame, bg='#f0f0f0')
+        sheet_frame.pack(pady=(0, 10))
+        
+        tk.Label(sheet_frame, text="工作表:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.sheet_entry = tk.Entry(sheet_frame, font=('Arial', 10), width=20)
+        self.sheet_entry.pack(side=tk.LEFT, padx=10)
+        
+        sheet_hint_label = tk.Label(sheet_frame, text="(如 'Sheet1,汇总'，留空比较所有同名工作表)",
+                                    font=('Arial', 8), bg='#f0f0f0', fg='#7f8c8d')
+        sheet_hint_label.pack(side=tk.LEFT)
+        
+        # 值比较方式和所有列的默认比较规则（按列的规则从规则文件读取）
+        rules_frame = tk.Frame(config_frame, bg='#f0f0f0')
+        rules_frame.pack(pady=(0, 10))
+        
+        tk.Label(rules_frame, text="值比较:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.compare_mode_var = tk.StringVar(value='text')
+        compare_mode_combo = ttk.Combobox(rules_frame, textvariable=self.compare_mode_var, values=COMPARE_MODES,
+                                          state='readonly', width=8)
+        compare_mode_combo.pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(rules_frame, text="绝对容差:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.abs_tol_entry = tk.Entry(rules_frame, font=('Arial', 10), width=8)
+        self.abs_tol_entry.pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(rules_frame, text="相对容差:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.rel_tol_entry = tk.Entry(rules_frame, font=('Arial', 10), width=8)
+        self.rel_tol_entry.pack(side=tk.LEFT, padx=10)
+        
+        self.ignore_case_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(rules_frame, text="忽略大小写", variable=self.ignore_case_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        self.collapse_whitespace_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(rules_frame, text="合并空白", variable=self.collapse_whitespace_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        tk.Button(rules_frame, text="规则文件...", font=('Arial', 9),
+                  command=self.select_rules_file).pack(side=tk.LEFT, padx=10)
+        self.rules_file_label = tk.Label(rules_frame, text="(按列规则：未选择)", font=('Arial', 8),
+                                         bg='#f0f0f0', fg='#7f8c8d')
+        self.rules_file_label.pack(side=tk.LEFT)
+        
+        # 运行选项
+        options_frame = tk.Frame(config_frame, bg='#f0f0f0')
+        options_frame.pack(pady=(0, 10))
+        
+        # 并行进程数
+        tk.Label(options_frame, text="并行进程数:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.workers_var = tk.IntVar(value=1)
+        workers_spinbox = tk.Spinbox(options_frame, from_=1, to=os.cpu_count() or 1, width=5,
+                                     textvariable=self.workers_var, font=('Arial', 10))
+        workers_spinbox.pack(side=tk.LEFT, padx=10)
+        
+        # 读取引擎
+        tk.Label(options_frame, text="读取引擎:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.engine_var = tk.StringVar(value='auto')
+        engine_combo = ttk.Combobox(options_frame, textvariable=self.engine_var, values=READ_ENGINES,
+                                    state='readonly', width=16)
+        engine_combo.pack(side=tk.LEFT, padx=10)
+        
+        # 报告中的原始数据工作表（全部行/仅有差异的行/不输出）
+        tk.Label(options_frame, text="原始数据:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.data_sheets_var = tk.StringVar(value=DATA_SHEET_LABELS['all'])
+        data_sheets_combo = ttk.Combobox(options_frame, textvariable=self.data_sheets_var,
+                                         values=list(DATA_SHEET_LABELS.values()), state='readonly', width=12)
+        data_sheets_combo.pack(side=tk.LEFT, padx=10)
+        self.highlight_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="标记差异单元格", variable=self.highlight_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        # 机器可读的差异明细导出格式
+        tk.Label(options_frame, text="导出明细:", font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        self.export_var = tk.StringVar(value='不导出')
+        export_combo = ttk.Combobox(options_frame, textvariable=self.export_var,
+                                    values=('不导出',) + EXPORT_FORMATS, state='readonly', width=8)
+        export_combo.pack(side=tk.LEFT, padx=10)
+        
+        # 流式比较（大文件）
+        self.streaming_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="流式比较（超大文件）", variable=self.streaming_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        # 结果缓存（跳过内容未变化的文件对）
+        self.cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="复用未变化文件的结果", variable=self.cache_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        # 解析缓存（同一文件再次比较时不重新解析，需要 pyarrow）
+        self.sheet_cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="缓存解析结果", variable=self.sheet_cache_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        # 耗时记录（JSON），各阶段耗时总会写入汇总报告的"耗时统计"工作表
+        self.timing_trace_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="保存耗时记录", variable=self.timing_trace_var,
+                       font=('Arial', 10), bg='#f0f0f0').pack(side=tk.LEFT)
+        
+        # 开始比较和取消按钮
+        action_frame = tk.Frame(self.root, bg='#f0f0f0')
+        action_frame.pack(pady=10)
+        
+        self.compare_btn = tk.Button(action_frame, text="🔍 开始批量比较", font=('Arial', 14, 'bold'),
+                                     bg='#27ae60', fg='white', height=2, width=20,
+                                     command=self.start_batch_comparison)
+        self.compare_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.cancel_btn = tk.Button(action_frame, text="⏹ 取消", font=('Arial', 14, 'bold'),
+                                    bg='#95a5a6', fg='white', height=2, width=8,
+                                    state=tk.DISABLED, command=self.cancel_batch_comparison)
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 进度条和进度说明
+        progress_frame = tk.Frame(self.root, bg='#f0f0f0')
+        progress_frame.pack(padx=30, fill='x')
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress_bar.pack(fill='x')
+        
+        self.progress_label = tk.Label(progress_frame, text="", font=('Arial', 9),
+                                       bg='#f0f0f0', fg='#7f8c8d')
+        self.progress_label.pack()
         
         # 状态显示区域
         self.status_frame = tk.LabelFrame(self.root, text="操作状态", 
@@ -116,14 +315,31 @@ class ExcelCompareTool:
         self.status_text.pack(fill='x', padx=10, pady=10)
         
         self.log_message("准备就绪，请选择要批量比较的Excel文件...")
-        self.log_message("文件命名规则：基础名称-A.xlsx 和 基础名称-B.xlsx")
+        self.log_message("文件命名规则：基础名称-A.xlsx 和 基础名称-B.xlsx（可在\"配对后缀\"中修改）")
     
     def log_message(self, message):
-        """在状态区域显示消息"""
+        """在状态区域显示消息（可在后台线程中调用，由Tk主线程统一写入）"""
         timestamp = datetime.now().strftime('%H:%M:%S')
-        self.status_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.status_text.see(tk.END)
-        self.root.update()
+        self.events.put(('log', f"[{timestamp}] {message}\n"))
+    
+    def poll_events(self):
+        """在Tk主线程中处理后台线程发来的日志、进度和完成事件"""
+        try:
+            while True:
+                event = self.events.get_nowait()
+                kind = event[0]
+                if kind == 'log':
+                    self.status_text.insert(tk.END, event[1])
+                    self.status_text.see(tk.END)
+                elif kind == 'progress':
+                    self.update_progress(*event[1:])
+                elif kind == 'done':
+                    self.finish_batch_comparison(*event[1:])
+                elif kind == 'error':
+                    self.finish_batch_comparison(error=event[1])
+        except queue.Empty:
+            pass
+        self.root.after(100, self.poll_events)
     
     def select_multiple_files(self):
         """选择多个Excel文件"""
@@ -133,475 +349,249 @@ class ExcelCompareTool:
         )
         
         if file_paths:
-            self.selected_files.extend(file_paths)
-            # 去重
-            self.selected_files = list(set(self.selected_files))
-            self.update_file_list()
-            self.log_message(f"已选择 {len(file_paths)} 个文件")
+            added = self.add_files(file_paths)
+            self.log_message(f"已选择 {len(file_paths)} 个文件，新增 {added} 个")
+    
+    def select_folder(self):
+        """选择文件夹，添加其中（包括所有子目录）的Excel文件"""
+        directory = filedialog.askdirectory(title="选择包含Excel文件的文件夹")
+        if not directory:
+            return
+        
+        try:
+            file_paths = scan_excel_files(directory, recursive=True)
+        except OSError as e:
+            messagebox.showerror("错误", f"无法读取文件夹: {e}")
+            return
+        added = self.add_files(file_paths)
+        self.log_message(f"已从 {directory} 找到 {len(file_paths)} 个Excel文件（含子目录），新增 {added} 个")
+    
+    def select_rules_file(self):
+        """选择按列的比较规则文件（JSON）"""
+        path = filedialog.askopenfilename(
+            title="选择比较规则文件",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        
+        if path:
+            self.rules_file = path
+            self.rules_file_label.config(text=f"(按列规则：{os.path.basename(path)})")
+            self.log_message(f"已选择比较规则文件: {os.path.basename(path)}")
+    
+    def build_compare_rules(self):
+        """由规则文件和界面上的默认规则生成比较规则字典，都未设置时返回None"""
+        rules = load_rules(self.rules_file) if self.rules_file else {'default': {}, 'columns': {}}
+        overrides = {}
+        for name, entry in (('abs_tol', self.abs_tol_entry), ('rel_tol', self.rel_tol_entry)):
+            text = entry.get().strip()
+            if text:
+                try:
+                    overrides[name] = float(text)
+                except ValueError:
+                    raise ValueError(f"容差必须是数字: {text}") from None
+        if self.ignore_case_var.get():
+            overrides['ignore_case'] = True
+        if self.collapse_whitespace_var.get():
+            overrides['collapse_whitespace'] = True
+        if not self.rules_file and not overrides:
+            return None
+        rules['default'].update(overrides)
+        return rules
     
     def clear_files(self):
         """清空文件列表"""
-        self.selected_files = []
+        self.pairing.clear()
         self.file_pairs = []
         self.batch_results = []
-        self.update_file_list()
+        self.reset_file_list()
         self.log_message("已清空文件列表")
     
-    def extract_base_name_and_type(self, filename):
-        """提取文件的基础名称和类型（A或B）"""
-        # 移除文件扩展名
-        name_without_ext = os.path.splitext(filename)[0]
-        
-        # 检查是否以-A或-B结尾
-        if name_without_ext.endswith('-A'):
-            return name_without_ext[:-2], 'A'
-        elif name_without_ext.endswith('-B'):
-            return name_without_ext[:-2], 'B'
-        else:
-            return name_without_ext, 'Unknown'
+    def add_files(self, file_paths):
+        """把文件加入配对索引并更新文件列表，返回新增的文件数
+        
+        只解析新增的文件名；已显示的文件中只刷新配对状态可能变化的（同一基础名称下的）行，
+        新增的行在之后的事件循环中分批插入。
+        """
+        replaced = len(self.pairing.replaced)
+        added, changed = self.pairing.add(os.path.abspath(path) for path in file_paths)
+        self.file_pairs = self.pairing.pairs()
+        
+        for file_path in self.pairing.files_of(changed):
+            item = self.tree_items.get(file_path)
+            if item is not None:
+                self.file_tree.item(item, values=self.pairing.describe(file_path))
+        self.pending_rows.extend(added)
+        if self.insert_job is None and self.pending_rows:
+            self.insert_job = self.root.after_idle(self.insert_pending_rows)
+        
+        self.log_message(f"文件分析完成：共 {len(self.pairing)} 个文件，{len(self.file_pairs)} 对可比较")
+        if len(self.pairing.replaced) > replaced:
+            self.log_message(format_replaced_files(self.pairing.replaced[replaced:]))
+        return len(added)
     
-    def find_file_pairs(self):
-        """查找文件配对"""
-        self.file_pairs = []
-        file_dict = {}
-        
-        # 按基础名称分组
-        for file_path in self.selected_files:
-            filename = os.path.basename(file_path)
-            base_name, file_type = self.extract_base_name_and_type(filename)
-            
-            if base_name not in file_dict:
-                file_dict[base_name] = {}
-            file_dict[base_name][file_type] = file_path
-        
-        # 查找配对
-        for base_name, files in file_dict.items():
-            if 'A' in files and 'B' in files:
-                self.file_pairs.append({
-                    'base_name': base_name,
-                    'file_a': files['A'],
-                    'file_b': files['B']
-                })
-        
-        return file_dict
+    def insert_pending_rows(self):
+        """向文件列表插入一批等待显示的行，还有剩余时安排下一批"""
+        for _ in range(min(FILE_LIST_BATCH_ROWS, len(self.pending_rows))):
+            file_path = self.pending_rows.popleft()
+            self.tree_items[file_path] = self.file_tree.insert('', 'end', values=self.pairing.describe(file_path))
+        self.insert_job = self.root.after(1, self.insert_pending_rows) if self.pending_rows else None
     
-    def update_file_list(self):
-        """更新文件列表显示"""
-        # 清空现有项目
-        for item in self.file_tree.get_children():
-            self.file_tree.delete(item)
-        
-        if not self.selected_files:
-            return
+    def reset_file_list(self):
+        """清空文件列表显示（包括等待插入的行）"""
+        if self.insert_job is not None:
+            self.root.after_cancel(self.insert_job)
+            self.insert_job = None
+        self.pending_rows.clear()
+        self.tree_items.clear()
+        self.file_tree.delete(*self.file_tree.get_children())
+    
+    def apply_pair_suffixes(self, event=None):
+        """配对后缀变化时按新的后缀重新配对所有文件，后缀格式错误时返回False"""
+        try:
+            suffixes = parse_pair_suffixes(self.suffix_entry.get())
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return False
+        if suffixes == self.pairing.suffixes:
+            return True
         
-        # 查找配对
-        file_dict = self.find_file_pairs()
-        
-        # 显示文件信息
-        for file_path in self.selected_files:
-            filename = os.path.basename(file_path)
-            base_name, file_type = self.extract_base_name_and_type(filename)
-            
-            # 确定状态和配对文件
-            if base_name in file_dict and 'A' in file_dict[base_name] and 'B' in file_dict[base_name]:
-                status = "✅ 已配对"
-                if file_type == 'A':
-                    pair_file = os.path.basename(file_dict[base_name]['B'])
-                elif file_type == 'B':
-                    pair_file = os.path.basename(file_dict[base_name]['A'])
-                else:
-                    pair_file = "无配对"
-            else:
-                status = "❌ 未配对"
-                pair_file = "无配对"
-            
-            self.file_tree.insert('', 'end', values=(filename, file_type, status, pair_file))
-        
-        # 更新日志
-        paired_count = len(self.file_pairs)
-        self.log_message(f"文件分析完成：共 {len(self.selected_files)} 个文件，{paired_count} 对可比较")
+        file_paths = list(self.pairing.paths)
+        self.pairing = PairingIndex(suffixes)
+        self.reset_file_list()
+        self.log_message(f"配对后缀已修改：{format_pair_suffixes(suffixes)}")
+        if file_paths:
+            self.add_files(file_paths)
+        else:
+            self.file_pairs = []
+        return True
     
     def start_batch_comparison(self):
         """开始批量比较"""
-        if not self.selected_files:
+        if not self.apply_pair_suffixes():
+            return
+        
+        if not self.pairing:
             messagebox.showerror("错误", "请先选择Excel文件")
             return
         
         if not self.file_pairs:
-            messagebox.showerror("错误", "没有找到可配对的文件\n请确保文件名格式为：基础名称-A.xlsx 和 基础名称-B.xlsx")
+            messagebox.showerror("错误", "没有找到可配对的文件\n请确保文件名格式为："
+                                 f"{format_pair_suffixes(self.pairing.suffixes)}")
+            return
+        
+        if self.worker_thread is not None and self.worker_thread.is_alive():
             return
         
+        key_columns = [column.strip() for column in self.key_entry.get().split(',') if column.strip()]
+        sheet_names = [name.strip() for name in self.sheet_entry.get().split(',') if name.strip()]
+        export_format = self.export_var.get() if self.export_var.get() in EXPORT_FORMATS else None
+        data_sheets = next(mode for mode, label in DATA_SHEET_LABELS.items()
+                           if label == self.data_sheets_var.get())
         try:
-            self.log_message(f"开始批量比较 {len(self.file_pairs)} 对文件...")
-            
-            # 清空之前的结果
-            self.batch_results = []
-            
-            # 获取保存目录（使用第一个文件的目录）
-            save_dir = os.path.dirname(self.file_pairs[0]['file_a'])
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            # 创建批量比较结果目录
-            batch_dir = os.path.join(save_dir, f"批量比较结果_{timestamp}")
-            os.makedirs(batch_dir, exist_ok=True)
-            
-            successful_comparisons = 0
-            failed_comparisons = 0
-            
-            # 逐对比较文件
-            for i, pair in enumerate(self.file_pairs, 1):
-                try:
-                    self.log_message(f"正在比较第 {i}/{len(self.file_pairs)} 对：{pair['base_name']}")
-                    
-                    # 比较单对文件
-                    result = self.compare_file_pair(pair, batch_dir)
-                    
-                    if result:
-                        successful_comparisons += 1
-                        self.log_message(f"✅ {pair['base_name']} 比较完成")
-                        # 将结果添加到批量结果中
-                        self.batch_results.append(result)
-                    else:
-                        failed_comparisons += 1
-                        self.log_message(f"❌ {pair['base_name']} 比较失败")
-                        
-                except Exception as e:
-                    failed_comparisons += 1
-                    self.log_message(f"❌ {pair['base_name']} 比较出错：{str(e)}")
-            
-            # 生成批量比较汇总报告
-            self.generate_batch_summary(batch_dir, successful_comparisons, failed_comparisons)
-            
-            # 显示完成消息
-            result_msg = f"""批量比较完成！
-
-📊 比较结果:
-• 成功比较: {successful_comparisons} 对
-• 失败比较: {failed_comparisons} 对
-• 总计: {len(self.file_pairs)} 对
-
-📁 结果保存在:
-{batch_dir}
-
-是否要打开结果目录？"""
-            
-            if messagebox.askyesno("批量比较完成", result_msg):
-                # 打开结果目录
-                if os.name == 'nt':  # Windows
-                    os.startfile(batch_dir)
-                elif os.name == 'posix':  # macOS/Linux
-                    os.system(f'open "{batch_dir}"')
-            
-        except Exception as e:
-            error_msg = f"批量比较失败: {str(e)}"
-            self.log_message(error_msg)
-            messagebox.showerror("错误", error_msg)
+            compare_rules = self.build_compare_rules()
+            column_aliases = parse_column_aliases(self.column_alias_entry.get())
+            comparer = ExcelComparer(range_text=self.range_entry.get(), log=self.log_message,
+                                     workers=self.workers_var.get(), read_engine=self.engine_var.get(),
+                                     streaming=self.streaming_var.get(), row_alignment=self.alignment_var.get(),
+                                     key_columns=key_columns, column_alignment=self.column_alignment_var.get(),
+                                     normalize_headers=self.normalize_headers_var.get(),
+                                     column_aliases=column_aliases, data_sheets=data_sheets,
+                                     highlight_diffs=self.highlight_var.get(),
+                                     export_format=export_format, sheet_names=sheet_names,
+                                     compare_mode=self.compare_mode_var.get(), compare_rules=compare_rules,
+                                     cache_dir=DEFAULT_CACHE_DIR if self.cache_var.get() else None,
+                                     sheet_cache_dir=DEFAULT_SHEET_CACHE_DIR if self.sheet_cache_var.get() else None,
+                                     timing_trace=self.timing_trace_var.get())
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", str(e))
+            return
+        except tk.TclError:
+            # 并行进程数输入框为空或不是整数时 IntVar.get() 抛出 TclError
+            messagebox.showerror("错误", "并行进程数必须为整数")
+            return
+        file_pairs = list(self.file_pairs)
+        
+        # 重置进度显示
+        self.cancel_event.clear()
+        self.compare_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL, bg='#e67e22')
+        self.progress_bar.config(maximum=len(file_pairs), value=0)
+        self.progress_label.config(text=f"已完成 0/{len(file_pairs)} 对")
+        self.batch_start_time = time.perf_counter()
+        self.batch_total = len(file_pairs)
+        self.batch_cells = 0
+        
+        self.worker_thread = threading.Thread(target=self.run_batch_in_background,
+                                              args=(comparer, file_pairs), daemon=True)
+        self.worker_thread.start()
     
-    def compare_file_pair(self, pair, save_dir):
-        """比较单对文件"""
+    def run_batch_in_background(self, comparer, file_pairs):
+        """在后台线程中执行批量比较，结果通过事件队列交回主线程"""
+        def progress(done, total, result):
+            cells = result['statistics']['total_cells'] if result else 0
+            self.events.put(('progress', done, total, cells))
+        
         try:
-            # 读取Excel文件
-            df1 = pd.read_excel(pair['file_a'])
-            df2 = pd.read_excel(pair['file_b'])
-            
-            # 解析行范围
-            range_text = self.range_entry.get().strip()
-            
-            # 初始化行索引列表
-            rows_to_compare = []
-            
-            if range_text:
-                if '-' in range_text:  # 处理范围格式 "1-100"
-                    start, end = map(int, range_text.split('-'))
-                    rows_to_compare = list(range(start, end + 1))
-                elif ',' in range_text:  # 处理离散行格式 "1,3,4,9"
-                    rows_to_compare = [int(x.strip()) for x in range_text.split(',')]
-                else:  # 单个数字
-                    rows_to_compare = [int(range_text)]
-            else:  # 如果为空，比较所有行
-                rows_to_compare = list(range(1, min(len(df1) + 1, len(df2) + 1)))
-            
-            # 转换为0基索引并过滤有效范围
-            valid_indices = []
-            for row in rows_to_compare:
-                idx = row - 1
-                if 0 <= idx < len(df1) and 0 <= idx < len(df2):
-                    valid_indices.append(idx)
-            
-            if not valid_indices:
-                return None
-            
-            # 提取指定行进行比较
-            df1_compare = df1.iloc[valid_indices].copy()
-            df2_compare = df2.iloc[valid_indices].copy()
-            original_row_indices = [idx + 1 for idx in valid_indices]
-            
-            # 计算差异
-            differences = self.calculate_differences(df1_compare, df2_compare, original_row_indices)
-            
-            # 计算统计信息
-            min_rows = min(len(df1_compare), len(df2_compare))
-            min_cols = min(len(df1_compare.columns), len(df2_compare.columns))
-            total_cells = min_rows * min_cols
-            diff_count = len(differences)
-            similarity = ((total_cells - diff_count) / total_cells * 100) if total_cells > 0 else 100
-            
-            # 生成单个比较报告
-            report_filename = f"{pair['base_name']}_比较报告.xlsx"
-            report_path = os.path.join(save_dir, report_filename)
-            
-            self.generate_single_report(pair, df1_compare, df2_compare, differences, 
-                                      original_row_indices, report_path)
-            
-            # 返回比较结果用于汇总
-            return {
-                'pair': pair,
-                'differences': differences,
-                'statistics': {
-                    'total_cells': total_cells,
-                    'diff_count': diff_count,
-                    'similarity': similarity,
-                    'compared_rows': min_rows,
-                    'compared_cols': min_cols
-                }
-            }
-            
+            batch_dir, successful, failed = comparer.run_batch(
+                file_pairs, progress=progress, cancel_event=self.cancel_event)
+            self.events.put(('done', comparer, batch_dir, successful, failed))
         except Exception as e:
-            self.log_message(f"比较 {pair['base_name']} 时出错: {str(e)}")
-            return None
-    
-    def calculate_differences(self, df1, df2, original_row_indices):
-        """计算两个DataFrame之间的差异"""
-        differences = []
-        min_rows = min(len(df1), len(df2))
-        min_cols = min(len(df1.columns), len(df2.columns))
-        
-        for i in range(min_rows):
-            original_row = original_row_indices[i]
-            for j in range(min_cols):
-                val1 = df1.iloc[i, j]
-                val2 = df2.iloc[i, j]
-                
-                if not self.values_equal(val1, val2):
-                    differences.append({
-                        '原始行号': original_row,
-                        '列号': j + 1,
-                        '列名': df1.columns[j] if j < len(df1.columns) else f'列{j+1}',
-                        '文件A值': self.format_export_value(val1),
-                        '文件B值': self.format_export_value(val2),
-                        '差异类型': self.get_difference_type(val1, val2)
-                    })
-        
-        return differences
+            self.events.put(('error', str(e)))
     
-    def generate_single_report(self, pair, df1, df2, differences, original_row_indices, save_path):
-        """生成单个文件对的比较报告"""
-        with pd.ExcelWriter(save_path, engine='openpyxl') as writer:
-            # 1. 概览报告
-            min_rows = min(len(df1), len(df2))
-            min_cols = min(len(df1.columns), len(df2.columns))
-            total_cells = min_rows * min_cols
-            diff_count = len(differences)
-            similarity = ((total_cells - diff_count) / total_cells * 100) if total_cells > 0 else 100
-            
-            overview_data = {
-                '项目': [
-                    '基础文件名', '文件A', '文件B', '比较时间', '比较行范围',
-                    '文件A行数', '文件A列数', '文件B行数', '文件B列数',
-                    '比较的行数', '比较的列数', '不同单元格数', '相似度(%)'
-                ],
-                '值': [
-                    pair['base_name'],
-                    os.path.basename(pair['file_a']),
-                    os.path.basename(pair['file_b']),
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    self.range_entry.get().strip() or '所有行',
-                    len(df1), len(df1.columns), len(df2), len(df2.columns),
-                    min_rows, min_cols, diff_count, f"{similarity:.2f}%"
-                ]
-            }
-            overview_df = pd.DataFrame(overview_data)
-            overview_df.to_excel(writer, sheet_name='比较概览', index=False)
-            
-            # 2. 文件A数据
-            df1_export = df1.copy()
-            df1_export.insert(0, '原始行号', original_row_indices)
-            df1_export.to_excel(writer, sheet_name='文件A数据', index=False)
-            
-            # 3. 文件B数据
-            df2_export = df2.copy()
-            df2_export.insert(0, '原始行号', original_row_indices)
-            df2_export.to_excel(writer, sheet_name='文件B数据', index=False)
-            
-            # 4. 差异详情
-            if differences:
-                diff_df = pd.DataFrame(differences)
-                diff_df.to_excel(writer, sheet_name='差异详情', index=False)
-            else:
-                no_diff_df = pd.DataFrame({'说明': ['两个文件在指定范围内完全相同']})
-                no_diff_df.to_excel(writer, sheet_name='差异详情', index=False)
+    def cancel_batch_comparison(self):
+        """请求取消批量比较（不再开始新的文件对，正在比较的文件对完成后停止）"""
+        self.cancel_event.set()
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.log_message("正在取消，正在比较的文件对完成后停止...")
     
-    def generate_batch_summary(self, batch_dir, successful, failed):
-        """生成批量比较汇总报告"""
-        summary_path = os.path.join(batch_dir, "批量比较汇总.xlsx")
-        
-        with pd.ExcelWriter(summary_path, engine='openpyxl') as writer:
-            # 1. 汇总统计
-            summary_data = {
-                '项目': [
-                    '比较时间', '总文件对数', '成功比较', '失败比较', '成功率(%)',
-                    '比较行范围', '结果目录'
-                ],
-                '值': [
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    len(self.file_pairs), successful, failed,
-                    f"{(successful / len(self.file_pairs) * 100):.1f}%" if self.file_pairs else "0%",
-                    self.range_entry.get().strip() or '所有行',
-                    batch_dir
-                ]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='汇总统计', index=False)
-            
-            # 2. 文件对概览
-            pairs_overview = []
-            for result in self.batch_results:
-                pair = result['pair']
-                stats = result['statistics']
-                diff_count = stats['diff_count']
-                
-                pairs_overview.append({
-                    '基础名称': pair['base_name'],
-                    '文件A': os.path.basename(pair['file_a']),
-                    '文件B': os.path.basename(pair['file_b']),
-                    '比较行数': stats['compared_rows'],
-                    '比较列数': stats['compared_cols'],
-                    '总单元格数': stats['total_cells'],
-                    '差异单元格数': diff_count,
-                    '相似度(%)': f"{stats['similarity']:.2f}%",
-                    '状态': '有差异' if diff_count > 0 else '完全相同',
-                    '报告文件': f"{pair['base_name']}_比较报告.xlsx"
-                })
-            
-            pairs_df = pd.DataFrame(pairs_overview)
-            pairs_df.to_excel(writer, sheet_name='文件对概览', index=False)
-            
-            # 3. 所有差异详情汇总
-            all_differences = []
-            for result in self.batch_results:
-                pair = result['pair']
-                differences = result['differences']
-                
-                for diff in differences:
-                    all_differences.append({
-                        '文件对': pair['base_name'],
-                        '文件A': os.path.basename(pair['file_a']),
-                        '文件B': os.path.basename(pair['file_b']),
-                        '原始行号': diff['原始行号'],
-                        '列号': diff['列号'],
-                        '列名': diff['列名'],
-                        '文件A值': diff['文件A值'],
-                        '文件B值': diff['文件B值'],
-                        '差异类型': diff['差异类型']
-                    })
-            
-            if all_differences:
-                all_diff_df = pd.DataFrame(all_differences)
-                all_diff_df.to_excel(writer, sheet_name='所有差异详情', index=False)
-            else:
-                no_diff_df = pd.DataFrame({'说明': ['所有文件对在指定范围内都完全相同，没有发现任何差异。']})
-                no_diff_df.to_excel(writer, sheet_name='所有差异详情', index=False)
-            
-            # 4. 差异统计分析
-            if all_differences:
-                # 按文件对统计差异数量
-                diff_stats = []
-                for result in self.batch_results:
-                    pair = result['pair']
-                    stats = result['statistics']
-                    differences = result['differences']
-                    
-                    # 按列统计差异
-                    col_diff_count = {}
-                    for diff in differences:
-                        col_name = diff['列名']
-                        col_diff_count[col_name] = col_diff_count.get(col_name, 0) + 1
-                    
-                    # 找出差异最多的列
-                    max_diff_col = max(col_diff_count.items(), key=lambda x: x[1]) if col_diff_count else ('无', 0)
-                    
-                    diff_stats.append({
-                        '文件对': pair['base_name'],
-                        '总差异数': len(differences),
-                        '差异最多的列': max_diff_col[0],
-                        '该列差异数': max_diff_col[1],
-                        '差异率(%)': f"{(len(differences) / stats['total_cells'] * 100):.2f}%" if stats['total_cells'] > 0 else "0%"
-                    })
-                
-                diff_stats_df = pd.DataFrame(diff_stats)
-                diff_stats_df.to_excel(writer, sheet_name='差异统计分析', index=False)
-            
-            # 5. 有差异的文件列表（仅包含有差异的文件）
-            files_with_diff = []
-            for result in self.batch_results:
-                if result['statistics']['diff_count'] > 0:
-                    pair = result['pair']
-                    stats = result['statistics']
-                    
-                    files_with_diff.append({
-                        '文件对': pair['base_name'],
-                        '文件A路径': pair['file_a'],
-                        '文件B路径': pair['file_b'],
-                        '差异单元格数': stats['diff_count'],
-                        '相似度(%)': f"{stats['similarity']:.2f}%",
-                        '详细报告': f"{pair['base_name']}_比较报告.xlsx"
-                    })
-            
-            if files_with_diff:
-                files_diff_df = pd.DataFrame(files_with_diff)
-                files_diff_df.to_excel(writer, sheet_name='有差异的文件', index=False)
-            else:
-                no_diff_files_df = pd.DataFrame({'说明': ['所有文件对都完全相同，没有差异。']})
-                no_diff_files_df.to_excel(writer, sheet_name='有差异的文件', index=False)
-        
-        self.log_message(f"详细汇总报告已生成：{summary_path}")
+    def update_progress(self, done, total, cells):
+        """更新进度条、处理速度和预计剩余时间"""
+        self.batch_cells += cells
+        elapsed = max(time.perf_counter() - self.batch_start_time, 1e-6)
+        cells_per_sec = self.batch_cells / elapsed
+        remaining = elapsed / done * (total - done)
+        eta = time.strftime('%H:%M:%S', time.gmtime(remaining))
+        
+        self.progress_bar.config(value=done)
+        self.progress_label.config(
+            text=f"已完成 {done}/{total} 对 | {cells_per_sec:,.0f} 单元格/秒 | 预计剩余 {eta}")
     
-    def values_equal(self, val1, val2):
-        """比较两个值是否相等，处理NaN和空值"""
-        if pd.isna(val1) and pd.isna(val2):
-            return True
-        if pd.isna(val1) or pd.isna(val2):
-            return False
+    def finish_batch_comparison(self, comparer=None, batch_dir=None, successful=0, failed=0, error=None):
+        """批量比较结束后恢复界面并显示结果"""
+        self.compare_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED, bg='#95a5a6')
         
-        str1 = str(val1).strip()
-        str2 = str(val2).strip()
+        if error is not None:
+            error_msg = f"批量比较失败: {error}"
+            self.log_message(error_msg)
+            messagebox.showerror("错误", error_msg)
+            return
         
-        if str1 in ['', 'None', 'nan'] and str2 in ['', 'None', 'nan']:
-            return True
+        self.batch_results = comparer.batch_results
+        title = "批量比较已取消" if comparer.cancelled else "批量比较完成"
+        # 取消时正在比较的文件对已计入成功或失败数，其余文件对未比较
+        skipped = self.batch_total - successful - failed
+        cancelled_line = f"\n• 未比较: {skipped} 对" if comparer.cancelled else ''
         
-        return str1 == str2
-    
-    def format_export_value(self, value):
-        """格式化导出值"""
-        if pd.isna(value):
-            return "[空值]"
-        elif str(value).strip() == "":
-            return "[空字符串]"
-        else:
-            return value
-    
-    def get_difference_type(self, val1, val2):
-        """获取差异类型"""
-        if pd.isna(val1) and not pd.isna(val2):
-            return "文件A为空值"
-        elif not pd.isna(val1) and pd.isna(val2):
-            return "文件B为空值"
-        elif str(val1).strip() == "" and str(val2).strip() != "":
-            return "文件A为空字符串"
-        elif str(val1).strip() != "" and str(val2).strip() == "":
-            return "文件B为空字符串"
-        else:
-            return "值不同"
+        # 显示完成消息
+        result_msg = f"""{title}！
+
+📊 比较结果:
+• 成功比较: {successful} 对
+• 失败比较: {failed} 对{cancelled_line}
+• 总计: {self.batch_total} 对
+
+📁 结果保存在:
+{batch_dir}
+
+是否要打开结果目录？"""
+        
+        if messagebox.askyesno(title, result_msg):
+            # 打开结果目录
+            if os.name == 'nt':  # Windows
+                os.startfile(batch_dir)
+            elif os.name == 'posix':  # macOS/Linux
+                os.system(f'open "{batch_dir}"')
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,7 @@
+"""测试公共设置：把项目根目录加入 sys.path，使测试可以直接导入项目模块"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
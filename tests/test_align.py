@@ -0,0 +1,158 @@
+"""行对齐测试：按关键列哈希对齐和按整行哈希的序列差异对齐（patience 锚点 + Myers），以及报告中的新增行和删除行工作表"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_compare_align import align_by_key_hashes, align_by_sequence, myers_matches
+from excel_compare_core import ExcelComparer
+
+
+def lcs_length(a, b):
+    """动态规划求最长公共子序列长度（参照实现）"""
+    lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, value_a in enumerate(a):
+        for j, value_b in enumerate(b):
+            lengths[i + 1][j + 1] = (lengths[i][j] + 1 if value_a == value_b
+                                     else max(lengths[i][j + 1], lengths[i + 1][j]))
+    return lengths[-1][-1]
+
+
+def assert_valid_alignment(alignment, length_a, length_b):
+    """匹配行在两边都严格递增（单调的一一匹配），匹配行与仅一边有的行恰好覆盖全部行"""
+    matched_a, matched_b, only_a, only_b = (np.asarray(values) for values in alignment)
+    assert len(matched_a) == len(matched_b)
+    assert np.all(np.diff(matched_a) > 0)
+    assert np.all(np.diff(matched_b) > 0)
+    assert sorted(matched_a.tolist() + only_a.tolist()) == list(range(length_a))
+    assert sorted(matched_b.tolist() + only_b.tolist()) == list(range(length_b))
+
+
+def align(a, b, max_edits=2000):
+    alignment = align_by_sequence(np.array(a, dtype=np.uint64), np.array(b, dtype=np.uint64), max_edits)
+    assert alignment is not None
+    assert_valid_alignment(alignment, len(a), len(b))
+    return [values.tolist() for values in alignment]
+
+
+def test_identical_sequences():
+    assert align([1, 2, 3], [1, 2, 3]) == [[0, 1, 2], [0, 1, 2], [], []]
+
+
+def test_pure_insert():
+    a = list(range(10))
+    b = a[:3] + [100, 101] + a[3:]
+    matched_a, matched_b, removed, added = align(a, b)
+    assert matched_a == list(range(10))
+    assert matched_b == [0, 1, 2] + list(range(5, 12))
+    assert (removed, added) == ([], [3, 4])
+
+
+def test_pure_delete():
+    a = list(range(10))
+    b = a[:2] + a[5:]
+    matched_a, matched_b, removed, added = align(a, b)
+    assert matched_a == [0, 1, 5, 6, 7, 8, 9]
+    assert matched_b == list(range(7))
+    assert (removed, added) == ([2, 3, 4], [])
+
+
+def test_replaced_row_is_paired():
+    # 修改过的行哈希不同，表现为一删一插，同一间隙中的删除行和插入行配对后按单元格比较
+    matched_a, matched_b, removed, added = align([1, 2, 3, 4, 5], [1, 2, 9, 4, 5])
+    assert matched_a == [0, 1, 2, 3, 4]
+    assert matched_b == [0, 1, 2, 3, 4]
+    assert (removed, added) == ([], [])
+
+
+def test_replace_with_extra_insert():
+    matched_a, matched_b, removed, added = align([1, 2, 3, 4], [1, 8, 9, 4])
+    assert matched_a == [0, 1, 2, 3]
+    assert matched_b == [0, 1, 2, 3]
+    matched_a, matched_b, removed, added = align([1, 2, 4], [1, 8, 9, 4])
+    assert (removed, added) == ([], [2])
+
+
+def test_repeated_rows_without_anchors():
+    # 所有行都重复出现，没有唯一行可作锚点，只能用 Myers 对齐
+    a = [1, 2, 1, 2, 1, 2]
+    b = [1, 2, 1, 2]
+    matched_a, matched_b, removed, added = align(a, b)
+    assert len(removed) == 2 and added == []
+    assert [a[i] for i in matched_a] == [b[j] for j in matched_b]
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_random_repeated_rows_match_lcs(seed):
+    rng = np.random.default_rng(seed)
+    # 每个值在两边都至少出现两次，没有唯一行，对齐结果中相同的行数应等于最长公共子序列长度
+    a = rng.integers(0, 3, int(rng.integers(0, 30))).tolist() + [0, 0, 1, 1, 2, 2]
+    b = rng.integers(0, 3, int(rng.integers(0, 30))).tolist() + [0, 0, 1, 1, 2, 2]
+    matched_a, matched_b, _, _ = align(a, b)
+    equal_pairs = sum(a[i] == b[j] for i, j in zip(matched_a, matched_b))
+    assert equal_pairs == lcs_length(a, b)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_random_sequences_give_valid_alignment(seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 40, int(rng.integers(0, 60))).tolist()
+    b = [value for value in a if rng.random() > 0.2]
+    for position in rng.integers(0, len(b) + 1, int(rng.integers(0, 5))):
+        b.insert(int(position), int(rng.integers(100, 110)))
+    align(a, b)
+
+
+def test_empty_sides():
+    assert align([], [1, 2]) == [[], [], [], [0, 1]]
+    assert align([1, 2], []) == [[], [], [0, 1], []]
+
+
+def test_returns_none_when_edits_exceed_limit():
+    a = list(range(100))
+    b = list(range(100, 200))
+    assert align_by_sequence(np.array(a), np.array(b), max_edits=10) is None
+    # 不超过上限时不退回
+    assert align_by_sequence(np.array(a), np.array(b), max_edits=200) is not None
+
+
+def test_returns_none_when_myers_exceeds_limit():
+    # 没有唯一行的区段编辑距离超过上限
+    a = [1, 2] * 20
+    b = [2, 2, 1, 1] * 10
+    assert align_by_sequence(np.array(a), np.array(b), max_edits=4) is None
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_myers_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 4, int(rng.integers(0, 25))).tolist()
+    b = rng.integers(0, 4, int(rng.integers(0, 25))).tolist()
+    pairs = myers_matches(a, b, len(a) + len(b))
+    assert all(a[i] == b[j] for i, j in pairs)
+    assert all(i1 < i2 and j1 < j2 for (i1, j1), (i2, j2) in zip(pairs, pairs[1:]))
+    assert len(pairs) == lcs_length(a, b)
+    edits = len(a) + len(b) - 2 * len(pairs)
+    if edits:
+        assert myers_matches(a, b, edits - 1) is None
+
+
+def test_key_hashes_pair_duplicates_in_order():
+    matched_a, matched_b, only_a, only_b = align_by_key_hashes([5, 7, 5, 9], [7, 5, 5, 5, 3])
+    assert list(zip(matched_a.tolist(), matched_b.tolist())) == [(0, 1), (1, 0), (2, 2)]
+    assert only_a.tolist() == [3]
+    assert only_b.tolist() == [3, 4]
+
+
+@pytest.mark.parametrize('ids_b, expected_sheets', [
+    ([1, 2, 3], []),
+    ([1, 2, 3, 4], ['新增行']),
+    ([1, 3], ['删除行']),
+    ([1, 3, 4], ['新增行', '删除行']),
+])
+def test_added_and_removed_sheets_only_when_not_empty(ids_b, expected_sheets):
+    df1 = pd.DataFrame({'id': [1, 2, 3], '值': ['a', 'b', 'c']})
+    df2 = pd.DataFrame({'id': ids_b, '值': ['a'] * len(ids_b)})
+    comparer = ExcelComparer(key_columns=['id'], log=lambda message: None)
+    columns = comparer.columns.align(df1.columns, df2.columns)
+    comparison = comparer.compare_frames(df1, df2, np.arange(1, 4), np.arange(1, len(ids_b) + 1), columns)
+    assert list(comparison['sheets']) == expected_sheets
@@ -0,0 +1,61 @@
+"""批量比较测试：工作进程的比较选项和取消批量比较"""
+import os
+import threading
+
+import openpyxl
+
+import excel_compare_core
+from excel_compare_core import ExcelComparer, compare_pair_in_worker
+
+
+def write_workbook(path, sheets):
+    """写入工作簿，sheets 为 {工作表名: 行列表（首行为表头）}"""
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def make_pair(directory, base_name, changed=False):
+    """两个工作表的文件对，changed 时文件B的第2行不同"""
+    sheets_a = {name: [['编号', '名称'], [1, 'a'], [2, 'b']] for name in ('Sheet1', 'Sheet2')}
+    sheets_b = {name: [['编号', '名称'], [1, 'a'], [2, 'x' if changed else 'b']] for name in ('Sheet1', 'Sheet2')}
+    file_a = directory / f'{base_name}-A.xlsx'
+    file_b = directory / f'{base_name}-B.xlsx'
+    write_workbook(file_a, sheets_a)
+    write_workbook(file_b, sheets_b)
+    return {'base_name': base_name, 'file_a': str(file_a), 'file_b': str(file_b)}
+
+
+def test_worker_options_keep_workers(tmp_path):
+    comparer = ExcelComparer(workers=4, cache_dir=str(tmp_path / 'cache'))
+    assert ExcelComparer(**comparer.comparer_options()).workers == 4
+    # 进程数不影响比较结果，不计入结果缓存键
+    assert 'workers' not in comparer.cache_key_options()
+
+
+def test_worker_compares_sheets_sequentially(tmp_path, monkeypatch):
+    def no_thread_pool(*args, **kwargs):
+        raise AssertionError('工作进程内不应启动工作表线程池')
+
+    monkeypatch.setattr(excel_compare_core, 'ThreadPoolExecutor', no_thread_pool)
+    monkeypatch.setattr(excel_compare_core.os, 'cpu_count', lambda: 8)
+    pair = make_pair(tmp_path, 'p', changed=True)
+    options = ExcelComparer(workers=4).comparer_options()
+    result, _ = compare_pair_in_worker(options, pair, str(tmp_path))
+    assert result['statistics']['diff_count'] == 2
+
+
+def test_cancel_reports_every_finished_pair(tmp_path):
+    pairs = [make_pair(tmp_path, f'p{i}') for i in range(12)]
+    cancel_event = threading.Event()
+    comparer = ExcelComparer(workers=3, log=lambda message: None)
+    batch_dir, successful, failed = comparer.run_batch(
+        pairs, str(tmp_path / 'out'), progress=lambda *args: cancel_event.set(), cancel_event=cancel_event)
+    reports = [name for name in os.listdir(batch_dir) if name.endswith('_比较报告.xlsx')]
+    assert comparer.cancelled
+    # 取消时正在比较的文件对也计入结果，汇总与结果目录中的报告一致
+    assert successful == len(comparer.batch_results) == len(reports)
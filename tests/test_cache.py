@@ -0,0 +1,126 @@
+"""缓存测试：结果缓存的命中、未命中、失效和LRU淘汰，解析缓存保存后读取的数据和类型不变"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_compare_cache import ResultCache, SheetCache
+
+OPTIONS = {'row_range': '', 'compare_mode': 'text'}
+
+
+def write_file(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+    return str(path)
+
+
+@pytest.fixture
+def pair(tmp_path):
+    return {
+        'base_name': 'report',
+        'file_a': write_file(tmp_path / 'a.xlsx', b'content a'),
+        'file_b': write_file(tmp_path / 'b.xlsx', b'content b'),
+    }
+
+
+def store_entry(cache, key, report_path, content=b'report'):
+    write_file(report_path, content)
+    result = {'differences': [{'row': 1}], 'statistics': {'diff_count': 1}, 'report_path': str(report_path)}
+    cache.store(key, result, str(report_path))
+
+
+def test_result_cache_miss_then_hit(tmp_path, pair):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = cache.make_key(pair, OPTIONS)
+    restored = str(tmp_path / 'restored.xlsx')
+    assert cache.load(key, restored) is None
+
+    store_entry(cache, key, tmp_path / 'report.xlsx', b'report data')
+    assert cache.make_key(pair, OPTIONS) == key
+    result = cache.load(key, restored)
+    assert result == {'differences': [{'row': 1}], 'statistics': {'diff_count': 1}}
+    with open(restored, 'rb') as f:
+        assert f.read() == b'report data'
+
+
+def test_result_cache_key_changes_with_file_content(tmp_path, pair):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = cache.make_key(pair, OPTIONS)
+    write_file(pair['file_b'], b'content b changed')
+    assert cache.make_key(pair, OPTIONS) != key
+    # 内容恢复后缓存键也恢复
+    write_file(pair['file_b'], b'content b')
+    assert cache.make_key(pair, OPTIONS) == key
+
+
+def test_result_cache_key_changes_with_options(tmp_path, pair):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    key = cache.make_key(pair, OPTIONS)
+    assert cache.make_key(pair, dict(OPTIONS, row_range='1-10')) != key
+    assert cache.make_key(pair, dict(OPTIONS, compare_mode='numeric')) != key
+    assert cache.make_key(dict(pair, base_name='other'), OPTIONS) != key
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=10 ** 9)
+    for i, key in enumerate(['first', 'second', 'third']):
+        store_entry(cache, key, tmp_path / f'{key}.xlsx', b'x' * 100)
+        for path in cache.entry_paths(key):
+            os.utime(path, (1000 + i, 1000 + i))
+    # 访问最早保存的条目后，它成为最近使用的条目
+    assert cache.load('first', str(tmp_path / 'restored.xlsx')) is not None
+
+    entry_size = sum(os.path.getsize(path) for path in cache.entry_paths('first'))
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+    assert [key for key in ('first', 'second', 'third')
+            if os.path.exists(cache.entry_paths(key)[0])] == ['first', 'third']
+
+    cache.max_bytes = entry_size
+    cache.evict()
+    assert [key for key in ('first', 'second', 'third')
+            if os.path.exists(cache.entry_paths(key)[0])] == ['first']
+
+
+def make_sheets():
+    index = pd.Index([1, 2, 5, 9])
+    sheet = pd.DataFrame({
+        '文本': pd.array(['a', None, '', 'nan'], dtype='str'),
+        '整数': np.array([1, 2, 3, 4], dtype=np.int64),
+        '小数': [1.5, np.nan, -0.0, 3.0],
+        '日期': pd.to_datetime(['2024-01-01 00:00:00', None, '2024-03-01 12:30:00', '2024-12-31 00:00:00']),
+        '混合': np.array([1, 'b', None, 2.5], dtype=object),
+        '布尔': [True, False, True, False],
+    }, index=index)
+    objects_only = pd.DataFrame({'混合': np.array(['x', 1], dtype=object)}, index=pd.Index([3, 4]))
+    return {'Sheet1': sheet, '全部混合': objects_only, '空表': pd.DataFrame(index=pd.Index([], dtype=np.int64))}
+
+
+def test_sheet_cache_round_trip_preserves_dtypes(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = SheetCache(str(tmp_path / 'sheets'))
+    source = write_file(tmp_path / 'a.xlsx', b'content a')
+    key = cache.make_key(source, {'engine': 'openpyxl'})
+    assert cache.load(key) is None
+
+    sheets = make_sheets()
+    cache.store(key, sheets)
+    loaded = cache.load(key)
+    assert list(loaded) == list(sheets)
+    for name, df in sheets.items():
+        pd.testing.assert_frame_equal(loaded[name], df)
+    assert np.signbit(loaded['Sheet1']['小数'].iloc[2])
+    assert loaded['Sheet1']['混合'].tolist()[:2] == [1, 'b']
+
+
+def test_sheet_cache_key_depends_on_content_and_options(tmp_path):
+    cache = SheetCache(str(tmp_path / 'sheets'))
+    source = write_file(tmp_path / 'a.xlsx', b'content a')
+    key = cache.make_key(source, {'engine': 'openpyxl'})
+    assert cache.make_key(source, {'engine': 'openpyxl'}) == key
+    assert cache.make_key(source, {'engine': 'calamine'}) != key
+    write_file(source, b'content a, changed')
+    os.utime(source, ns=(10 ** 18, 10 ** 18))
+    assert cache.make_key(source, {'engine': 'openpyxl'}) != key
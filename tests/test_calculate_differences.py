@@ -0,0 +1,131 @@
+"""向量化差异计算与逐单元格比较（values_equal/get_difference_type）的等价性测试
+
+参照实现逐个单元格调用 values_equal 和 get_difference_type（向量化之前的比较方式），
+要求 calculate_differences 和带行哈希预检的 calculate_changed_row_differences 输出完全相同的
+(原始行号, 列号, 列名, 文件A值, 文件B值, 差异类型)。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_compare_core import ExcelComparer, get_difference_type, values_equal
+from excel_compare_diffs import format_export_value
+
+
+def reference_differences(df1, df2, row_numbers):
+    """参照实现：逐单元格比较两个DataFrame共有的行和列"""
+    rows = []
+    for i in range(min(len(df1), len(df2))):
+        for j in range(min(len(df1.columns), len(df2.columns))):
+            value1 = df1.iloc[i, j]
+            value2 = df2.iloc[i, j]
+            if not values_equal(value1, value2):
+                rows.append((row_numbers[i], j + 1, df1.columns[j], format_export_value(value1),
+                             format_export_value(value2), get_difference_type(value1, value2)))
+    return rows
+
+
+def vectorized_differences(df1, df2, row_numbers, row_hash_precheck):
+    """被测实现：按行号对齐、按列位置对齐时的差异（去掉工作表名）"""
+    comparer = ExcelComparer(row_hash_precheck=row_hash_precheck, log=lambda message: None)
+    columns = comparer.columns.align(df1.columns, df2.columns)
+    differences, _ = comparer.calculate_changed_row_differences(df1, df2, row_numbers, columns)
+    return [row[1:] for row in differences.iter_rows()]
+
+
+def assert_equivalent(df1, df2, row_numbers=None):
+    """断言预检开启和关闭时的结果都与参照实现一致"""
+    if row_numbers is None:
+        row_numbers = list(range(1, max(len(df1), len(df2)) + 1))
+    expected = reference_differences(df1, df2, row_numbers)
+    for row_hash_precheck in (True, False):
+        assert vectorized_differences(df1, df2, row_numbers, row_hash_precheck) == expected
+
+
+# 随机生成的单元格值：空值、等价的空字符串表示、首尾空白、数值文本、正负零和日期
+OBJECT_VALUES = [None, np.nan, '', ' ', 'nan', 'None', 'a', ' a ', 'b', '1', '1.0', 1, 1.0, 2, 0.0, -0.0,
+                 pd.Timestamp('2024-01-01'), '2024-01-01']
+
+
+def random_column(kind, rows, rng):
+    """生成一列随机数据，kind 为列类型"""
+    if kind == 'int':
+        return pd.Series(rng.integers(-2, 3, rows), dtype='int64')
+    if kind == 'float':
+        values = rng.choice([0.0, -0.0, 1.0, 1.5, -2.0, np.nan], rows)
+        return pd.Series(values, dtype='float64')
+    if kind == 'date':
+        values = pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 3, rows), unit='D')
+        series = pd.Series(values)
+        series[rng.random(rows) < 0.2] = pd.NaT
+        return series
+    if kind == 'str':
+        values = rng.choice(['a', ' a', 'b', '', 'nan', 'None', '1'], rows).astype(object)
+        values[rng.random(rows) < 0.2] = None
+        return pd.Series(values, dtype='str')
+    values = np.empty(rows, dtype=object)
+    values[:] = [OBJECT_VALUES[k] for k in rng.integers(0, len(OBJECT_VALUES), rows)]
+    return pd.Series(values, dtype=object)
+
+
+COLUMN_KINDS = ('int', 'float', 'date', 'str', 'object')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_mixed_frames(seed):
+    rng = np.random.default_rng(seed)
+    rows = int(rng.integers(1, 60))
+    cols = int(rng.integers(1, 8))
+    data1, data2 = {}, {}
+    for j in range(cols):
+        kind1 = COLUMN_KINDS[rng.integers(len(COLUMN_KINDS))]
+        # 大多数列两边类型相同，部分列类型不同（如整数与浮点数、日期与文本）
+        kind2 = kind1 if rng.random() < 0.6 else COLUMN_KINDS[rng.integers(len(COLUMN_KINDS))]
+        column1 = random_column(kind1, rows, rng)
+        column2 = random_column(kind2, rows, rng)
+        if kind1 == kind2:
+            # 同类型列保留约一半相同的值，使行哈希预检能跳过部分行
+            same = rng.random(rows) < 0.5
+            column2 = column2.where(~same, column1)
+        data1[f'列{j}'] = column1
+        data2[f'列{j}'] = column2
+    df1 = pd.DataFrame(data1)
+    df2 = pd.DataFrame(data2)
+    # 随机增减行和列，只比较两边共有的部分
+    df2 = df2.iloc[:max(1, rows - int(rng.integers(0, 3)))]
+    if cols > 1 and rng.random() < 0.3:
+        df2 = df2.iloc[:, :-1]
+    row_numbers = sorted(rng.choice(np.arange(1, 10 * rows + 1), rows, replace=False).tolist())
+    assert_equivalent(df1, df2, row_numbers)
+
+
+def test_missing_and_blank_values():
+    df1 = pd.DataFrame({'x': pd.Series([None, np.nan, 'nan', '', ' ', 'None', 'a', None, ''], dtype=object)})
+    df2 = pd.DataFrame({'x': pd.Series([np.nan, 'nan', None, 'None', '', ' ', ' a ', '', None], dtype=object)})
+    assert_equivalent(df1, df2)
+
+
+def test_signed_zero():
+    df1 = pd.DataFrame({'x': [0.0, -0.0, 0.0, np.nan], 'y': pd.Series([0.0, -0.0, 1, 'a'], dtype=object)})
+    df2 = pd.DataFrame({'x': [-0.0, -0.0, 0.0, -0.0], 'y': pd.Series([-0.0, 0.0, 1.0, 'a'], dtype=object)})
+    assert_equivalent(df1, df2)
+
+
+def test_datetimes():
+    dates1 = pd.Series(pd.to_datetime(['2024-01-01 00:00:00', '2024-01-02 12:00:00', None, '2024-03-01 00:00:00']))
+    dates2 = pd.Series(pd.to_datetime(['2024-01-01 00:00:00', '2024-01-02 00:00:00', '2024-02-01 00:00:00', None]))
+    text = pd.Series(['2024-01-01 00:00:00', '2024-01-02', None, '2024-03-01'], dtype=object)
+    assert_equivalent(pd.DataFrame({'d': dates1, 'e': dates1}), pd.DataFrame({'d': dates2, 'e': text}))
+
+
+def test_int_vs_float_columns():
+    df1 = pd.DataFrame({'n': pd.Series([1, 2, 3, 0], dtype='int64'), 'm': [1.0, 2.5, np.nan, -0.0]})
+    df2 = pd.DataFrame({'n': pd.Series([1.0, 2.0, np.nan, -0.0], dtype='float64'),
+                        'm': pd.Series([1, 2, 3, 0], dtype='int64')})
+    assert_equivalent(df1, df2)
+
+
+def test_identical_frames_have_no_differences():
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', None], 'c': [0.5, np.nan]})
+    assert_equivalent(df, df.copy())
+    assert reference_differences(df, df.copy(), [1, 2]) == []
@@ -0,0 +1,95 @@
+"""列对齐测试：按列位置和按表头名称对齐、表头归一化、列别名和列对应关系缓存"""
+import pandas as pd
+import pytest
+
+from excel_compare_columns import ColumnAligner, normalize_header, parse_column_aliases
+
+
+def test_position_alignment_compares_common_prefix():
+    mapping = ColumnAligner('position').align(['a', 'b', 'c'], ['x', 'y'])
+    assert mapping.positions_a.tolist() == [0, 1]
+    assert mapping.positions_b.tolist() == [0, 1]
+    assert mapping.prefix
+    assert mapping.removed == ['c'] and mapping.added == []
+    assert mapping.renamed == []
+
+
+def test_header_alignment_reordered_columns():
+    mapping = ColumnAligner('header').align(['a', 'b', 'c'], ['c', 'a', 'b'])
+    assert mapping.positions_b.tolist() == [1, 2, 0]
+    assert mapping.names_b == ['a', 'b', 'c']
+    assert not mapping.prefix
+    assert mapping.columns_b([0, 2]).tolist() == [1, 0]
+
+
+def test_header_alignment_added_and_dropped_columns():
+    mapping = ColumnAligner('header').align(['id', 'name', 'old'], ['new', 'name', 'id'])
+    assert mapping.names_a == ['id', 'name']
+    assert mapping.positions_b.tolist() == [2, 1]
+    assert mapping.removed == ['old']
+    assert mapping.added == ['new']
+    assert mapping.statistics() == {'added_cols': 1, 'removed_cols': 1}
+    assert mapping.b_positions.tolist() == [2, 1, -1]
+    assert [label for label, _ in mapping.overview()] == ['文件B新增列', '文件B删除列']
+
+
+def test_header_alignment_renamed_columns_by_alias():
+    aligner = ColumnAligner('header', aliases=parse_column_aliases('客户名称=客户名'))
+    mapping = aligner.align(['客户名', '金额'], ['金额', '客户名称'])
+    assert mapping.positions_b.tolist() == [1, 0]
+    assert mapping.renamed == [('客户名', '客户名称')]
+    assert mapping.overview()[-1][0] == '名称不同的对应列'
+
+
+def test_header_alignment_duplicate_names_pair_in_order():
+    mapping = ColumnAligner('header').align(['v', 'k', 'v'], ['v', 'v', 'k'])
+    assert mapping.positions_b.tolist() == [0, 2, 1]
+
+
+def test_header_normalization():
+    assert normalize_header('  Ｃｕｓｔｏｍｅｒ \t Name ') == 'customer name'
+    mapping = ColumnAligner('header', normalize=True).align([' Amount ', 'ＩＤ'], ['id', 'AMOUNT'])
+    assert mapping.positions_b.tolist() == [1, 0]
+    assert mapping.renamed == [(' Amount ', 'AMOUNT'), ('ＩＤ', 'id')]
+    # 不归一化时表头必须完全相同
+    with pytest.raises(ValueError):
+        ColumnAligner('header').align([' Amount ', 'ＩＤ'], ['id', 'AMOUNT'])
+
+
+def test_header_alignment_without_common_columns_raises():
+    with pytest.raises(ValueError):
+        ColumnAligner('header').align(['a'], ['b'])
+
+
+@pytest.mark.parametrize('text', ['a', 'a=', '=b', 'a=a'])
+def test_invalid_column_aliases_raise(text):
+    with pytest.raises(ValueError):
+        parse_column_aliases(text)
+
+
+def test_invalid_alignment_raises():
+    with pytest.raises(ValueError):
+        ColumnAligner('name')
+
+
+def test_mapping_is_cached_by_headers():
+    aligner = ColumnAligner('header', normalize=True)
+    first = aligner.align(pd.Index(['a', 'b']), pd.Index(['b', 'a']))
+    assert aligner.align(['a', 'b'], ['b', 'a']) is first
+    assert aligner.align(['a', 'b'], ['a', 'b']) is not first
+    assert len(aligner.mappings) == 2
+
+
+def test_key_columns_remapped_to_file_b():
+    aligner = ColumnAligner('header', aliases=(('编号', 'ID'),))
+    mapping = aligner.align(['ID', '名称', '备注'], ['名称', '编号'])
+    assert mapping.names_in_b(['ID', '名称', '备注']) == ['编号', '名称', None]
+
+
+def test_select_returns_matched_columns_in_a_order():
+    df1 = pd.DataFrame({'a': [1], 'b': [2], 'c': [3]})
+    df2 = pd.DataFrame({'c': [30], 'x': [0], 'a': [10]})
+    mapping = ColumnAligner('header').align(df1.columns, df2.columns)
+    selected1, selected2 = mapping.select(df1, df2)
+    assert list(selected1.columns) == ['a', 'c']
+    assert list(selected2.columns) == ['a', 'c']
@@ -0,0 +1,94 @@
+"""行范围解析和按索引选取行的测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_compare_ranges import RowRange, merge_row_ranges, parse_row_ranges
+
+
+@pytest.mark.parametrize('text', ['', '   ', None])
+def test_empty_range_means_all_rows(text):
+    row_range = RowRange(text)
+    assert row_range.all_rows
+    assert row_range.read_rows() is None
+    assert parse_row_ranges(text) is None
+    assert row_range.positions(pd.RangeIndex(1, 6)).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_single_row():
+    row_range = RowRange('7')
+    assert row_range.segments == ((7, 7),)
+    assert list(row_range.read_rows()) == [7]
+    assert row_range.positions(pd.RangeIndex(1, 11)).tolist() == [6]
+
+
+def test_closed_range():
+    row_range = RowRange(' 3 - 5 ')
+    assert row_range.text == '3 - 5'
+    assert row_range.segments == ((3, 5),)
+    assert row_range.read_rows() == range(3, 6)
+    assert list(row_range.iter_read_rows()) == [3, 4, 5]
+
+
+def test_mixed_list_keeps_input_order():
+    row_range = RowRange('1-3,9,5-6')
+    assert row_range.segments == ((1, 3), (9, 9), (5, 6))
+    assert row_range.merged == ((1, 3), (5, 6), (9, 9))
+    assert row_range.read_rows().tolist() == [1, 2, 3, 5, 6, 9]
+    assert row_range.positions(pd.RangeIndex(1, 11)).tolist() == [0, 1, 2, 8, 4, 5]
+
+
+def test_out_of_order_ranges():
+    row_range = RowRange('900-902,10,1-2')
+    assert row_range.clip(1, 1000).tolist() == [900, 901, 902, 10, 1, 2]
+    assert row_range.read_rows().tolist() == [1, 2, 10, 900, 901, 902]
+
+
+def test_overlapping_ranges_are_deduplicated():
+    row_range = RowRange('5-8,1-6,7')
+    assert row_range.overlapping
+    assert row_range.merged == ((1, 8),)
+    assert row_range.read_rows() == range(1, 9)
+    # 按输入顺序，重复的行只保留第一次出现
+    assert row_range.clip(1, 100).tolist() == [5, 6, 7, 8, 1, 2, 3, 4]
+
+
+def test_adjacent_ranges_are_merged_without_overlap():
+    assert merge_row_ranges([(4, 6), (1, 3), (8, 8)]) == [(1, 6), (8, 8)]
+    assert not RowRange('1-3,4-6').overlapping
+
+
+@pytest.mark.parametrize('text', ['a', '1-', '-5', '1--3', '1,,3', '3-1', '0', '0-4', '1.5', '1;2', '1-2-3'])
+def test_invalid_input_raises_value_error(text):
+    with pytest.raises(ValueError):
+        RowRange(text)
+
+
+def test_range_is_immutable():
+    row_range = RowRange('1-3')
+    with pytest.raises(AttributeError):
+        row_range.text = '4'
+
+
+def test_clip_to_available_rows():
+    row_range = RowRange('1-3,8-12')
+    assert row_range.clip(2, 10).tolist() == [2, 3, 8, 9]
+    assert row_range.clip(4, 8).tolist() == []
+
+
+def test_positions_in_sparse_index():
+    # 读取时只解析了行范围内的行（或中间有缺失的行），索引为不连续的数据行号
+    index = pd.Index([2, 3, 5, 8, 13, 21])
+    row_range = RowRange('21,1-5,8,30')
+    positions = row_range.positions(index)
+    assert positions.tolist() == [5, 0, 1, 2, 3]
+    assert index[positions].tolist() == [21, 2, 3, 5, 8]
+
+
+def test_positions_in_offset_range_index():
+    index = pd.RangeIndex(100, 110)
+    assert RowRange('98-101,109,200').positions(index).tolist() == [0, 1, 9]
+
+
+def test_positions_in_empty_index():
+    assert RowRange('1-3').positions(pd.Index([], dtype=np.int64)).tolist() == []
@@ -0,0 +1,52 @@
+"""读取测试：按行范围选择读取引擎，稀疏的行范围只转换选中的行"""
+import numpy as np
+import openpyxl
+import pytest
+
+from excel_compare_ranges import RowRange
+from excel_compare_reader import choose_engine, read_sheets, sparse_rows
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    """100行数据的小文件"""
+    path = tmp_path / 'data.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['编号', '名称', '金额'])
+    for i in range(1, 101):
+        sheet.append([i, f'name{i}', i * 1.5])
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize('range_text, sparse', [
+    ('', False), ('1-100', False), ('51-100', False), ('1-40,60-100', False),
+    ('1,100', True), ('3,50,90', True), ('90-100', True), ('100', True),
+])
+def test_sparse_rows(range_text, sparse):
+    assert sparse_rows(RowRange(range_text).read_rows()) == sparse
+
+
+def test_auto_engine_reads_sparse_rows_readonly(workbook_path):
+    assert choose_engine(workbook_path) == 'openpyxl'
+    assert choose_engine(workbook_path, rows=RowRange('1-100').read_rows()) == 'openpyxl'
+    assert choose_engine(workbook_path, rows=RowRange('3,50,90').read_rows()) == 'openpyxl-readonly'
+    # 指定了读取引擎时不改变
+    assert choose_engine(workbook_path, 'calamine', RowRange('3,50,90').read_rows()) == 'calamine'
+    # 旧版 .xls 文件不支持只读模式
+    assert choose_engine('data.xls', rows=RowRange('3,50,90').read_rows()) != 'openpyxl-readonly'
+
+
+def test_sparse_read_returns_only_selected_rows(workbook_path):
+    rows = RowRange('90,3,50').read_rows()
+    sheets, engine = read_sheets(workbook_path, rows=rows)
+    assert engine == 'openpyxl-readonly'
+    df = sheets['Sheet']
+    assert df.index.tolist() == [3, 50, 90]
+    assert df['编号'].tolist() == [3, 50, 90]
+    assert df['名称'].tolist() == ['name3', 'name50', 'name90']
+
+    full, _ = read_sheets(workbook_path, 'openpyxl', rows=rows)
+    selected = full['Sheet'].loc[[3, 50, 90]]
+    assert np.array_equal(selected.to_numpy(dtype=str), df.to_numpy(dtype=str))
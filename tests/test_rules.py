@@ -0,0 +1,42 @@
+"""类型感知比较规则测试：数值容差、日期格式无关比较，以及普通文本不被当作日期"""
+import numpy as np
+import pytest
+
+from excel_compare_rules import ColumnRule, parse_dates
+
+
+def values_equal(rule, pairs):
+    strings1 = np.array([value1 for value1, _ in pairs], dtype=object)
+    strings2 = np.array([value2 for _, value2 in pairs], dtype=object)
+    return rule.values_equal(strings1, strings2).tolist()
+
+
+def test_numbers_compared_with_tolerance():
+    rule = ColumnRule(abs_tol=0.01)
+    assert values_equal(rule, [('1', '1.0'), ('1.004', '1'), ('1.02', '1'), ('2024', '2024-01-01')]) == [
+        True, True, False, False]
+
+
+@pytest.mark.parametrize('value1, value2', [
+    ('2024-01-05', '2024/1/5'),
+    ('2024-01-05 00:00:00', '2024.01.05'),
+    ('2024/01/05', '01/05/2024'),
+    ('Jan 5 2024', '2024-01-05'),
+    ('5 Jan 2024', 'January 5, 2024'),
+    ('12:30', '12:30:00'),
+    ('2024-01-05 03:04:05', '2024/01/05 03:04:05'),
+])
+def test_dates_equal_regardless_of_format(value1, value2):
+    assert values_equal(ColumnRule(), [(value1, value2)]) == [True]
+
+
+def test_different_dates_and_text_differ():
+    pairs = [('2024-01-05', '2024-01-06'), ('March', 'march'), ('1 2', '01 02'), ('abc', 'ABC'), ('now', 'today')]
+    assert values_equal(ColumnRule(), pairs) == [False] * len(pairs)
+    assert values_equal(ColumnRule(ignore_date_format=False), [('2024-01-05', '2024/1/5')]) == [False]
+
+
+def test_parse_dates_skips_plain_text():
+    dates = parse_dates(np.array(['2024/1/5', 'March', '', 'Item 5', '05.01.2024'], dtype=object))
+    assert dates.isna().tolist() == [False, True, True, True, False]
+    assert parse_dates(np.array(['abc'], dtype=object)).isna().all()
@@ -0,0 +1,78 @@
+"""流式比较与内存比较的一致性测试：同一对文件在相同的行范围下应得到相同的统计信息、差异和差异详情工作表"""
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+from excel_compare_core import ExcelComparer
+
+# 两种模式都应一致的统计项（流式比较不区分两个文件的行数，读取引擎也不同）
+STATISTICS_FIELDS = ('total_cells', 'diff_count', 'different_cells', 'similarity', 'compared_rows',
+                     'compared_cols', 'skipped_rows', 'added_cols', 'removed_cols')
+
+HEADER = ['编号', '名称', '金额', '数量', '日期', '备注']
+
+
+def data_rows(changed=()):
+    """生成12行数据，第5行和第10行为空行（表格中间的空白行），changed 中的行号修改金额和名称"""
+    rows = []
+    for i in range(1, 13):
+        if i in (5, 10):
+            rows.append([None] * len(HEADER))
+            continue
+        amount = round(i * 1.25, 2) + (100 if i in changed else 0)
+        name = f'name{i}' if i not in changed else f'changed{i}'
+        rows.append([i, name, amount, i * 3, datetime(2024, 1, i), None if i % 3 else ' 备注 '])
+    return rows
+
+
+def write_workbook(path, rows):
+    """写入只有一个工作表的工作簿"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Sheet1'
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+@pytest.fixture
+def pair(tmp_path):
+    """只有第7行不同的文件对"""
+    file_a = tmp_path / 'p-A.xlsx'
+    file_b = tmp_path / 'p-B.xlsx'
+    write_workbook(file_a, data_rows())
+    write_workbook(file_b, data_rows(changed=(7,)))
+    return {'base_name': 'p', 'file_a': str(file_a), 'file_b': str(file_b)}
+
+
+def compare(pair, output_dir, **options):
+    """比较一对文件，返回 (比较结果, 报告中差异详情工作表的全部行)"""
+    output_dir.mkdir()
+    comparer = ExcelComparer(log=lambda message: None, **options)
+    result = comparer.compare_file_pair(pair, str(output_dir))
+    assert result is not None
+    report = openpyxl.load_workbook(output_dir / 'p_比较报告.xlsx', read_only=True)
+    detail_rows = list(report['差异详情'].iter_rows(values_only=True))
+    report.close()
+    return result, detail_rows
+
+
+@pytest.mark.parametrize('range_text', ['', '1-12', '3,8,9', '6-8', '1-4,7,11-12', '12,7,2'])
+@pytest.mark.parametrize('chunk_rows', [10000, 3])
+def test_streaming_matches_in_memory(pair, tmp_path, range_text, chunk_rows):
+    expected, expected_rows = compare(pair, tmp_path / 'memory', range_text=range_text)
+    actual, actual_rows = compare(pair, tmp_path / 'streaming', range_text=range_text, streaming=True,
+                                  chunk_rows=chunk_rows)
+
+    for name in STATISTICS_FIELDS:
+        assert actual['statistics'][name] == expected['statistics'][name], name
+    assert list(actual['differences'].iter_rows()) == list(expected['differences'].iter_rows())
+    assert actual_rows == expected_rows
+
+
+def test_range_without_differences_writes_note(pair, tmp_path):
+    result, detail_rows = compare(pair, tmp_path / 'streaming', range_text='3,8,9', streaming=True)
+    assert result['statistics']['diff_count'] == 0
+    assert detail_rows == [('说明',), ('两个文件在指定范围内完全相同',)]
@@ -0,0 +1,25 @@
+"""耗时记录测试：每对文件的峰值内存只包含该对文件，进程峰值内存包括之前的文件对"""
+import numpy as np
+import pytest
+
+from excel_compare_summary import combine_timings
+from excel_compare_timing import PairTimer, reset_peak_rss
+
+ALLOCATED_MB = 32
+
+
+@pytest.mark.skipif(not reset_peak_rss(), reason='只有 Linux 支持重置进程峰值内存')
+def test_pair_peak_excludes_earlier_pairs():
+    large = PairTimer()
+    data = np.ones(ALLOCATED_MB * 1024 * 1024 // 8)
+    del data
+    first = large.record()
+
+    small = PairTimer()
+    second = small.record()
+    assert first['peak_rss_mb'] - second['peak_rss_mb'] > ALLOCATED_MB / 2
+    assert second['process_peak_rss_mb'] >= first['peak_rss_mb']
+
+    totals = combine_timings([first, second])
+    assert totals['peak_rss_mb'] == first['peak_rss_mb']
+    assert totals['process_peak_rss_mb'] == second['process_peak_rss_mb']